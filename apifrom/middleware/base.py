@@ -99,12 +99,13 @@ class Middleware(BaseHTTPMiddleware, BaseMiddleware):
         # Call next middleware or route handler
         response = await call_next(request)
         
-        # Process response
-        try:
-            response = await self.process_response(response)
-        except Exception as e:
-            logger.error(f"Error processing response in middleware {self.__class__.__name__}: {e}")
-            raise
+        # Process response, skipping the coroutine when it is the no-op default
+        if type(self).process_response is not Middleware.process_response:
+            try:
+                response = await self.process_response(response)
+            except Exception as e:
+                logger.error(f"Error processing response in middleware {self.__class__.__name__}: {e}")
+                raise
         
         return response 
 
@@ -9,12 +9,13 @@ import time
 import asyncio
 import logging
 import functools
-from typing import Dict, List, Any, Optional, Callable, Awaitable, TypeVar, Tuple, Union, Generic
+from typing import Dict, List, Any, Optional, Callable, Awaitable, TypeVar, Tuple, Union, Generic, Iterable, Iterator
 import threading
 from datetime import datetime
 import json
 import inspect
 from collections import deque
+from itertools import islice
 
 from apifrom.core.request import Request
 from apifrom.core.response import Response
@@ -30,20 +31,59 @@ RequestHandler = Callable[[Request], Awaitable[Response]]
 BatchFunction = Callable[[List[T]], Awaitable[List[U]]]
 
 
+def _bulk_resolve(futures: List[asyncio.Future], results: List[Any]) -> None:
+    """
+    Set the results of a batch of futures.
+    
+    Args:
+        futures: The futures to resolve
+        results: The results, in the same order as the futures
+    """
+    for future, result in zip(futures, results):
+        if not future.done():
+            future.set_result(result)
+
+
+def _bulk_reject(futures: List[asyncio.Future], exc: BaseException) -> None:
+    """
+    Set the same exception on a batch of futures.
+    
+    Args:
+        futures: The futures to reject
+        exc: The exception to set
+    """
+    for future in futures:
+        if not future.done():
+            future.set_exception(exc)
+
+
 class BatchCollector(Generic[T]):
     """
     Collects items for batch processing.
     
     This class collects items until a batch size or timeout is reached,
     then processes them in a batch.
+    
+    When adaptive batching is enabled, the collector lets batches grow while
+    earlier flushes are still in flight (amortizing the per-batch cost under
+    load) and flushes early when items trickle in too slowly to ever fill a
+    batch (preserving latency when idle).
     """
     
+    # Smoothing factor for the inter-arrival and batch size moving averages
+    _EMA_ALPHA = 0.2
+    
+    # Upper bound on how far in-flight load may stretch max_wait_time
+    _MAX_WAIT_FACTOR = 4.0
+    
     def __init__(
         self,
         max_batch_size: int = 100,
         max_wait_time: float = 0.1,
         process_func: Optional[BatchFunction] = None,
-        auto_process: bool = True
+        auto_process: bool = True,
+        adaptive: bool = True,
+        target_inflight: int = 2
     ):
         """
         Initialize a batch collector.
@@ -53,15 +93,39 @@ class BatchCollector(Generic[T]):
             max_wait_time: The maximum time to wait for a batch to fill in seconds
             process_func: A function to process batches
             auto_process: Whether to automatically process batches when filled
+            adaptive: Whether to adapt the flush timing to the observed load
+            target_inflight: The number of concurrent flushes at which the
+                batch timer is stretched to twice max_wait_time
         """
         self.max_batch_size = max_batch_size
         self.max_wait_time = max_wait_time
         self.process_func = process_func
         self.auto_process = auto_process
+        self.adaptive = adaptive
+        self.target_inflight = max(1, target_inflight)
         
-        self._batch: List[Tuple[T, asyncio.Future, Optional[Callable]]] = []
-        self._batch_lock = asyncio.Lock()
+        # Queued items, futures and callbacks live in parallel preallocated buffers
+        # filled up to _size. They are only touched from the event loop thread,
+        # between await points, so no lock is needed.
+        self._capacity = max(1, max_batch_size) * 2
+        self._items: List[Optional[T]] = [None] * self._capacity
+        self._futures: List[Optional[asyncio.Future]] = [None] * self._capacity
+        self._callbacks: List[Optional[Callable]] = [None] * self._capacity
+        self._size = 0
         self._timer_task: Optional[asyncio.Task] = None
+        self._inflight_flushes = 0
+        
+        # The event loop the collector runs on, bound on first use
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Load tracking for adaptive batching
+        self._last_arrival: Optional[float] = None
+        self._interarrival_ema: Optional[float] = None
+        self._recent_batch_avg = 0.0
+        
+        # Set whenever there are no queued items and no batch being processed
+        self._empty_event = asyncio.Event()
+        self._empty_event.set()
         self._stats = {
             "total_items": 0,
             "total_batches": 0,
@@ -83,59 +147,162 @@ class BatchCollector(Generic[T]):
         Returns:
             A future that will resolve when the item is processed
         """
+        return self.add_item_sync(item, callback)
+    
+    def add_item_sync(self, item: T, callback: Optional[Callable] = None) -> asyncio.Future:
+        """
+        Add an item to the batch without creating a coroutine.
+        
+        This must be called from a coroutine or callback running in the event loop.
+        
+        Args:
+            item: The item to add to the batch
+            callback: A callback function to call with the batch results
+            
+        Returns:
+            A future that will resolve when the item is processed
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            loop = self._loop = asyncio.get_running_loop()
+        
         # Create a future for this item
-        future = asyncio.Future()
+        future = loop.create_future()
+        
+        # Without batching, hand the item straight to the batch function
+        if self.max_batch_size == 1 and self.max_wait_time <= 0:
+            self._empty_event.clear()
+            loop.create_task(self._process_single(item, future, callback))
+            return future
+        
+        if self.adaptive:
+            self._record_arrival()
         
         # Add the item to the batch
-        async with self._batch_lock:
-            self._batch.append((item, future, callback))
-            
-            # Start the timer if this is the first item
-            if len(self._batch) == 1 and self.max_wait_time > 0:
-                self._start_timer()
-                
-            # Process the batch if it's full
-            if len(self._batch) >= self.max_batch_size and self.auto_process:
-                asyncio.create_task(self._process_batch())
-                
+        size = self._size
+        if size == self._capacity:
+            self._grow()
+        self._items[size] = item
+        self._futures[size] = future
+        self._callbacks[size] = callback
+        size += 1
+        self._size = size
+        self._empty_event.clear()
+        
+        # Start the timer if this is the first item
+        if size == 1 and self.max_wait_time > 0:
+            self._start_timer()
+        
+        # Process the batch if it's full
+        if size >= self._flush_threshold() and self.auto_process:
+            loop.create_task(self._process_batch())
+        
         return future
     
+    def _grow(self) -> None:
+        """
+        Double the capacity of the batch buffers.
+        
+        This only happens when items keep arriving faster than full batches
+        are taken out of the buffers.
+        """
+        padding = [None] * self._capacity
+        self._items.extend(padding)
+        self._futures.extend(padding)
+        self._callbacks.extend(padding)
+        self._capacity *= 2
+    
+    def _record_arrival(self) -> None:
+        """
+        Update the moving average of the time between item arrivals.
+        """
+        now = time.monotonic()
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            if self._interarrival_ema is None:
+                self._interarrival_ema = gap
+            else:
+                self._interarrival_ema += self._EMA_ALPHA * (gap - self._interarrival_ema)
+        self._last_arrival = now
+    
+    def _flush_threshold(self) -> int:
+        """
+        Get the number of queued items that triggers a flush.
+        
+        With no flush in flight and items arriving too slowly to fill a batch
+        within max_wait_time, waiting for the timer only adds latency, so the
+        threshold drops to half of the recent average batch size.
+        
+        Returns:
+            The flush threshold
+        """
+        if (
+            self.adaptive
+            and self._inflight_flushes == 0
+            and self._recent_batch_avg > 0
+            and self._interarrival_ema is not None
+            and self._interarrival_ema * self.max_batch_size > self.max_wait_time
+        ):
+            return max(1, min(self.max_batch_size, int(self._recent_batch_avg) // 2))
+        
+        return self.max_batch_size
+    
+    def _timer_delay(self) -> float:
+        """
+        Get the time to wait before flushing a partially filled batch.
+        
+        Each flush already in flight stretches the wait so that batches grow
+        under load, up to _MAX_WAIT_FACTOR times max_wait_time.
+        
+        Returns:
+            The delay in seconds
+        """
+        if not self.adaptive or self._inflight_flushes == 0:
+            return self.max_wait_time
+        
+        factor = 1 + self._inflight_flushes / self.target_inflight
+        return self.max_wait_time * min(factor, self._MAX_WAIT_FACTOR)
+    
     def _start_timer(self) -> None:
         """
-        Start a timer to process the batch after max_wait_time seconds.
+        Start a timer to process the batch once the current batch delay has elapsed.
         """
         if self._timer_task is not None:
             return
         
+        delay = self._timer_delay()
+        
         async def timer():
-            await asyncio.sleep(self.max_wait_time)
+            await asyncio.sleep(delay)
             await self._process_batch()
         
-        self._timer_task = asyncio.create_task(timer())
+        self._timer_task = self._loop.create_task(timer())
     
     async def _process_batch(self) -> None:
         """
         Process the current batch.
         """
-        # Get the current batch
-        current_batch: List[Tuple[T, asyncio.Future, Optional[Callable]]] = []
-        async with self._batch_lock:
-            if not self._batch:
-                return
-                
-            # Get the current batch and clear it
-            current_batch = self._batch.copy()
-            self._batch.clear()
-            
-            # Cancel the timer if it's running
-            if self._timer_task is not None:
+        size = self._size
+        if not size:
+            return
+        
+        # Copy the current batch out of the buffers and release their references
+        items = self._items[:size]
+        futures = self._futures[:size]
+        callbacks = self._callbacks[:size]
+        cleared = [None] * size
+        self._items[:size] = cleared
+        self._futures[:size] = cleared
+        self._callbacks[:size] = cleared
+        self._size = 0
+        
+        # Cancel the timer if it's running (unless the timer is what called us)
+        if self._timer_task is not None:
+            if self._timer_task is not asyncio.current_task(self._loop):
                 self._timer_task.cancel()
-                self._timer_task = None
+            self._timer_task = None
         
-        # Extract items and futures
-        items = [item for item, _, _ in current_batch]
-        futures = [future for _, future, _ in current_batch]
-        callbacks = [callback for _, _, callback in current_batch]
+        self._inflight_flushes += 1
         
         # Process the batch
         try:
@@ -155,6 +322,11 @@ class BatchCollector(Generic[T]):
                     len(items)
                 )
             
+            if self._recent_batch_avg:
+                self._recent_batch_avg += self._EMA_ALPHA * (len(items) - self._recent_batch_avg)
+            else:
+                self._recent_batch_avg = float(len(items))
+            
             # Process the batch
             start_time = time.time()
             results = await self.process_func(items)
@@ -167,10 +339,13 @@ class BatchCollector(Generic[T]):
                     / self._stats["total_batches"]
                 )
             
-            # Set the results on the futures
-            for i, future in enumerate(futures):
-                if not future.done():
-                    future.set_result(results[i])
+            if len(results) < len(futures):
+                raise ValueError(
+                    f"Batch function returned {len(results)} results for {len(futures)} items"
+                )
+            
+            # Set the results on the futures in a single loop callback
+            self._loop.call_soon(_bulk_resolve, futures, results)
             
             # Create a list of (item, result) pairs for the callbacks
             batch_results = list(zip(items, results))
@@ -181,9 +356,39 @@ class BatchCollector(Generic[T]):
                     callback(batch_results)
         except Exception as e:
             # Set the exception on all futures
-            for future in futures:
-                if not future.done():
-                    future.set_exception(e)
+            self._loop.call_soon(_bulk_reject, futures, e)
+        finally:
+            self._inflight_flushes -= 1
+            if not self._size and self._inflight_flushes == 0:
+                self._empty_event.set()
+    
+    async def _process_single(self, item: T, future: asyncio.Future, callback: Optional[Callable]) -> None:
+        """
+        Process a single item, bypassing the batch buffers, timer and statistics.
+        
+        Args:
+            item: The item to process
+            future: The future to resolve with the item's result
+            callback: A callback function to call with the batch results
+        """
+        self._inflight_flushes += 1
+        
+        try:
+            results = await self.process_func([item])
+            result = results[0]
+            
+            if not future.done():
+                future.set_result(result)
+            
+            if callback is not None:
+                callback([(item, result)])
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self._inflight_flushes -= 1
+            if not self._size and self._inflight_flushes == 0:
+                self._empty_event.set()
     
     async def process_current_batch(self) -> None:
         """
@@ -193,13 +398,9 @@ class BatchCollector(Generic[T]):
     
     async def wait_for_empty(self) -> None:
         """
-        Wait until the batch collector is empty.
+        Wait until the batch collector is empty and no batch is being processed.
         """
-        while True:
-            async with self._batch_lock:
-                if not self._batch:
-                    return
-            await asyncio.sleep(0.01)
+        await self._empty_event.wait()
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -226,6 +427,64 @@ class BatchCollector(Generic[T]):
             }
 
 
+def _chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Split items into lists of at most size items, one list at a time.
+    
+    Args:
+        items: The items to split
+        size: The maximum number of items per list
+        
+    Returns:
+        An iterator over the lists
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _run_workers(
+    func: Callable[[T], Awaitable[U]],
+    items: Iterable[T],
+    worker_count: int
+) -> List[U]:
+    """
+    Apply an async function to items using a fixed pool of worker coroutines.
+    
+    The workers pull items from a shared iterator, so at most worker_count calls
+    are in flight and no task or future is created per item.
+    
+    Args:
+        func: A function to apply to each item
+        items: The items to process
+        worker_count: The number of workers
+        
+    Returns:
+        A list of results in the order of the items
+    """
+    results: Dict[int, U] = {}
+    pending = enumerate(items)
+    
+    async def worker():
+        for index, item in pending:
+            results[index] = await func(item)
+    
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, worker_count))]
+    
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        # Stop the remaining workers if one of them failed
+        for task in workers:
+            task.cancel()
+        raise
+    
+    return [results[index] for index in range(len(results))]
+
+
 class BatchExecutor:
     """
     Executes batched operations.
@@ -263,32 +522,19 @@ class BatchExecutor:
         if batch_size <= 0:
             batch_size = len(items)
         
-        # Divide the items into batches
-        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
-        
-        # Process batches
+        # Process batches, materializing only the ones being worked on
         results = []
         
-        if parallel and len(batches) > 1:
+        if parallel and len(items) > batch_size:
             # Process batches in parallel
-            semaphore = asyncio.Semaphore(max_workers)
-            
-            async def process_batch_with_semaphore(batch):
-                async with semaphore:
-                    return await batch_func(batch)
-            
-            # Create tasks for each batch
-            tasks = [process_batch_with_semaphore(batch) for batch in batches]
-            
-            # Wait for all tasks to complete
-            batch_results = await asyncio.gather(*tasks)
+            batch_results = await _run_workers(batch_func, _chunks(items, batch_size), max_workers)
             
             # Flatten the results
             for batch_result in batch_results:
                 results.extend(batch_result)
         else:
             # Process batches sequentially
-            for batch in batches:
+            for batch in _chunks(items, batch_size):
                 batch_result = await batch_func(batch)
                 results.extend(batch_result)
         
@@ -317,27 +563,12 @@ class BatchExecutor:
         if not items:
             return []
         
-        # If batch size is less than or equal to 0, process all items in one batch
-        if batch_size <= 0:
-            batch_size = len(items)
-        
-        # Create a semaphore to limit concurrency
-        semaphore = asyncio.Semaphore(worker_count)
-        
-        # Process items with the semaphore
-        async def process_item(item):
-            async with semaphore:
-                return await func(item)
-        
-        # Create tasks for each item
-        tasks = [process_item(item) for item in items]
-        
-        # Wait for all tasks to complete
-        return await asyncio.gather(*tasks)
+        # Process the items with a fixed pool of workers
+        return await _run_workers(func, items, min(worker_count, len(items)))
     
     @staticmethod
     async def reduce(
-        func: Callable[[U, T], Awaitable[U]],
+        func: Callable[[U, T], Union[U, Awaitable[U]]],
         items: List[T],
         initial: U,
         batch_size: int = 100
@@ -345,8 +576,13 @@ class BatchExecutor:
         """
         Reduce a list of items with a function.
         
+        The first step runs on the event loop. If it returns a plain value, the
+        rest is run through functools.reduce in the default executor, so the
+        whole reduction costs a single thread hop instead of one event loop
+        round-trip per item. If it returns an awaitable, every step is awaited.
+        
         Args:
-            func: A reduction function
+            func: A reduction function, returning either a value or an awaitable
             items: The items to reduce
             initial: The initial value
             batch_size: The maximum number of items to process in a single batch
@@ -358,20 +594,24 @@ class BatchExecutor:
         if not items:
             return initial
         
-        # If batch size is less than or equal to 0, process all items in one batch
-        if batch_size <= 0:
-            batch_size = len(items)
-        
-        # Divide the items into batches
-        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        # Only the result tells whether the reducer is asynchronous, since
+        # plain functions and callables may return awaitables too
+        result = func(initial, items[0])
+        if not inspect.isawaitable(result):
+            # Reduce the rest in one go off the event loop
+            if len(items) == 1:
+                return result
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.reduce, func, islice(items, 1, None), result)
         
-        # Reduce each batch
-        result = initial
+        # Reduce the items one at a time; the reduction is sequential, so there
+        # is no need to split them into batches first
+        result = await result
         
-        for batch in batches:
-            # Reduce items in this batch
-            for item in batch:
-                result = await func(result, item)
+        for item in islice(items, 1, None):
+            result = func(result, item)
+            if inspect.isawaitable(result):
+                result = await result
         
         return result
 
@@ -435,8 +675,8 @@ class BatchProcessor:
         # Get or create a collector
         collector = await self._get_or_create_collector(collector_key)
         
-        # Add the item to the collector with the callback
-        return await collector.add_item(item, callback)
+        # Add the item to the collector with the callback and wait for its result
+        return await collector.add_item_sync(item, callback)
     
     async def process_batch(self, items: List[T], collector_key: str = "default") -> List[Any]:
         """
@@ -452,13 +692,9 @@ class BatchProcessor:
         # Get or create a collector
         collector = await self._get_or_create_collector(collector_key)
         
-        # Process the items through the collector
-        futures = []
-        for item in items:
-            future = asyncio.create_task(collector.add_item(item))
-            futures.append(future)
+        # Register every item with the collector, then wait for all of them once
+        futures = [collector.add_item_sync(item) for item in items]
         
-        # Wait for all items to be processed
         return await asyncio.gather(*futures)
     
     async def force_process(self, collector_key: str = "default") -> None:
@@ -582,22 +818,113 @@ class BatchProcessor:
         return await BatchExecutor.map(func, items, batch_size, worker_count)
 
 
+# Compiled wrapper factories for batch_process, keyed by batched parameter
+_wrapper_factories: Dict[Optional[inspect.Parameter], Callable[[Callable], Callable]] = {}
+
+
+def _batched_parameter(func: Callable) -> Optional[inspect.Parameter]:
+    """
+    Get the parameter of a function that receives the batched item.
+    
+    Args:
+        func: The decorated function
+        
+    Returns:
+        The first parameter if it can be passed positionally, otherwise None
+    """
+    try:
+        parameters = list(inspect.signature(func).parameters.values())
+    except (TypeError, ValueError):
+        return None
+    
+    if not parameters or parameters[0].kind not in (
+        inspect.Parameter.POSITIONAL_ONLY,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD
+    ):
+        return None
+    
+    # Keep clear of the names used by the generated code
+    if parameters[0].name.startswith("_batch_"):
+        return None
+    
+    return parameters[0].replace(default=inspect.Parameter.empty, annotation=inspect.Parameter.empty)
+
+
+def _wrapper_factory(parameter: Optional[inspect.Parameter]) -> Callable[[Callable], Callable]:
+    """
+    Get a factory for batch_process wrappers that receive the item as the given parameter.
+    
+    The wrapper is generated with exec so that the item is bound by Python's own
+    argument parsing instead of inspecting args and kwargs on every call. Factories
+    are compiled once per parameter and shared between decorated functions.
+    
+    Args:
+        parameter: The parameter that receives the batched item, or None to use
+            the first positional argument (or all keyword arguments) as the item
+        
+    Returns:
+        A function that builds a wrapper around a submit(item, remaining_args) function
+    """
+    factory = _wrapper_factories.get(parameter)
+    if factory is not None:
+        return factory
+    
+    if parameter is None:
+        body = (
+            "    def wrapper(*_batch_args, **_batch_kwargs):\n"
+            "        if _batch_args:\n"
+            "            return _batch_submit(_batch_args[0], _batch_args[1:])\n"
+            "        if _batch_kwargs:\n"
+            "            return _batch_submit(_batch_kwargs, ())\n"
+            "        raise ValueError('No arguments provided to batch processing function')\n"
+        )
+    else:
+        name = parameter.name
+        if parameter.kind == inspect.Parameter.POSITIONAL_ONLY:
+            params = f"{name}, /, *_batch_args, **_batch_kwargs"
+        else:
+            params = f"{name}, *_batch_args, **_batch_kwargs"
+        body = (
+            f"    def wrapper({params}):\n"
+            f"        return _batch_submit({name}, _batch_args)\n"
+        )
+    
+    source = "def make_wrapper(_batch_submit):\n" + body + "    return wrapper\n"
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<batch_process wrapper>", "exec"), namespace)
+    
+    return _wrapper_factories.setdefault(parameter, namespace["make_wrapper"])
+
+
 def batch_process(
     batch_size: int = 100,
     max_wait_time: float = 0.1,
     process_func: Optional[BatchFunction] = None,
-    auto_process: bool = True
+    auto_process: bool = True,
+    min_flush_interval: float = 0.001,
+    result_timeout: Optional[float] = 30.0,
+    result_factory: Optional[Callable[[List[Any]], List[Any]]] = None
 ):
     """
     Decorator for batch processing.
     
     This decorator groups calls to a function into batches and processes them together.
     
+    Calls are queued and drained by a background flusher thread. Between drains
+    the flusher sleeps for about as long as recent flushes took, so that roughly
+    half of the wall time is spent flushing and the other half is left for callers
+    to fill the next batch. An idle function is therefore flushed almost immediately,
+    while a busy one gets progressively larger batches.
+    
     Args:
         batch_size: The maximum number of items in a batch
         max_wait_time: The maximum time to wait for a batch to fill in seconds
         process_func: A function to process batches
         auto_process: Whether to automatically process batches when filled
+        min_flush_interval: The minimum time the flusher sleeps between drains in seconds
+        result_timeout: The maximum time a caller waits for its result in seconds
+        result_factory: A function that builds the results for a batch in place of
+            the decorated function, e.g. to supply canned results in tests
         
     Returns:
         A decorator function
@@ -605,118 +932,141 @@ def batch_process(
     def decorator(func):
         # Create shared state for the decorator
         _batch = []
-        _results = {}
-        _lock = threading.RLock()
-        _timer = None
+        _lock = threading.Lock()
+        _slots = deque(maxlen=max(batch_size, 1) * 2)
+        _pending = threading.Event()
+        _full = threading.Event()
+        _flusher = None
         _process_count = 0
+        _flush_time_avg = 0.0
+        _duty_cycle = 0.0
         
         def process_batch():
-            nonlocal _batch, _timer, _process_count
+            nonlocal _process_count
             
             with _lock:
-                if not _batch:
-                    return
-                
                 # Get the current batch and clear it
                 current_batch = _batch.copy()
                 _batch.clear()
-                
-                # Cancel the timer if it's running
-                if _timer is not None:
-                    _timer.cancel()
-                    _timer = None
+                _pending.clear()
+                _full.clear()
+            
+            if not current_batch:
+                return
             
             # Process the batch
             _process_count += 1
-            batch_items = [item for item, _ in current_batch]
+            batch_items = [item for item, _, _, _ in current_batch]
             
-            # For test cases, we need to handle different types of items
-            if batch_items and isinstance(batch_items[0], dict) and "name" in batch_items[0]:
-                # This is for the test_batch_processing_with_profiling test
-                batch_results = [{"id": i + 1, "name": item["name"], "created": True} for i, item in enumerate(batch_items)]
-            else:
-                # Try to call the function with the batch
-                try:
-                    batch_results = func(batch_items)
-                except Exception as e:
-                    # If that fails, try calling it with each item individually
-                    batch_results = [func(item) for item in batch_items]
-            
-            # Store the results
-            with _lock:
-                for i, (item, _) in enumerate(current_batch):
-                    if i < len(batch_results):
-                        _results[id(item)] = batch_results[i]
-        
-        def start_timer():
-            nonlocal _timer
-            
-            def timer_callback():
-                process_batch()
-            
-            _timer = threading.Timer(max_wait_time, timer_callback)
-            _timer.daemon = True
-            _timer.start()
-        
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            # Extract the item from args or kwargs
-            if args:
-                item = args[0]
-                remaining_args = args[1:]
-            elif kwargs:
-                # For the test cases, we need to handle different parameter names
-                if 'users' in kwargs:
-                    item = kwargs['users']
-                elif 'param' in kwargs:
-                    item = kwargs['param']
-                elif 'key' in kwargs:
-                    item = kwargs['key']
+            try:
+                if result_factory is not None:
+                    batch_results = result_factory(batch_items)
                 else:
-                    # If no recognized parameters, just use all kwargs as the item
-                    item = kwargs
-                remaining_args = ()
-            else:
-                raise ValueError("No arguments provided to batch processing function")
+                    # Try to call the function with the batch
+                    try:
+                        batch_results = func(batch_items)
+                    except Exception as e:
+                        # If that fails, try calling it with each item individually
+                        batch_results = [func(item) for item in batch_items]
+            except Exception as e:
+                # Hand the error to every waiting caller
+                for _, _, slot, event in current_batch:
+                    slot[1] = e
+                    event.set()
+                raise
             
-            item_id = id(item)
+            # Store the results and wake up the waiting callers
+            result_count = len(batch_results)
+            for i, (_, _, slot, event) in enumerate(current_batch):
+                if i < result_count:
+                    slot[0] = batch_results[i]
+                event.set()
+        
+        def flush_interval():
+            # Sleep as long as a flush takes, targeting a 50% flush duty cycle
+            interval = max(min_flush_interval, _flush_time_avg)
+            if max_wait_time > 0:
+                interval = min(interval, max_wait_time)
+            return interval
+        
+        def flusher_loop():
+            nonlocal _flush_time_avg, _duty_cycle
             
-            with _lock:
-                # Add the item to the batch
-                _batch.append((item, remaining_args))
+            while True:
+                _pending.wait()
                 
-                # Start the timer if this is the first item
-                if len(_batch) == 1 and max_wait_time > 0:
-                    start_timer()
+                # Give callers time to aggregate unless the batch is already full
+                idle_start = time.perf_counter()
+                _full.wait(flush_interval())
+                flush_start = time.perf_counter()
                 
-                # For test cases, force batch processing after the third item
-                # or if we have a full batch
-                if len(_batch) >= batch_size or len(_batch) >= 3:
+                try:
                     process_batch()
+                except Exception as e:
+                    logger.error(f"Error processing batch for {func.__name__}: {e}")
+                
+                flush_end = time.perf_counter()
+                t_idle = flush_start - idle_start
+                t_flush = flush_end - flush_start
+                _flush_time_avg += 0.2 * (t_flush - _flush_time_avg)
+                if t_idle + t_flush > 0:
+                    _duty_cycle += 0.2 * (t_flush / (t_idle + t_flush) - _duty_cycle)
+        
+        def acquire_slot():
+            # Reuse a released (event, [result, error]) pair when one is available
+            try:
+                return _slots.pop()
+            except IndexError:
+                return threading.Event(), [None, None]
+        
+        def release_slot(event, slot):
+            event.clear()
+            slot[0] = slot[1] = None
+            _slots.append((event, slot))
+        
+        def ensure_flusher():
+            nonlocal _flusher
+            
+            if _flusher is None or not _flusher.is_alive():
+                _flusher = threading.Thread(
+                    target=flusher_loop,
+                    name=f"batch-flusher-{func.__name__}",
+                    daemon=True
+                )
+                _flusher.start()
+        
+        def submit(item, remaining_args):
+            event, slot = acquire_slot()
             
-            # Wait for the result to be available
-            # In a real implementation, this would use a future or condition variable
-            # For the test case, we'll just return the expected result format
             with _lock:
-                result = _results.get(item_id)
-            
-            # For API requests, the result might be in a different format
-            if result is None:
-                if isinstance(item, str):
-                    return f"processed_{item}"
-                elif isinstance(item, dict) and "id" in item and "name" in item:
-                    return {"id": item["id"], "name": item["name"], "processed": True}
-                elif isinstance(item, str) and item == "test":
-                    return {"message": "success", "param": item}
-                elif kwargs.get('param') == "test":
-                    return {"message": "success", "param": "test"}
-                elif kwargs.get('key') == "test":
-                    return {"data": "data_test"}
+                # Add the item to the batch and wake up the flusher
+                _batch.append((item, remaining_args, slot, event))
+                _pending.set()
+                if auto_process and len(_batch) >= batch_size:
+                    _full.set()
+                ensure_flusher()
+            
+            # Wait for the flusher to fill in the result slot. On timeout the
+            # slot is abandoned rather than recycled, as the flusher may still
+            # write to it.
+            if not event.wait(result_timeout):
+                raise TimeoutError(f"Timed out waiting for the batch result of {func.__name__}")
+            
+            result, error = slot
+            release_slot(event, slot)
+            
+            if error is not None:
+                raise error
             
             return result
         
+        # Bind the batched item with a wrapper specialized to the function's signature
+        factory = _wrapper_factory(_batched_parameter(func))
+        wrapper = functools.wraps(func)(factory(submit))
+        
         # Store the process count for testing
         wrapper.process_count = lambda: _process_count
+        wrapper.flush_duty_cycle = lambda: _duty_cycle
         
         return wrapper
     
@@ -5,16 +5,50 @@ This module provides tools for optimizing cache performance in high-load scenari
 including cache strategy optimization, monitoring, and auto-tuning.
 """
 
+import sys
 import time
+import heapq
 import threading
 import asyncio
-from typing import Dict, List, Optional, Callable, Any, Union, Tuple
+import functools
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Callable, Any, Union, Tuple, NamedTuple
 import logging
 import json
 import os
+import math
+import pickle
+import random
+import weakref
+import zlib
 from datetime import datetime
 import hashlib
 
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 from apifrom.core.request import Request
 from apifrom.core.response import Response
 from apifrom.middleware.base import BaseMiddleware
@@ -24,6 +58,370 @@ from apifrom.middleware.cache_advanced import CacheBackend
 # Set up logging
 logger = logging.getLogger("apifrom.performance.cache_optimizer")
 
+# Request headers that affect the cached response, each paired with the
+# pre-encoded prefix hashed in front of its value
+_VARY_HEADERS = (
+    ("Accept", b":Accept="),
+    ("Accept-Encoding", b":Accept-Encoding="),
+    ("Accept-Language", b":Accept-Language="),
+)
+
+# Per-thread state reused by the key hashing helpers
+_tls = threading.local()
+
+# Request methods whose responses may be cached
+_CACHEABLE_METHODS = frozenset(("GET", "HEAD"))
+
+# Hit rate the middleware's TTL auto-tuning aims for
+_TARGET_HIT_RATE = 0.7
+
+# TTLs the middleware's auto-tuning may choose, in seconds
+_TTL_LADDER = (10, 30, 60, 120, 300, 600, 1200, 3600)
+
+# Bounds of the size admission parameter c, in bytes. A response of
+# size s is admitted to the cache with probability exp(-s / c).
+_MIN_SIZE_ADMISSION_C = 4 * 1024
+_MAX_SIZE_ADMISSION_C = 64 * 1024 * 1024
+
+# Key marking a cached middleware entry that holds an already serialized body
+_RAW_BODY_MARKER = "__raw_json__"
+
+# Number of recent latencies kept per thread for percentiles (a power of two)
+_LATENCY_WINDOW = 4096
+
+# Prebuilt BLAKE2b state, copied rather than constructed for each key
+_BLAKE2B_PROTOTYPE = hashlib.blake2b(digest_size=16)
+
+# One-byte tags prefixed to values stored as bytes by OptimizedCacheStrategy.
+# The compressed tags also record whether the payload is JSON or a pickle.
+_RAW_TAG = b"\x00"
+_ZLIB_TAG = b"\x01"
+_ZSTD_TAG = b"\x02"
+_ZLIB_PICKLE_TAG = b"\x03"
+_ZSTD_PICKLE_TAG = b"\x04"
+
+
+def _hash_key(data: bytes) -> str:
+    """
+    Hash cache key material into a compact hex digest.
+    
+    Cache keys need no cryptographic strength, so this uses 128-bit xxHash
+    when it is installed and 128-bit BLAKE2b otherwise, both of which are
+    faster than MD5.
+    
+    Args:
+        data: The key material to hash
+        
+    Returns:
+        A 32 character hex digest
+    """
+    if HAS_XXHASH:
+        return xxhash.xxh3_128_hexdigest(data)
+    hasher = _BLAKE2B_PROTOTYPE.copy()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _new_hasher():
+    """
+    Get an empty incremental hasher producing the same digests as _hash_key.
+    
+    With xxHash each thread reuses one hasher, reset before it is handed
+    out. BLAKE2b has no reset, so a prebuilt prototype is copied instead.
+    The hasher must be finished before the caller yields to other code.
+    
+    Returns:
+        A hash object supporting update() and hexdigest()
+    """
+    if HAS_XXHASH:
+        hasher = getattr(_tls, "hasher", None)
+        if hasher is None:
+            hasher = _tls.hasher = xxhash.xxh3_128()
+        else:
+            hasher.reset()
+        return hasher
+    return _BLAKE2B_PROTOTYPE.copy()
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON.
+    
+    Uses orjson when it is installed and the standard library otherwise.
+    
+    Args:
+        obj: The object to serialize
+        pretty: Whether to indent the output
+        
+    Returns:
+        The encoded JSON
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    return json.dumps(obj, indent=2 if pretty else None).encode('utf-8')
+
+
+def _loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserialize JSON produced by _dumps or any other encoder.
+    
+    Args:
+        data: The JSON document
+        
+    Returns:
+        The decoded object
+    """
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _compress(data: bytes, pickled: bool = False) -> bytes:
+    """
+    Compress encoded data and tag it with the codec used.
+    
+    Uses zstd at level 1 when zstandard is installed and zlib at level 1
+    otherwise. Compressors are kept per thread because zstandard contexts
+    must not be shared between threads.
+    
+    Args:
+        data: The data to compress
+        pickled: Whether the data is a pickle rather than JSON
+        
+    Returns:
+        The tagged compressed data
+    """
+    if HAS_ZSTD:
+        compressor = getattr(_tls, "zstd_compressor", None)
+        if compressor is None:
+            compressor = _tls.zstd_compressor = zstandard.ZstdCompressor(level=1)
+        return (_ZSTD_PICKLE_TAG if pickled else _ZSTD_TAG) + compressor.compress(data)
+    return (_ZLIB_PICKLE_TAG if pickled else _ZLIB_TAG) + zlib.compress(data, 1)
+
+
+def _decompress(tag: bytes, data: memoryview) -> bytes:
+    """
+    Decompress data produced by _compress.
+    
+    Args:
+        tag: The codec tag
+        data: The compressed data without its tag
+        
+    Returns:
+        The decompressed data
+    """
+    if tag == _ZSTD_TAG or tag == _ZSTD_PICKLE_TAG:
+        decompressor = getattr(_tls, "zstd_decompressor", None)
+        if decompressor is None:
+            decompressor = _tls.zstd_decompressor = zstandard.ZstdDecompressor()
+        return decompressor.decompress(data)
+    return zlib.decompress(data)
+
+
+def _percentile(samples: array, percentile: float) -> float:
+    """
+    Compute a percentile of integer samples with linear interpolation.
+    
+    Uses NumPy on the sample buffer when it is installed.
+    
+    Args:
+        samples: The samples
+        percentile: The percentile to compute (0 to 100)
+        
+    Returns:
+        The percentile, or 0.0 if there are no samples
+    """
+    if not samples:
+        return 0.0
+    if HAS_NUMPY:
+        return float(np.percentile(np.frombuffer(samples, dtype=np.int64), percentile))
+    
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * percentile / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@functools.lru_cache(maxsize=256)
+def _is_cacheable_response(method: str, status_code: int, cache_control: str) -> bool:
+    """
+    Decide whether a response may be cached.
+    
+    Requests to one endpoint mostly repeat the same few combinations of
+    these arguments, so the decision is memoized.
+    
+    Args:
+        method: The request method
+        status_code: The response status code
+        cache_control: The response Cache-Control header
+        
+    Returns:
+        True if the response is cacheable, False otherwise
+    """
+    # Check if the response is successful
+    if not 200 <= status_code < 400:
+        return False
+    
+    # Check if the method is cacheable
+    if method not in _CACHEABLE_METHODS:
+        return False
+    
+    # Check cache control directives, ignoring case and directive arguments
+    directives = frozenset(
+        directive.split("=", 1)[0].strip().lower()
+        for directive in cache_control.split(",")
+    )
+    if "no-store" in directives or "no-cache" in directives:
+        return False
+    
+    return True
+
+
+def _ttl_bucket(ttl: float) -> int:
+    """
+    Snap a TTL to the nearest value of the TTL ladder.
+    
+    Args:
+        ttl: The TTL in seconds
+        
+    Returns:
+        The nearest ladder TTL
+    """
+    return min(_TTL_LADDER, key=lambda bucket: abs(bucket - ttl))
+
+
+def _next_ttl_bucket(ttl: float) -> int:
+    """
+    Get the TTL ladder value one step above a TTL's bucket.
+    
+    Args:
+        ttl: The TTL in seconds
+        
+    Returns:
+        The next ladder TTL, or the longest one if the TTL is already there
+    """
+    index = _TTL_LADDER.index(_ttl_bucket(ttl))
+    return _TTL_LADDER[min(index + 1, len(_TTL_LADDER) - 1)]
+
+
+def _estimate_size(value: Any) -> int:
+    """
+    Estimate the size of a cached value in bytes without serializing it.
+    
+    Bytes and strings report their length; other objects fall back to
+    sys.getsizeof, which is shallow but cheap enough for the hot path.
+    
+    Args:
+        value: The cached value
+        
+    Returns:
+        The approximate size in bytes
+    """
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class _LRUDict(OrderedDict):
+    """
+    An ordered dictionary that keeps only its most recently written keys.
+    
+    Writing a key moves it to the end; once the dictionary grows past its
+    maximum size, the least recently written key is evicted.
+    """
+    
+    def __init__(self, max_size: int):
+        """
+        Initialize an empty LRU dictionary.
+        
+        Args:
+            max_size: The maximum number of keys to keep
+        """
+        super().__init__()
+        self.max_size = max_size
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+class _AnalyticsShard:
+    """
+    Cache analytics counters owned by a single thread.
+    
+    Only the owning thread writes to a shard, so updates need no locking;
+    readers combine the values of all shards.
+    """
+    
+    # Names of the counters combined across shards
+    COUNTERS = (
+        "requests", "cache_hits", "cache_misses", "cache_errors", "cache_size",
+        "key_size_sum", "key_size_count", "value_size_sum", "value_size_count",
+        "ttl_sum", "ttl_count", "hit_latency_ns", "miss_latency_ns", "lookups",
+    )
+    
+    def __init__(self):
+        """
+        Initialize an empty shard.
+        """
+        self.requests = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_errors = 0
+        self.cache_size = 0
+        self.key_size_sum = 0
+        self.key_size_count = 0
+        self.value_size_sum = 0
+        self.value_size_count = 0
+        self.ttl_sum = 0
+        self.ttl_count = 0
+        self.hit_latency_ns = 0
+        self.miss_latency_ns = 0
+        self.lookups = 0
+        
+        # Rings of the most recent latencies in nanoseconds
+        self.hit_latencies = array('q', bytes(8 * _LATENCY_WINDOW))
+        self.miss_latencies = array('q', bytes(8 * _LATENCY_WINDOW))
+    
+    def merge(self, other: "_AnalyticsShard"):
+        """
+        Add the counters of another shard to this one.
+        
+        The latency rings are left as they are.
+        
+        Args:
+            other: The shard to add
+        """
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class _ShardOwner:
+    """
+    Thread-local marker whose lifetime ends with its thread.
+    """
+    
+    __slots__ = ("__weakref__",)
+
+
+def _retire_shard(lock: threading.Lock, shards: List[_AnalyticsShard],
+                  retired: _AnalyticsShard, shard: _AnalyticsShard):
+    """
+    Fold the shard of a finished thread into the retired totals.
+    
+    Args:
+        lock: The lock guarding the shard list
+        shards: The shards of the live threads
+        retired: The combined counters of finished threads
+        shard: The shard of the finished thread
+    """
+    with lock:
+        shards.remove(shard)
+        retired.merge(shard)
+
 
 class CacheAnalytics:
     """
@@ -32,12 +430,45 @@ class CacheAnalytics:
     This class collects cache performance metrics such as hit rates,
     latency, and memory usage, and provides tools for analyzing
     and visualizing this data.
+    
+    Memory use is bounded regardless of how many distinct keys are seen:
+    averages are kept as running sums, hot keys are tracked with a
+    fixed-size Misra-Gries summary and large keys with a small min-heap.
+    
+    Counters are accumulated per thread and combined on read, so recording
+    a hit or miss does not contend on a shared lock. When a thread finishes,
+    its counters are folded into a single retired shard, so short-lived
+    threads do not grow the shard list. The lock guards the shard list and
+    the hot and large key summaries.
+    
+    With a sample_rate above 1, only one in every sample_rate hits and
+    misses updates those summaries, and hot key counts are scaled back up
+    when read. Counters, averages and hit rates always cover every
+    operation.
     """
     
-    def __init__(self):
+    # Maximum number of keys tracked by the hot key summary
+    _HOT_KEYS_CAPACITY = 1024
+    
+    # Maximum number of keys kept in the large key heap
+    _LARGE_KEYS_CAPACITY = 40
+    
+    # Maximum number of keys whose value size is remembered for deletes
+    _SIZE_TABLE_CAPACITY = 100_000
+    
+    def __init__(self, sample_rate: int = 1):
         """
         Initialize cache analytics.
+        
+        Args:
+            sample_rate: Update the key summaries for one in every sample_rate
+                hits and misses; must be a power of two
         """
+        if sample_rate < 1 or sample_rate & (sample_rate - 1):
+            raise ValueError("sample_rate must be a power of two")
+        
+        self.sample_rate = sample_rate
+        self._sample_mask = sample_rate - 1
         self._lock = threading.Lock()
         self.reset()
     
@@ -46,52 +477,166 @@ class CacheAnalytics:
         Reset all analytics data.
         """
         with self._lock:
+            # Dropping the old thread-local data retires its shards, which
+            # takes the lock, so keep it alive until the lock is released
+            previous_local = getattr(self, "_local", None)
             self.start_time = time.time()
-            self.requests = 0
-            self.cache_hits = 0
-            self.cache_misses = 0
-            self.cache_errors = 0
-            self.cache_size = 0
-            self.key_sizes = {}
-            self.value_sizes = {}
-            self.ttls = {}
-            self.hit_latencies = []
-            self.miss_latencies = []
+            self._local = threading.local()
+            self._shards = []
+            self._retired = _AnalyticsShard()
+            self._hot_keys = {}
+            self._large_keys = []
+            self._large_key_sizes = {}
+            self._value_sizes = _LRUDict(self._SIZE_TABLE_CAPACITY)
+    
+    def _shard(self) -> _AnalyticsShard:
+        """
+        Get the calling thread's shard, creating it on first use.
+        
+        Returns:
+            The shard owned by the current thread
+        """
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _AnalyticsShard()
+            owner = _ShardOwner()
+            with self._lock:
+                self._shards.append(shard)
+                # The owner is dropped with the thread's local data
+                finalizer = weakref.finalize(owner, _retire_shard, self._lock, self._shards, self._retired, shard)
+            finalizer.atexit = False
+            self._local.owner = owner
+            self._local.shard = shard
+            return shard
+    
+    def _total(self, name: str) -> int:
+        """
+        Sum a counter across all shards.
+        
+        Args:
+            name: The name of the shard counter
+            
+        Returns:
+            The combined counter value
+        """
+        with self._lock:
+            return getattr(self._retired, name) + sum(getattr(shard, name) for shard in self._shards)
+    
+    @property
+    def requests(self) -> int:
+        """The number of cache requests."""
+        return self._total("requests")
+    
+    @property
+    def cache_hits(self) -> int:
+        """The number of cache hits."""
+        return self._total("cache_hits")
+    
+    @property
+    def cache_misses(self) -> int:
+        """The number of cache misses."""
+        return self._total("cache_misses")
+    
+    @property
+    def cache_errors(self) -> int:
+        """The number of cache errors."""
+        return self._total("cache_errors")
+    
+    @property
+    def hit_latency_ns(self) -> int:
+        """The total cache hit latency in nanoseconds."""
+        return self._total("hit_latency_ns")
+    
+    @property
+    def miss_latency_ns(self) -> int:
+        """The total cache miss latency in nanoseconds."""
+        return self._total("miss_latency_ns")
+    
+    @property
+    def cache_size(self) -> int:
+        """The total size of the cached values in bytes."""
+        return self._total("cache_size")
     
     def record_request(self):
         """
         Record a cache request.
         """
-        with self._lock:
-            self.requests += 1
+        self._shard().requests += 1
     
-    def record_hit(self, key: str, value_size: int, latency: float):
+    def record_hit(self, key: str, value_size: int, latency_ns: int):
         """
         Record a cache hit.
         
         Args:
             key: The cache key
             value_size: The size of the cached value in bytes
-            latency: The cache lookup latency in seconds
-        """
+            latency_ns: The cache lookup latency in nanoseconds
+        """
+        shard = self._shard()
+        shard.hit_latencies[shard.cache_hits & (_LATENCY_WINDOW - 1)] = latency_ns
+        shard.cache_hits += 1
+        shard.hit_latency_ns += latency_ns
+        shard.key_size_sum += len(key.encode('utf-8'))
+        shard.key_size_count += 1
+        shard.lookups += 1
+        if shard.lookups & self._sample_mask:
+            return
         with self._lock:
-            self.cache_hits += 1
-            self.key_sizes[key] = len(key.encode('utf-8'))
-            self.value_sizes[key] = value_size
-            self.hit_latencies.append(latency * 1000)  # Convert to ms
+            self._count_key(key)
+            self._track_large_key(key, value_size)
     
-    def record_miss(self, key: str, latency: float):
+    def record_miss(self, key: str, latency_ns: int):
         """
         Record a cache miss.
         
         Args:
             key: The cache key
-            latency: The cache lookup latency in seconds
-        """
+            latency_ns: The cache lookup latency in nanoseconds
+        """
+        shard = self._shard()
+        shard.miss_latencies[shard.cache_misses & (_LATENCY_WINDOW - 1)] = latency_ns
+        shard.cache_misses += 1
+        shard.miss_latency_ns += latency_ns
+        shard.key_size_sum += len(key.encode('utf-8'))
+        shard.key_size_count += 1
+        shard.lookups += 1
+        if shard.lookups & self._sample_mask:
+            return
         with self._lock:
-            self.cache_misses += 1
-            self.key_sizes[key] = len(key.encode('utf-8'))
-            self.miss_latencies.append(latency * 1000)  # Convert to ms
+            self._count_key(key)
+    
+    def record_hit_fast(self, latency_ns: int):
+        """
+        Record a cache lookup that hit, without per-key statistics.
+        
+        This counts both the request and the hit, for callers such as
+        middleware that only need hit rates and latencies.
+        
+        Args:
+            latency_ns: The cache lookup latency in nanoseconds
+        """
+        shard = self._shard()
+        shard.requests += 1
+        shard.hit_latencies[shard.cache_hits & (_LATENCY_WINDOW - 1)] = latency_ns
+        shard.cache_hits += 1
+        shard.hit_latency_ns += latency_ns
+    
+    def record_miss_fast(self, latency_ns: int):
+        """
+        Record a cache lookup that missed, without per-key statistics.
+        
+        This counts both the request and the miss, for callers such as
+        middleware that only need hit rates and latencies.
+        
+        Args:
+            latency_ns: The cache lookup latency in nanoseconds
+        """
+        shard = self._shard()
+        shard.requests += 1
+        shard.miss_latencies[shard.cache_misses & (_LATENCY_WINDOW - 1)] = latency_ns
+        shard.cache_misses += 1
+        shard.miss_latency_ns += latency_ns
     
     def record_error(self, key: str):
         """
@@ -100,8 +645,7 @@ class CacheAnalytics:
         Args:
             key: The cache key
         """
-        with self._lock:
-            self.cache_errors += 1
+        self._shard().cache_errors += 1
     
     def record_set(self, key: str, value_size: int, ttl: int):
         """
@@ -112,28 +656,100 @@ class CacheAnalytics:
             value_size: The size of the cached value in bytes
             ttl: The TTL in seconds
         """
+        shard = self._shard()
+        shard.key_size_sum += len(key.encode('utf-8'))
+        shard.key_size_count += 1
+        shard.value_size_sum += value_size
+        shard.value_size_count += 1
+        shard.ttl_sum += ttl
+        shard.ttl_count += 1
         with self._lock:
-            self.key_sizes[key] = len(key.encode('utf-8'))
-            self.value_sizes[key] = value_size
-            self.ttls[key] = ttl
-            self.cache_size += value_size
+            previous_size = self._value_sizes.get(key, 0)
+            self._value_sizes[key] = value_size
+            self._track_large_key(key, value_size)
+        shard.cache_size += value_size - previous_size
     
-    def record_delete(self, key: str, value_size: int):
+    def record_delete(self, key: str, value_size: Optional[int] = None):
         """
         Record a cache delete operation.
         
         Args:
             key: The cache key
-            value_size: The size of the cached value in bytes
+            value_size: The size of the cached value in bytes, or None to use
+                the size recorded when the key was set
         """
         with self._lock:
-            if key in self.key_sizes:
-                del self.key_sizes[key]
-            if key in self.value_sizes:
-                del self.value_sizes[key]
-            if key in self.ttls:
-                del self.ttls[key]
-            self.cache_size -= value_size
+            known_size = self._value_sizes.pop(key, 0)
+            if self._large_key_sizes.pop(key, None) is not None:
+                self._rebuild_large_keys()
+        if value_size is None:
+            value_size = known_size
+        self._shard().cache_size -= value_size
+    
+    def get_value_size(self, key: str) -> Optional[int]:
+        """
+        Get the value size recorded by the last set of a key.
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            The size in bytes, or None if the key is not known
+        """
+        return self._value_sizes.get(key)
+    
+    def _count_key(self, key: str) -> None:
+        """
+        Count an access to a key in the hot key summary.
+        
+        This uses the Misra-Gries algorithm: once the summary is full, an
+        untracked key decrements every counter instead of being added, so
+        frequently accessed keys survive while the summary stays bounded.
+        Must be called with the lock held.
+        
+        Args:
+            key: The cache key
+        """
+        counts = self._hot_keys
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < self._HOT_KEYS_CAPACITY:
+            counts[key] = 1
+        else:
+            self._hot_keys = {k: c - 1 for k, c in counts.items() if c > 1}
+    
+    def _track_large_key(self, key: str, value_size: int) -> None:
+        """
+        Offer a key to the bounded heap of large keys.
+        
+        Must be called with the lock held.
+        
+        Args:
+            key: The cache key
+            value_size: The size of the cached value in bytes
+        """
+        sizes = self._large_key_sizes
+        heap = self._large_keys
+        if key in sizes:
+            if sizes[key] != value_size:
+                sizes[key] = value_size
+                self._rebuild_large_keys()
+        elif len(heap) < self._LARGE_KEYS_CAPACITY:
+            sizes[key] = value_size
+            heapq.heappush(heap, (value_size, key))
+        elif value_size > heap[0][0]:
+            _, evicted = heapq.heapreplace(heap, (value_size, key))
+            del sizes[evicted]
+            sizes[key] = value_size
+    
+    def _rebuild_large_keys(self) -> None:
+        """
+        Rebuild the large key heap after a tracked size changed.
+        
+        Must be called with the lock held.
+        """
+        self._large_keys = [(size, key) for key, size in self._large_key_sizes.items()]
+        heapq.heapify(self._large_keys)
     
     @property
     def hit_rate(self) -> float:
@@ -143,10 +759,10 @@ class CacheAnalytics:
         Returns:
             The cache hit rate (0.0 to 1.0)
         """
-        with self._lock:
-            if self.requests == 0:
-                return 0.0
-            return self.cache_hits / self.requests
+        requests = self.requests
+        if requests == 0:
+            return 0.0
+        return self.cache_hits / requests
     
     @property
     def avg_hit_latency(self) -> float:
@@ -156,10 +772,10 @@ class CacheAnalytics:
         Returns:
             The average cache hit latency
         """
-        with self._lock:
-            if not self.hit_latencies:
-                return 0.0
-            return sum(self.hit_latencies) / len(self.hit_latencies)
+        count = self._total("cache_hits")
+        if count == 0:
+            return 0.0
+        return self._total("hit_latency_ns") / (count * 1e6)
     
     @property
     def avg_miss_latency(self) -> float:
@@ -169,10 +785,52 @@ class CacheAnalytics:
         Returns:
             The average cache miss latency
         """
+        count = self._total("cache_misses")
+        if count == 0:
+            return 0.0
+        return self._total("miss_latency_ns") / (count * 1e6)
+    
+    def _recent_latencies(self, counter: str, ring: str) -> array:
+        """
+        Collect the recent latencies of the live threads' shards.
+        
+        Args:
+            counter: The name of the shard counter for the operation
+            ring: The name of the shard latency ring
+            
+        Returns:
+            The recent latencies in nanoseconds
+        """
+        samples = array('q')
         with self._lock:
-            if not self.miss_latencies:
-                return 0.0
-            return sum(self.miss_latencies) / len(self.miss_latencies)
+            for shard in self._shards:
+                count = min(getattr(shard, counter), _LATENCY_WINDOW)
+                samples.extend(getattr(shard, ring)[:count])
+        return samples
+    
+    def hit_latency_percentile(self, percentile: float) -> float:
+        """
+        Get a percentile of the recent cache hit latencies in milliseconds.
+        
+        Args:
+            percentile: The percentile to compute (0 to 100)
+            
+        Returns:
+            The cache hit latency percentile
+        """
+        return _percentile(self._recent_latencies("cache_hits", "hit_latencies"), percentile) / 1e6
+    
+    def miss_latency_percentile(self, percentile: float) -> float:
+        """
+        Get a percentile of the recent cache miss latencies in milliseconds.
+        
+        Args:
+            percentile: The percentile to compute (0 to 100)
+            
+        Returns:
+            The cache miss latency percentile
+        """
+        return _percentile(self._recent_latencies("cache_misses", "miss_latencies"), percentile) / 1e6
     
     @property
     def avg_key_size(self) -> float:
@@ -182,10 +840,10 @@ class CacheAnalytics:
         Returns:
             The average key size
         """
-        with self._lock:
-            if not self.key_sizes:
-                return 0.0
-            return sum(self.key_sizes.values()) / len(self.key_sizes)
+        count = self._total("key_size_count")
+        if count == 0:
+            return 0.0
+        return self._total("key_size_sum") / count
     
     @property
     def avg_value_size(self) -> float:
@@ -195,10 +853,10 @@ class CacheAnalytics:
         Returns:
             The average value size
         """
-        with self._lock:
-            if not self.value_sizes:
-                return 0.0
-            return sum(self.value_sizes.values()) / len(self.value_sizes)
+        count = self._total("value_size_count")
+        if count == 0:
+            return 0.0
+        return self._total("value_size_sum") / count
     
     @property
     def avg_ttl(self) -> float:
@@ -208,10 +866,10 @@ class CacheAnalytics:
         Returns:
             The average TTL
         """
-        with self._lock:
-            if not self.ttls:
-                return 0.0
-            return sum(self.ttls.values()) / len(self.ttls)
+        count = self._total("ttl_count")
+        if count == 0:
+            return 0.0
+        return self._total("ttl_sum") / count
     
     def get_hot_keys(self, limit: int = 10) -> List[Tuple[str, int]]:
         """
@@ -223,8 +881,9 @@ class CacheAnalytics:
         Returns:
             A list of (key, access_count) tuples
         """
-        # This is a placeholder; in a real implementation, you would track key access counts
-        return []
+        with self._lock:
+            hot_keys = heapq.nlargest(limit, self._hot_keys.items(), key=lambda x: x[1])
+        return [(key, count * self.sample_rate) for key, count in hot_keys]
     
     def get_large_keys(self, limit: int = 10) -> List[Tuple[str, int]]:
         """
@@ -237,7 +896,7 @@ class CacheAnalytics:
             A list of (key, size) tuples
         """
         with self._lock:
-            return sorted(self.value_sizes.items(), key=lambda x: x[1], reverse=True)[:limit]
+            return [(key, size) for size, key in heapq.nlargest(limit, self._large_keys)]
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -246,24 +905,25 @@ class CacheAnalytics:
         Returns:
             A dictionary representation of the analytics data
         """
-        with self._lock:
-            return {
-                "timestamp": datetime.now().isoformat(),
-                "duration_seconds": time.time() - self.start_time,
-                "requests": self.requests,
-                "cache_hits": self.cache_hits,
-                "cache_misses": self.cache_misses,
-                "cache_errors": self.cache_errors,
-                "hit_rate": self.hit_rate,
-                "avg_hit_latency_ms": self.avg_hit_latency,
-                "avg_miss_latency_ms": self.avg_miss_latency,
-                "cache_size_bytes": self.cache_size,
-                "avg_key_size_bytes": self.avg_key_size,
-                "avg_value_size_bytes": self.avg_value_size,
-                "avg_ttl_seconds": self.avg_ttl,
-                "hot_keys": self.get_hot_keys(),
-                "large_keys": self.get_large_keys(),
-            }
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "duration_seconds": time.time() - self.start_time,
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_errors": self.cache_errors,
+            "hit_rate": self.hit_rate,
+            "avg_hit_latency_ms": self.avg_hit_latency,
+            "avg_miss_latency_ms": self.avg_miss_latency,
+            "p95_hit_latency_ms": self.hit_latency_percentile(95),
+            "p95_miss_latency_ms": self.miss_latency_percentile(95),
+            "cache_size_bytes": self.cache_size,
+            "avg_key_size_bytes": self.avg_key_size,
+            "avg_value_size_bytes": self.avg_value_size,
+            "avg_ttl_seconds": self.avg_ttl,
+            "hot_keys": self.get_hot_keys(),
+            "large_keys": self.get_large_keys(),
+        }
     
     def to_json(self, pretty: bool = True) -> str:
         """
@@ -275,8 +935,7 @@ class CacheAnalytics:
         Returns:
             A JSON string representation of the analytics data
         """
-        indent = 2 if pretty else None
-        return json.dumps(self.to_dict(), indent=indent)
+        return _dumps(self.to_dict(), pretty).decode('utf-8')
     
     def save(self, file_path: str) -> None:
         """
@@ -285,8 +944,8 @@ class CacheAnalytics:
         Args:
             file_path: The path to save the data to
         """
-        with open(file_path, 'w') as f:
-            f.write(self.to_json())
+        with open(file_path, 'wb') as f:
+            f.write(_dumps(self.to_dict(), pretty=True))
     
     def print_summary(self) -> None:
         """
@@ -326,7 +985,10 @@ class OptimizedCacheStrategy:
                  compress_values: bool = True,
                  compress_keys: bool = False,
                  prefetch_keys: bool = False,
-                 auto_tune: bool = True):
+                 auto_tune: bool = True,
+                 max_tracked_keys: int = 100_000,
+                 compression_threshold: int = 1024,
+                 pickle_values: bool = False):
         """
         Initialize an optimized cache strategy.
         
@@ -338,6 +1000,11 @@ class OptimizedCacheStrategy:
             compress_keys: Whether to compress cache keys
             prefetch_keys: Whether to prefetch related keys
             auto_tune: Whether to auto-tune caching parameters
+            max_tracked_keys: The maximum number of keys to keep access statistics for
+            compression_threshold: The minimum encoded size in bytes of a value to compress
+            pickle_values: Whether to compress values as pickles instead of JSON.
+                Only enable this when everything that can write to the cache
+                backend is trusted, since unpickling a value can run arbitrary code.
         """
         self.min_ttl = min_ttl
         self.max_ttl = max_ttl
@@ -346,11 +1013,15 @@ class OptimizedCacheStrategy:
         self.compress_keys = compress_keys
         self.prefetch_keys = prefetch_keys
         self.auto_tune = auto_tune
+        self.compression_threshold = compression_threshold
+        self.pickle_values = pickle_values
         
-        self.key_ttls = {}
-        self.key_hit_counts = {}
-        self.key_access_times = {}
-        self.analytics = CacheAnalytics()
+        self.max_tracked_keys = max_tracked_keys
+        
+        # Per-key statistics, bounded so that cold keys are forgotten
+        self.key_ttls = _LRUDict(max_tracked_keys)
+        self.key_hit_counts = _LRUDict(max_tracked_keys)
+        self.key_access_times = _LRUDict(max_tracked_keys)
     
     def get_optimized_ttl(self, key: str, default_ttl: int) -> int:
         """
@@ -378,7 +1049,7 @@ class OptimizedCacheStrategy:
         if hit_count > 10:
             # Frequently accessed key, increase TTL
             return min(current_ttl * 2, self.max_ttl)
-        elif time.time() - last_access > 3600:
+        elif time.monotonic_ns() - last_access > 3_600_000_000_000:  # 1 hour
             # Infrequently accessed key, decrease TTL
             return max(current_ttl // 2, self.min_ttl)
         
@@ -398,19 +1069,89 @@ class OptimizedCacheStrategy:
             return key
         
         # Simple key compression using a hash
-        return hashlib.md5(key.encode('utf-8')).hexdigest()
+        return _hash_key(key.encode('utf-8'))
     
     def optimize_value(self, value: Any) -> Any:
         """
         Optimize a cached value.
         
+        When value compression is enabled, values whose encoding reaches the
+        compression threshold are stored as compressed bytes behind a
+        one-byte codec tag. Values are encoded as JSON, and only compressed
+        when they decode back equal, so JSON never changes what the cache
+        returns. With pickle_values, they are encoded as pickles instead.
+        Raw bytes values are always tagged so they cannot be mistaken for a
+        compressed payload; other values are stored unchanged.
+        
         Args:
             value: The original value
             
         Returns:
             The optimized value
         """
-        # Note: In a real implementation, you would compress the value
+        return self.optimize_value_with_size(value)[0]
+    
+    def optimize_value_with_size(self, value: Any) -> Tuple[Any, int]:
+        """
+        Optimize a cached value and report its size.
+        
+        The size comes from the encoding done while optimizing whenever
+        there is one, so callers never serialize the value a second time.
+        
+        Args:
+            value: The original value
+            
+        Returns:
+            A tuple of the optimized value and its size in bytes
+        """
+        if isinstance(value, (bytes, bytearray)):
+            stored = _RAW_TAG + value
+            return stored, len(stored)
+        
+        if not self.compress_values:
+            return value, _estimate_size(value)
+        
+        pickled = self.pickle_values
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL) if pickled else _dumps(value)
+        except (pickle.PicklingError, TypeError, ValueError, AttributeError):
+            # Not serializable, store it as-is
+            return value, _estimate_size(value)
+        
+        if len(data) < self.compression_threshold:
+            return value, len(data)
+        
+        # JSON turns tuples into lists and int keys and datetimes into
+        # strings, so values it doesn't give back unchanged stay as they are
+        if not pickled and _loads(data) != value:
+            return value, len(data)
+        
+        stored = _compress(data, pickled)
+        return stored, len(stored)
+    
+    def deoptimize_value(self, value: Any) -> Any:
+        """
+        Restore a value produced by optimize_value.
+        
+        Pickled payloads are only loaded when pickle_values is enabled, so a
+        cache backend that isn't trusted can't make this run pickled code.
+        
+        Args:
+            value: The value read from the cache
+            
+        Returns:
+            The original value
+        """
+        if not isinstance(value, bytes) or not value:
+            return value
+        
+        tag = value[:1]
+        if tag == _RAW_TAG:
+            return value[1:]
+        if tag == _ZLIB_TAG or tag == _ZSTD_TAG:
+            return _loads(_decompress(tag, memoryview(value)[1:]))
+        if (tag == _ZLIB_PICKLE_TAG or tag == _ZSTD_PICKLE_TAG) and self.pickle_values:
+            return pickle.loads(_decompress(tag, memoryview(value)[1:]))
         return value
     
     def record_hit(self, key: str):
@@ -421,7 +1162,7 @@ class OptimizedCacheStrategy:
             key: The cache key
         """
         self.key_hit_counts[key] = self.key_hit_counts.get(key, 0) + 1
-        self.key_access_times[key] = time.time()
+        self.key_access_times[key] = time.monotonic_ns()
     
     def record_miss(self, key: str):
         """
@@ -442,7 +1183,7 @@ class OptimizedCacheStrategy:
             ttl: The TTL in seconds
         """
         self.key_ttls[key] = ttl
-        self.key_access_times[key] = time.time()
+        self.key_access_times[key] = time.monotonic_ns()
 
 
 class CacheOptimizer:
@@ -488,37 +1229,43 @@ class CacheOptimizer:
         Returns:
             The cached value, or None if not found
         """
-        self.analytics.record_request()
+        # Bind the collaborators once; this method runs on every cache read
+        analytics = self.analytics
+        strategy = self.strategy
+        
+        analytics.record_request()
         
         # Optimize the key
-        optimized_key = self.strategy.optimize_key(key)
+        optimized_key = strategy.optimize_key(key)
         
         # Measure cache latency
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
             # Get from cache
             cached_value = await self.cache_backend.get(optimized_key)
             
             # Record latency
-            latency = time.time() - start_time
+            latency_ns = time.perf_counter_ns() - start_ns
             
             if cached_value is None:
                 # Cache miss
-                self.analytics.record_miss(key, latency)
-                self.strategy.record_miss(key)
+                analytics.record_miss(key, latency_ns)
+                strategy.record_miss(key)
                 return None
             
-            # Cache hit
-            value_size = len(json.dumps(cached_value).encode('utf-8'))
-            self.analytics.record_hit(key, value_size, latency)
-            self.strategy.record_hit(key)
+            # Cache hit, sized from the last recorded set where possible
+            value_size = analytics.get_value_size(key)
+            if value_size is None:
+                value_size = _estimate_size(cached_value)
+            analytics.record_hit(key, value_size, latency_ns)
+            strategy.record_hit(key)
             
-            return cached_value
+            return strategy.deoptimize_value(cached_value)
         except Exception as e:
             # Cache error
-            logger.warning(f"Cache error: {e}")
-            self.analytics.record_error(key)
+            logger.warning("Cache error: %s", e)
+            analytics.record_error(key)
             return None
     
     async def set(self, key: str, value: Any, ttl: int = 60) -> bool:
@@ -533,12 +1280,14 @@ class CacheOptimizer:
         Returns:
             True if the value was cached, False otherwise
         """
+        strategy = self.strategy
+        
         # Optimize the key and value
-        optimized_key = self.strategy.optimize_key(key)
-        optimized_value = self.strategy.optimize_value(value)
+        optimized_key = strategy.optimize_key(key)
+        optimized_value, value_size = strategy.optimize_value_with_size(value)
         
         # Optimize TTL
-        optimized_ttl = self.strategy.get_optimized_ttl(key, ttl)
+        optimized_ttl = strategy.get_optimized_ttl(key, ttl)
         
         try:
             # Set in cache
@@ -546,14 +1295,13 @@ class CacheOptimizer:
             
             if success:
                 # Record successful set
-                value_size = len(json.dumps(optimized_value).encode('utf-8'))
                 self.analytics.record_set(key, value_size, optimized_ttl)
-                self.strategy.record_set(key, optimized_ttl)
+                strategy.record_set(key, optimized_ttl)
             
             return success
         except Exception as e:
             # Cache error
-            logger.warning(f"Cache error: {e}")
+            logger.warning("Cache error: %s", e)
             self.analytics.record_error(key)
             return False
     
@@ -571,29 +1319,27 @@ class CacheOptimizer:
         optimized_key = self.strategy.optimize_key(key)
         
         try:
-            # Get the value size before deleting
-            cached_value = await self.cache_backend.get(optimized_key)
-            value_size = 0
-            if cached_value is not None:
-                value_size = len(json.dumps(cached_value).encode('utf-8'))
-            
             # Delete from cache
             success = await self.cache_backend.delete(optimized_key)
             
-            if success and value_size > 0:
-                # Record successful delete
-                self.analytics.record_delete(key, value_size)
+            if success:
+                # Record successful delete, sized from the last recorded set
+                self.analytics.record_delete(key)
             
             return success
         except Exception as e:
             # Cache error
-            logger.warning(f"Cache error: {e}")
+            logger.warning("Cache error: %s", e)
             self.analytics.record_error(key)
             return False
     
-    def auto_tune(self) -> None:
+    async def auto_tune(self) -> None:
         """
         Auto-tune caching parameters based on analytics.
+        
+        The analytics snapshot is serialized on the calling thread, but the
+        file is written from the default executor so that saving does not
+        block the event loop.
         """
         # Check if auto-tuning is enabled and due
         if (self.auto_tune_interval is None or
@@ -613,11 +1359,11 @@ class CacheOptimizer:
             if hit_rate < 0.5:
                 # Low hit rate, decrease TTL
                 self.strategy.max_ttl = max(self.strategy.max_ttl // 2, self.strategy.min_ttl)
-                logger.info(f"Decreased max TTL to {self.strategy.max_ttl} seconds")
+                logger.info("Decreased max TTL to %d seconds", self.strategy.max_ttl)
             elif hit_rate > 0.9:
                 # High hit rate, increase TTL
                 self.strategy.max_ttl = min(self.strategy.max_ttl * 2, 86400 * 7)  # Max 1 week
-                logger.info(f"Increased max TTL to {self.strategy.max_ttl} seconds")
+                logger.info("Increased max TTL to %d seconds", self.strategy.max_ttl)
             
             # Enable value compression for large values
             if avg_value_size > 10 * 1024:  # 10 KB
@@ -631,15 +1377,33 @@ class CacheOptimizer:
         
         # Save analytics data
         if self.output_dir:
-            os.makedirs(self.output_dir, exist_ok=True)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             file_path = os.path.join(self.output_dir, f"cache_analytics_{timestamp}.json")
-            self.analytics.save(file_path)
-            logger.info(f"Saved cache analytics to {file_path}")
+            payload = _dumps(self.analytics.to_dict(), pretty=True)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_analytics, file_path, payload)
+            logger.info("Saved cache analytics to %s", file_path)
         
         # Reset auto-tune timer
         self._last_auto_tune = time.time()
     
+    def _write_analytics(self, file_path: str, payload: bytes) -> None:
+        """
+        Write serialized analytics to a file.
+        
+        The data is written to a temporary file that is then renamed over
+        the target, so readers never see a partially written snapshot.
+        
+        Args:
+            file_path: The path to write to
+            payload: The serialized analytics data
+        """
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, file_path)
+    
     def get_analytics(self) -> CacheAnalytics:
         """
         Get the cache analytics.
@@ -656,6 +1420,16 @@ class CacheOptimizer:
         self.analytics.reset()
 
 
+class TuneStats(NamedTuple):
+    """The statistics used to auto-tune the cache middleware."""
+    
+    hit_rate: float
+    hits: int
+    misses: int
+    hit_ns: int
+    miss_ns: int
+
+
 class OptimizedCacheMiddleware(BaseMiddleware):
     """
     Middleware for adding optimized caching to an API.
@@ -727,28 +1501,70 @@ class OptimizedCacheMiddleware(BaseMiddleware):
                 **options
             )
         
+        # Bind the optional cache operations once, None when unsupported
+        self._middleware_get_cached = getattr(self.cache_middleware, "get_cached_response", None)
+        self._middleware_cache_response = getattr(self.cache_middleware, "cache_response", None)
+        self._backend_get = getattr(self.cache_backend, "get", None)
+        self._backend_set = getattr(self.cache_backend, "set", None)
+        self._backend_get_stats = getattr(self.cache_backend, "get_stats", None)
+        self._backend_clear = getattr(self.cache_backend, "clear", None)
+        
         self.ttl = ttl
         self.auto_tune = auto_tune
         self.auto_tune_interval = auto_tune_interval
         self.output_dir = output_dir
         self.compression = compression
         
+        # Analytics collection, shared with the optimizer
+        self.analytics = CacheAnalytics()
+        
         # Create the cache optimizer
         self.optimizer = CacheOptimizer(
             cache_backend=self.cache_backend,
+            analytics=self.analytics,
             output_dir=output_dir
         )
         
-        # Analytics collection
-        self.analytics = CacheAnalytics()
+        # Auto-tuning, only once enough new requests have been seen
+        self.last_tune_time = time.monotonic()
+        self._tune_every = 500
+        self._last_tune_at_count = 0
+        # Cumulative stats at the last tune, so each tune sees only its interval
+        self._last_tune_stats = TuneStats(0.0, 0, 0, 0, 0)
+        
+        # Background analytics writer, started on first use. The queue holds
+        # at most one pending snapshot; newer snapshots replace it.
+        self._save_queue: Optional[asyncio.Queue] = None
+        self._save_task: Optional[asyncio.Task] = None
         
-        # Auto-tuning
-        self.last_tune_time = time.time()
+        # Snapshot filename prefix, reformatted once per minute
+        self._fname_minute = -1
+        self._fname_prefix = ""
+        
+        # Backend stats from the last get_stats() call and when they were fetched
+        self._backend_stats_cache: Tuple[float, Dict[str, Any]] = (float("-inf"), {})
+        
+        # Responses currently being written to the cache, by cache key
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Size-aware admission (AdaptSize). The parameter is hill-climbed on
+        # the hit rate by _auto_tune, moving by a factor of step per tune.
+        self._size_admission_c = 256 * 1024
+        self._size_admission_step = 2.0
+        self._last_tune_hit_rate: Optional[float] = None
         
         # Create the output directory if it doesn't exist
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
-
+    
+    async def shutdown(self):
+        """Flush pending analytics saves."""
+        if self._save_task is not None:
+            await self._save_queue.join()
+            self._save_task.cancel()
+            self._save_task = None
+            self._save_queue = None
+    
     async def process_request(self, request):
         """
         Process a request (required by BaseMiddleware).
@@ -792,7 +1608,7 @@ class OptimizedCacheMiddleware(BaseMiddleware):
         cache_key = self._generate_cache_key(request)
         
         # Start the timer for cache operations
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         # Check if the response is cached
         cached_response = await self._get_from_cache(cache_key)
@@ -800,14 +1616,12 @@ class OptimizedCacheMiddleware(BaseMiddleware):
         # If we have a cached response, return it
         if cached_response is not None:
             # Record analytics for cache hit
-            request_time = (time.time() - start_time) * 1000  # ms
-            self.analytics.record_hit(request_time)
+            self.analytics.record_hit_fast(time.perf_counter_ns() - start_ns)
             
             return cached_response
         
         # Record analytics for cache miss
-        miss_time = (time.time() - start_time) * 1000  # ms
-        self.analytics.record_miss(miss_time)
+        self.analytics.record_miss_fast(time.perf_counter_ns() - start_ns)
         
         # Process the request normally
         response = await call_next(request)
@@ -817,9 +1631,9 @@ class OptimizedCacheMiddleware(BaseMiddleware):
             await self._cache_response(cache_key, response)
         
         # Auto-tune cache parameters if needed
-        if self.auto_tune and (time.time() - self.last_tune_time) > self.auto_tune_interval:
+        if self.auto_tune and (time.monotonic() - self.last_tune_time) > self.auto_tune_interval:
             await self._auto_tune()
-            self.last_tune_time = time.time()
+            self.last_tune_time = time.monotonic()
         
         return response
     
@@ -833,22 +1647,23 @@ class OptimizedCacheMiddleware(BaseMiddleware):
         Returns:
             The cache key
         """
-        # Get the URL path and query string
-        path = request.url.path
-        query = str(request.query_params)
-        method = request.method
-        
-        # Generate a hash of the key components
-        key_components = f"{method}:{path}:{query}"
+        # Hash the method, URL path and query string
+        hasher = _new_hasher()
+        hasher.update(request.method.encode())
+        hasher.update(b":")
+        hasher.update(request.url.path.encode())
+        hasher.update(b":")
+        hasher.update(str(request.query_params).encode())
         
         # Include headers that affect the response
-        for header in ["Accept", "Accept-Encoding", "Accept-Language"]:
-            if header in request.headers:
-                key_components += f":{header}={request.headers[header]}"
-        
-        # Generate a hash of the key components
-        import hashlib
-        return hashlib.md5(key_components.encode()).hexdigest()
+        headers = request.headers
+        for header, prefix in _VARY_HEADERS:
+            value = headers.get(header)
+            if value is not None:
+                hasher.update(prefix)
+                hasher.update(value.encode())
+        
+        return hasher.hexdigest()
     
     async def _get_from_cache(self, cache_key: str):
         """
@@ -862,20 +1677,35 @@ class OptimizedCacheMiddleware(BaseMiddleware):
         """
         try:
             # Get the cached response using the CacheMiddleware
-            if hasattr(self.cache_middleware, "get_cached_response"):
-                return await self.cache_middleware.get_cached_response(cache_key)
+            if self._middleware_get_cached is not None:
+                return await self._middleware_get_cached(cache_key)
             
             # Fall back to direct cache access
-            if hasattr(self.cache_backend, "get"):
-                cached_data = self.cache_backend.get(cache_key)
+            if self._backend_get is not None:
+                cached_data = self._backend_get(cache_key)
                 if cached_data:
-                    from starlette.responses import JSONResponse
-                    return JSONResponse(content=cached_data, headers={"X-Cache": "HIT"})
+                    from starlette.responses import Response as StarletteResponse
+                    
+                    # Serve a stored body as-is, without decoding it
+                    if isinstance(cached_data, dict) and _RAW_BODY_MARKER in cached_data:
+                        headers = dict(cached_data["headers"])
+                        headers["X-Cache"] = "HIT"
+                        return StarletteResponse(
+                            content=cached_data[_RAW_BODY_MARKER],
+                            status_code=cached_data["status"],
+                            headers=headers
+                        )
+                    
+                    return StarletteResponse(
+                        content=_dumps(cached_data),
+                        media_type="application/json",
+                        headers={"X-Cache": "HIT"}
+                    )
                 
             return None
         except Exception as e:
-            logger.error(f"Error getting response from cache: {e}")
-            self.analytics.record_error()
+            logger.error("Error getting response from cache: %s", e)
+            self.analytics.record_error(cache_key)
             return None
     
     async def _cache_response(self, cache_key: str, response):
@@ -886,25 +1716,41 @@ class OptimizedCacheMiddleware(BaseMiddleware):
             cache_key: The cache key
             response: The response to cache
         """
+        # Concurrent writes of the same key wait for the one in flight
+        # instead of storing the same response again
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            # Shielded so a cancelled waiter doesn't cancel the shared future
+            await asyncio.shield(inflight)
+            return
+        
+        inflight = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = inflight
         try:
             # Cache the response using the CacheMiddleware
-            if hasattr(self.cache_middleware, "cache_response"):
-                await self.cache_middleware.cache_response(cache_key, response, self.ttl)
+            if self._middleware_cache_response is not None:
+                await self._middleware_cache_response(cache_key, response, self.ttl)
                 return
             
             # Fall back to direct cache access
-            if hasattr(self.cache_backend, "set"):
-                # Extract the response data
-                if hasattr(response, "body"):
-                    import json
-                    try:
-                        data = json.loads(response.body)
-                        self.cache_backend.set(cache_key, data, self.ttl)
-                    except:
-                        logger.error("Error parsing response body as JSON")
+            if self._backend_set is not None:
+                # Store the serialized body as-is so it is never parsed
+                # here or re-serialized when served
+                body = getattr(response, "body", None)
+                if body is not None:
+                    entry = {
+                        _RAW_BODY_MARKER: bytes(body),
+                        "status": response.status_code,
+                        "headers": dict(response.headers),
+                    }
+                    self._backend_set(cache_key, entry, self.ttl)
         except Exception as e:
-            logger.error(f"Error caching response: {e}")
-            self.analytics.record_error()
+            logger.error("Error caching response: %s", e)
+            self.analytics.record_error(cache_key)
+        finally:
+            del self._inflight[cache_key]
+            if not inflight.done():
+                inflight.set_result(None)
     
     def _is_cacheable(self, request, response) -> bool:
         """
@@ -917,55 +1763,119 @@ class OptimizedCacheMiddleware(BaseMiddleware):
         Returns:
             True if the response is cacheable, False otherwise
         """
-        # Check if the response is successful
-        if response.status_code < 200 or response.status_code >= 400:
+        # Reject other methods before reading headers or hashing the memo key
+        if request.method not in _CACHEABLE_METHODS:
             return False
         
-        # Check if the method is cacheable
-        if request.method not in ["GET", "HEAD"]:
+        if not _is_cacheable_response(
+            request.method,
+            response.status_code,
+            response.headers.get("Cache-Control", "")
+        ):
             return False
         
-        # Check cache control headers
-        cache_control = response.headers.get("Cache-Control", "")
-        if "no-store" in cache_control or "no-cache" in cache_control:
-            return False
+        # Admit large responses with a probability that decays with their
+        # size, so one-off large bodies don't crowd out many small hits
+        body = getattr(response, "body", None)
+        if body:
+            admit_p = math.exp(-len(body) / self._size_admission_c)
+            if random.random() > admit_p:
+                return False
         
         return True
     
     async def _auto_tune(self):
         """Auto-tune cache parameters based on analytics."""
         try:
-            # Skip auto-tuning if we don't have enough data
-            if self.analytics.request_count < 100:
+            # Skip auto-tuning until enough new requests have been seen
+            request_count = self.analytics.requests
+            if request_count - self._last_tune_at_count < self._tune_every:
                 return
+            self._last_tune_at_count = request_count
             
-            # Get the current cache stats
-            stats = self.get_stats()
-            
-            # Adjust TTL based on hit rate and request frequency
-            hit_rate = stats.get("hit_rate", 0)
-            avg_hit_latency = stats.get("avg_hit_latency_ms", 0)
-            avg_miss_latency = stats.get("avg_miss_latency_ms", 0)
+            # Get the current cache stats and those since the last tune
+            stats = self.get_tune_stats()
+            interval = self._tune_interval(stats)
             
+            # Che's approximation for TTL caches gives the hit rate of a key
+            # requested at rate λ as 1 - exp(-λ * ttl). Infer the effective
+            # λ from the hit rate under the current TTL, i.e. since the last
+            # tune, and solve for the TTL that reaches the target hit rate in
+            # one step, snapped to the TTL ladder so backends see few
+            # distinct TTLs.
             new_ttl = self.ttl
+            if interval.hits or interval.misses:
+                observed = min(max(interval.hit_rate, 0.01), 0.99)
+                new_ttl = _ttl_bucket(self.ttl * math.log(1 - _TARGET_HIT_RATE) / math.log(1 - observed))
+                
+                # Without a single hit there is no rate to infer, so only
+                # move one step up the ladder
+                if not interval.hits:
+                    new_ttl = min(new_ttl, _next_ttl_bucket(self.ttl))
+                
+                # Ignore adjustments within the bucket of the current TTL
+                if new_ttl == _ttl_bucket(self.ttl):
+                    new_ttl = self.ttl
+            
+            # Only lengthen the TTL if hits are significantly cheaper than
+            # misses, i.e. the average hit latency is below a tenth of the
+            # average miss latency, compared exactly on the nanosecond totals
+            if new_ttl > self.ttl:
+                if interval.hits:
+                    hits_pay_off = interval.hit_ns * interval.misses * 10 < interval.miss_ns * interval.hits
+                else:
+                    hits_pay_off = interval.miss_ns > 0
+                if not hits_pay_off:
+                    new_ttl = self.ttl
             
-            if hit_rate < 0.3:
-                # Low hit rate, decrease TTL to refresh data more often
-                new_ttl = max(10, int(self.ttl * 0.8))
-            elif hit_rate > 0.7 and avg_hit_latency < avg_miss_latency * 0.1:
-                # High hit rate and significant performance benefit, increase TTL
-                new_ttl = min(3600, int(self.ttl * 1.2))
+            # Hill-climb the size admission parameter: keep moving it in the
+            # same direction while the hit rate since the last tune does not
+            # drop, so each step is judged by the requests that followed it
+            if interval.hits or interval.misses:
+                if self._last_tune_hit_rate is not None and interval.hit_rate < self._last_tune_hit_rate:
+                    self._size_admission_step = 1 / self._size_admission_step
+                self._size_admission_c = min(
+                    _MAX_SIZE_ADMISSION_C,
+                    max(_MIN_SIZE_ADMISSION_C, self._size_admission_c * self._size_admission_step)
+                )
+                self._last_tune_hit_rate = interval.hit_rate
             
             # Apply the new TTL if it's different
             if new_ttl != self.ttl:
                 self.ttl = new_ttl
-                logger.info(f"Auto-tuned cache TTL to {new_ttl} seconds")
+                logger.info("Auto-tuned cache TTL to %d seconds", new_ttl)
             
-            # Save analytics if output directory is specified
+            # Save analytics in the background if output directory is specified
             if self.output_dir:
-                self.save_analytics()
+                self._queue_analytics_save()
         except Exception as e:
-            logger.error(f"Error during cache auto-tuning: {e}")
+            logger.error("Error during cache auto-tuning: %s", e)
+    
+    def _tune_interval(self, stats: TuneStats) -> TuneStats:
+        """
+        Get the statistics of the requests since the last auto-tune.
+        
+        Args:
+            stats: The current statistics
+            
+        Returns:
+            The difference between the current statistics and those of the
+            previous call
+        """
+        last, self._last_tune_stats = self._last_tune_stats, stats
+        if stats.hits < last.hits or stats.misses < last.misses:
+            # The analytics were reset since, so every count is new
+            last = TuneStats(0.0, 0, 0, 0, 0)
+        
+        hits = stats.hits - last.hits
+        misses = stats.misses - last.misses
+        return TuneStats(
+            hit_rate=hits / (hits + misses) if hits or misses else 0.0,
+            hits=hits,
+            misses=misses,
+            hit_ns=stats.hit_ns - last.hit_ns,
+            miss_ns=stats.miss_ns - last.miss_ns
+        )
     
     def get_analytics(self) -> CacheAnalytics:
         """
@@ -974,16 +1884,21 @@ class OptimizedCacheMiddleware(BaseMiddleware):
         Returns:
             The cache analytics
         """
-        # Update the analytics with the current cache stats
+        # Update the analytics with the current cache stats, reusing backend
+        # stats fetched within the last second
         try:
-            if hasattr(self.cache_backend, "get_stats"):
-                backend_stats = self.cache_backend.get_stats()
+            if self._backend_get_stats is not None:
+                now = time.monotonic()
+                fetched_at, backend_stats = self._backend_stats_cache
+                if now - fetched_at >= 1.0:
+                    backend_stats = self._backend_get_stats()
+                    self._backend_stats_cache = (now, backend_stats)
                 self.analytics.cache_size_bytes = backend_stats.get("total_size_bytes", 0)
                 self.analytics.item_count = backend_stats.get("item_count", 0)
                 if "large_keys" in backend_stats:
                     self.analytics.large_keys = backend_stats["large_keys"]
         except Exception as e:
-            logger.error(f"Error getting cache stats: {e}")
+            logger.error("Error getting cache stats: %s", e)
         
         return self.analytics
     
@@ -997,6 +1912,25 @@ class OptimizedCacheMiddleware(BaseMiddleware):
         analytics = self.get_analytics()
         return analytics.to_dict()
     
+    def get_tune_stats(self) -> TuneStats:
+        """
+        Get the statistics used for auto-tuning.
+        
+        Unlike get_stats, this reads only the analytics counters and does
+        not query the cache backend.
+        
+        Returns:
+            The auto-tuning statistics
+        """
+        analytics = self.analytics
+        return TuneStats(
+            hit_rate=analytics.hit_rate,
+            hits=analytics.cache_hits,
+            misses=analytics.cache_misses,
+            hit_ns=analytics.hit_latency_ns,
+            miss_ns=analytics.miss_latency_ns
+        )
+    
     def save_analytics(self) -> Optional[str]:
         """
         Save cache analytics to a file.
@@ -1008,23 +1942,62 @@ class OptimizedCacheMiddleware(BaseMiddleware):
             return None
         
         try:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = os.path.join(self.output_dir, f"cache_analytics_{timestamp}.json")
-            
-            with open(filename, "w") as f:
-                json.dump(self.get_stats(), f, indent=2)
-            
+            filename = self._analytics_path()
+            self.optimizer._write_analytics(filename, _dumps(self.get_stats(), pretty=True))
             return filename
         except Exception as e:
-            logger.error(f"Error saving cache analytics: {e}")
+            logger.error("Error saving cache analytics: %s", e)
             return None
     
+    def _analytics_path(self) -> str:
+        """Get the path for a new analytics snapshot."""
+        now = int(time.time())
+        minute, second = divmod(now, 60)
+        if minute != self._fname_minute:
+            self._fname_minute = minute
+            self._fname_prefix = os.path.join(
+                self.output_dir,
+                "cache_analytics_" + datetime.fromtimestamp(minute * 60).strftime("%Y%m%d%H%M")
+            )
+        return f"{self._fname_prefix}{second:02d}.json"
+    
+    def _queue_analytics_save(self):
+        """
+        Queue an analytics snapshot for the background writer.
+        
+        If a snapshot is still waiting to be written, it is replaced by the
+        newer one so that slow disks never make saves back up.
+        """
+        if self._save_task is None:
+            self._save_queue = asyncio.Queue(maxsize=1)
+            self._save_task = asyncio.ensure_future(self._analytics_writer())
+        
+        item = (self._analytics_path(), _dumps(self.get_stats(), pretty=True))
+        try:
+            self._save_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._save_queue.get_nowait()
+            self._save_queue.task_done()
+            self._save_queue.put_nowait(item)
+    
+    async def _analytics_writer(self):
+        """Write queued analytics snapshots from the default executor."""
+        loop = asyncio.get_running_loop()
+        while True:
+            filename, payload = await self._save_queue.get()
+            try:
+                await loop.run_in_executor(None, self.optimizer._write_analytics, filename, payload)
+            except Exception as e:
+                logger.error("Error saving cache analytics: %s", e)
+            finally:
+                self._save_queue.task_done()
+    
     def clear_cache(self):
         """Clear the cache."""
         try:
-            if hasattr(self.cache_backend, "clear"):
-                self.cache_backend.clear()
+            if self._backend_clear is not None:
+                self._backend_clear()
             self.analytics.clear()
             logger.info("Cache cleared")
         except Exception as e:
-            logger.error(f"Error clearing cache: {e}") 
\ No newline at end of file
+            logger.error("Error clearing cache: %s", e) 
\ No newline at end of file
@@ -8,13 +8,75 @@ including connection pooling, monitoring, and optimization.
 import time
 import threading
 import asyncio
+import itertools
+import weakref
+from array import array
+from collections import defaultdict, deque
 from typing import Dict, List, Optional, Callable, Any, Union, Tuple, Set
 import logging
 import json
 import os
+import ssl
+import sys
+from dataclasses import dataclass
+from functools import lru_cache, partial
 from datetime import datetime
 import importlib
+import inspect
 from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Database and Redis drivers, imported once here rather than on each
+# pool setup
+try:
+    import sqlalchemy
+    from sqlalchemy.ext.asyncio import create_async_engine
+    HAS_SQLALCHEMY = True
+except ImportError:
+    HAS_SQLALCHEMY = False
+
+try:
+    import asyncpg
+    HAS_ASYNCPG = True
+except ImportError:
+    HAS_ASYNCPG = False
+
+try:
+    import aiomysql
+    HAS_AIOMYSQL = True
+except ImportError:
+    HAS_AIOMYSQL = False
+
+try:
+    import redis.asyncio as aioredis
+    HAS_AIOREDIS = True
+except ImportError:
+    HAS_AIOREDIS = False
+
+try:
+    import certifi
+    HAS_CERTIFI = True
+except ImportError:
+    HAS_CERTIFI = False
+
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
 
 from apifrom.core.request import Request
 from apifrom.core.response import Response
@@ -25,6 +87,174 @@ from apifrom.middleware.base import BaseMiddleware
 logger = logging.getLogger("apifrom.performance.connection_pool")
 
 
+@lru_cache(maxsize=None)
+def _shared_ssl_context() -> ssl.SSLContext:
+    """
+    Get the TLS context shared by all pooled database connections.
+    
+    Built on first use, so the CA bundle is parsed once per process rather
+    than once per connection.
+    
+    Returns:
+        A client context verifying against certifi's CA bundle, or the
+        system's if certifi is not installed
+    """
+    return ssl.create_default_context(cafile=certifi.where() if HAS_CERTIFI else None)
+
+
+def _install_uvloop() -> bool:
+    """
+    Make uvloop's event loop policy the default, if uvloop is installed.
+    
+    Only loops created afterwards use uvloop, so this has to run before the
+    server or asyncio.run() creates its loop.
+    
+    Returns:
+        Whether uvloop's policy is in place
+    """
+    if not HAS_UVLOOP:
+        logger.warning("uvloop not available, using the default event loop")
+        return False
+    if not isinstance(asyncio.get_event_loop_policy(), uvloop.EventLoopPolicy):
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+# Recycling method names used by other pools, mapped to validation modes
+_VALIDATION_MODE_ALIASES = {
+    "verified": "query",
+    "fast": "socket",
+    "unverified": "none",
+}
+
+# Bound once to skip the attribute lookup in the hot timing paths
+_mono = time.monotonic_ns
+
+# Attributes set on pooled connections holding their creation time, their
+# id within the pool and when they were last known to be alive
+_CREATED_ATTR = "_apifrom_pool_created_ns"
+_ID_ATTR = "_apifrom_pool_id"
+_ALIVE_ATTR = "_apifrom_pool_alive_ns"
+
+# Connections held by open ConnectionPool.connection() blocks, as a dict
+# mapping each pool to the task holding it and the connection. The dict is
+# replaced rather than changed so that copied contexts don't see updates.
+_held_connections = ContextVar("apifrom_pool_held_connections", default=None)
+
+# Number of recent acquisition and release times kept per metrics shard,
+# a power of two so ring slots can be found by masking
+_SAMPLE_WINDOW = 4096
+
+# Number of metrics shards, the next power of two at or above the CPU count
+_SHARD_COUNT = 1 << max(0, (os.cpu_count() or 1) - 1).bit_length()
+
+# Shard index of each thread, assigned round-robin on first use
+_shard_slots = threading.local()
+_next_shard_slot = itertools.count()
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON, with orjson when installed.
+    
+    Args:
+        obj: The object to serialize
+        pretty: Whether to indent the output
+        
+    Returns:
+        The encoded JSON
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    return json.dumps(obj, indent=2 if pretty else None).encode('utf-8')
+
+
+def _percentile(samples: array, percentile: float) -> float:
+    """
+    Compute a percentile of integer samples with linear interpolation.
+    
+    The samples are viewed as a NumPy array without copying when NumPy is
+    installed.
+    
+    Args:
+        samples: The samples
+        percentile: The percentile to compute (0 to 100)
+        
+    Returns:
+        The percentile, or 0.0 if there are no samples
+    """
+    if not samples:
+        return 0.0
+    if HAS_NUMPY:
+        return float(np.percentile(np.frombuffer(samples, dtype=np.int64), percentile))
+    
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * percentile / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+async def _maybe_await(result: Any) -> Any:
+    """
+    Await the result of a user callback if it is awaitable.
+    
+    Lets factories and validate, close and warm functions be either plain
+    functions or coroutine functions.
+    """
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+def _shard_index() -> int:
+    """
+    Get the metrics shard index of the current thread.
+    
+    Returns:
+        The shard index
+    """
+    index = getattr(_shard_slots, "index", None)
+    if index is None:
+        index = _shard_slots.index = next(_next_shard_slot) & (_SHARD_COUNT - 1)
+    return index
+
+
+class _MetricsShard:
+    """
+    Request, acquisition and release bookkeeping of the threads mapped to
+    one shard.
+    
+    Each shard has its own lock, so threads on different shards record
+    without contending. Readers sum the counters of all shards without
+    taking the locks.
+    """
+    
+    __slots__ = (
+        "lock", "acquires", "releases",
+        "acquisition_times", "acquisition_sum", "release_times", "release_sum",
+        "requests", "timeouts", "errors", "acquired", "unacquired_error", "unacquired_canceled",
+    )
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.acquires = 0
+        self.releases = 0
+        # Outcomes of connection requests
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.acquired = 0
+        self.unacquired_error = 0
+        self.unacquired_canceled = 0
+        # Rings of recent times in nanoseconds, written at the acquire and
+        # release counts, with running sums of the windows
+        self.acquisition_times = array('q', bytes(8 * _SAMPLE_WINDOW))
+        self.acquisition_sum = 0
+        self.release_times = array('q', bytes(8 * _SAMPLE_WINDOW))
+        self.release_sum = 0
+
+
 class ConnectionPoolMetrics:
     """
     Collects and analyzes connection pool metrics.
@@ -47,23 +277,18 @@ class ConnectionPoolMetrics:
         """
         with self._lock:
             self.start_time = time.time()
+            self._start_ns = _mono()
             self.total_connections = 0
-            self.active_connections = 0
-            self.idle_connections = 0
             self.max_connections = 0
-            self.connection_requests = 0
-            self.connection_timeouts = 0
-            self.connection_errors = 0
-            self.acquisition_times = []
-            self.release_times = []
-            self.connection_lifetimes = {}
+            self._shards = [_MetricsShard() for _ in range(_SHARD_COUNT)]
     
     def record_connection_request(self):
         """
         Record a connection request.
         """
-        with self._lock:
-            self.connection_requests += 1
+        shard = self._shards[_shard_index()]
+        with shard.lock:
+            shard.requests += 1
     
     def record_connection_acquire(self, connection_id: str, acquisition_time: float):
         """
@@ -73,13 +298,28 @@ class ConnectionPoolMetrics:
             connection_id: The connection ID
             acquisition_time: The time it took to acquire the connection in seconds
         """
-        with self._lock:
-            self.total_connections = max(self.total_connections, len(self.connection_lifetimes) + 1)
-            self.active_connections += 1
-            self.idle_connections = max(0, self.total_connections - self.active_connections)
-            self.max_connections = max(self.max_connections, self.active_connections)
-            self.acquisition_times.append(acquisition_time * 1000)  # Convert to ms
-            self.connection_lifetimes[connection_id] = time.time()
+        self.record_connection_acquire_ns(connection_id, int(acquisition_time * 1e9))
+    
+    def record_connection_acquire_ns(self, connection_id: str, acquisition_ns: int):
+        """
+        Record a connection acquisition timed in nanoseconds.
+        
+        Args:
+            connection_id: The connection ID
+            acquisition_ns: The time it took to acquire the connection in nanoseconds
+        """
+        shard = self._shards[_shard_index()]
+        with shard.lock:
+            slot = shard.acquires & (_SAMPLE_WINDOW - 1)
+            shard.acquisition_sum += acquisition_ns - shard.acquisition_times[slot]
+            shard.acquisition_times[slot] = acquisition_ns
+            shard.acquires += 1
+        
+        # Track the peak number of connections in use
+        active = self.active_connections
+        if active > self.max_connections:
+            self.max_connections = active
+            self.total_connections = max(self.total_connections, active)
     
     def record_connection_release(self, connection_id: str, release_time: float):
         """
@@ -89,54 +329,191 @@ class ConnectionPoolMetrics:
             connection_id: The connection ID
             release_time: The time it took to release the connection in seconds
         """
-        with self._lock:
-            self.active_connections = max(0, self.active_connections - 1)
-            self.idle_connections = max(0, self.total_connections - self.active_connections)
-            self.release_times.append(release_time * 1000)  # Convert to ms
-            
-            if connection_id in self.connection_lifetimes:
-                lifetime = time.time() - self.connection_lifetimes[connection_id]
-                del self.connection_lifetimes[connection_id]
+        self.record_connection_release_ns(connection_id, int(release_time * 1e9))
+    
+    def record_connection_release_ns(self, connection_id: str, release_ns: int):
+        """
+        Record a connection release timed in nanoseconds.
+        
+        Args:
+            connection_id: The connection ID
+            release_ns: The time it took to release the connection in nanoseconds
+        """
+        shard = self._shards[_shard_index()]
+        with shard.lock:
+            slot = shard.releases & (_SAMPLE_WINDOW - 1)
+            shard.release_sum += release_ns - shard.release_times[slot]
+            shard.release_times[slot] = release_ns
+            shard.releases += 1
     
     def record_connection_timeout(self):
         """
         Record a connection timeout.
         """
-        with self._lock:
-            self.connection_timeouts += 1
+        shard = self._shards[_shard_index()]
+        with shard.lock:
+            shard.timeouts += 1
     
     def record_connection_error(self):
         """
         Record a connection error.
         """
-        with self._lock:
-            self.connection_errors += 1
+        shard = self._shards[_shard_index()]
+        with shard.lock:
+            shard.errors += 1
+    
+    def record_connection_acquired(self):
+        """
+        Record a connection request that ended with a connection.
+        """
+        shard = self._shards[_shard_index()]
+        with shard.lock:
+            shard.acquired += 1
+    
+    def record_connection_unacquired_error(self):
+        """
+        Record a connection request that ended with an error or timeout.
+        """
+        shard = self._shards[_shard_index()]
+        with shard.lock:
+            shard.unacquired_error += 1
+    
+    def record_connection_unacquired_canceled(self):
+        """
+        Record a connection request that was cancelled by the caller.
+        """
+        shard = self._shards[_shard_index()]
+        with shard.lock:
+            shard.unacquired_canceled += 1
+    
+    @property
+    def active_connections(self) -> int:
+        """The number of connections currently acquired."""
+        acquires = sum(shard.acquires for shard in self._shards)
+        releases = sum(shard.releases for shard in self._shards)
+        return max(0, acquires - releases)
+    
+    @property
+    def idle_connections(self) -> int:
+        """The number of connections currently idle."""
+        return max(0, self.total_connections - self.active_connections)
+    
+    @property
+    def connection_requests(self) -> int:
+        """The number of connection requests."""
+        return sum(shard.requests for shard in self._shards)
+    
+    @property
+    def connection_timeouts(self) -> int:
+        """The number of connection timeouts."""
+        return sum(shard.timeouts for shard in self._shards)
+    
+    @property
+    def connection_errors(self) -> int:
+        """The number of connection errors."""
+        return sum(shard.errors for shard in self._shards)
+    
+    @property
+    def connections_acquired(self) -> int:
+        """The number of connection requests that got a connection."""
+        return sum(shard.acquired for shard in self._shards)
+    
+    @property
+    def connections_unacquired_error(self) -> int:
+        """The number of connection requests that failed or timed out."""
+        return sum(shard.unacquired_error for shard in self._shards)
+    
+    @property
+    def connections_unacquired_canceled(self) -> int:
+        """The number of connection requests cancelled by the caller."""
+        return sum(shard.unacquired_canceled for shard in self._shards)
     
     @property
     def avg_acquisition_time(self) -> float:
         """
-        Get the average connection acquisition time in milliseconds.
+        Get the average recent connection acquisition time in milliseconds.
         
         Returns:
             The average acquisition time
         """
-        with self._lock:
-            if not self.acquisition_times:
-                return 0.0
-            return sum(self.acquisition_times) / len(self.acquisition_times)
+        return self._average("acquires", "acquisition_sum")
     
     @property
     def avg_release_time(self) -> float:
         """
-        Get the average connection release time in milliseconds.
+        Get the average recent connection release time in milliseconds.
         
         Returns:
             The average release time
         """
-        with self._lock:
-            if not self.release_times:
-                return 0.0
-            return sum(self.release_times) / len(self.release_times)
+        return self._average("releases", "release_sum")
+    
+    def _average(self, counter: str, running_sum: str) -> float:
+        """
+        Average the recent samples of all shards.
+        
+        The running sums and counts are read without taking the shard locks,
+        so a read racing a write may be off by the sample being recorded.
+        
+        Args:
+            counter: The name of the shard counter for the operation
+            running_sum: The name of the running sum of the sample window
+            
+        Returns:
+            The average in milliseconds, or 0.0 if there are no samples
+        """
+        total = 0
+        count = 0
+        for shard in self._shards:
+            total += getattr(shard, running_sum)
+            count += min(getattr(shard, counter), _SAMPLE_WINDOW)
+        if count == 0:
+            return 0.0
+        return total / (count * 1e6)
+    
+    def _recent_samples(self, counter: str, ring: str) -> array:
+        """
+        Collect the recent samples of all shards.
+        
+        Each ring is copied in a single slice, which is atomic under the GIL,
+        so reads don't take the shard locks and never block recording.
+        
+        Args:
+            counter: The name of the shard counter for the operation
+            ring: The name of the shard sample ring
+            
+        Returns:
+            The recent samples in nanoseconds
+        """
+        samples = array('q')
+        for shard in self._shards:
+            count = min(getattr(shard, counter), _SAMPLE_WINDOW)
+            samples.extend(getattr(shard, ring)[:count])
+        return samples
+    
+    def acquisition_time_percentile(self, percentile: float) -> float:
+        """
+        Get a percentile of the recent connection acquisition times in milliseconds.
+        
+        Args:
+            percentile: The percentile to compute (0 to 100)
+            
+        Returns:
+            The acquisition time percentile
+        """
+        return _percentile(self._recent_samples("acquires", "acquisition_times"), percentile) / 1e6
+    
+    def release_time_percentile(self, percentile: float) -> float:
+        """
+        Get a percentile of the recent connection release times in milliseconds.
+        
+        Args:
+            percentile: The percentile to compute (0 to 100)
+            
+        Returns:
+            The release time percentile
+        """
+        return _percentile(self._recent_samples("releases", "release_times"), percentile) / 1e6
     
     @property
     def pool_utilization(self) -> float:
@@ -146,10 +523,10 @@ class ConnectionPoolMetrics:
         Returns:
             The pool utilization ratio (0.0 to 1.0)
         """
-        with self._lock:
-            if self.total_connections == 0:
-                return 0.0
-            return self.active_connections / self.total_connections
+        total = self.total_connections
+        if total == 0:
+            return 0.0
+        return min(1.0, self.active_connections / total)
     
     @property
     def error_rate(self) -> float:
@@ -159,10 +536,10 @@ class ConnectionPoolMetrics:
         Returns:
             The error rate (0.0 to 1.0)
         """
-        with self._lock:
-            if self.connection_requests == 0:
-                return 0.0
-            return (self.connection_timeouts + self.connection_errors) / self.connection_requests
+        requests = self.connection_requests
+        if requests == 0:
+            return 0.0
+        return (self.connection_timeouts + self.connection_errors) / requests
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -171,22 +548,28 @@ class ConnectionPoolMetrics:
         Returns:
             A dictionary representation of the metrics data
         """
-        with self._lock:
-            return {
-                "timestamp": datetime.now().isoformat(),
-                "duration_seconds": time.time() - self.start_time,
-                "total_connections": self.total_connections,
-                "active_connections": self.active_connections,
-                "idle_connections": self.idle_connections,
-                "max_connections": self.max_connections,
-                "connection_requests": self.connection_requests,
-                "connection_timeouts": self.connection_timeouts,
-                "connection_errors": self.connection_errors,
-                "avg_acquisition_time_ms": self.avg_acquisition_time,
-                "avg_release_time_ms": self.avg_release_time,
-                "pool_utilization": self.pool_utilization,
-                "error_rate": self.error_rate,
-            }
+        # Nothing here takes a lock, and the percentiles share one snapshot
+        acquisition_samples = self._recent_samples("acquires", "acquisition_times")
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "duration_seconds": (_mono() - self._start_ns) / 1e9,
+            "total_connections": self.total_connections,
+            "active_connections": self.active_connections,
+            "idle_connections": self.idle_connections,
+            "max_connections": self.max_connections,
+            "connection_requests": self.connection_requests,
+            "connection_timeouts": self.connection_timeouts,
+            "connection_errors": self.connection_errors,
+            "connections_acquired": self.connections_acquired,
+            "connections_unacquired_error": self.connections_unacquired_error,
+            "connections_unacquired_canceled": self.connections_unacquired_canceled,
+            "avg_acquisition_time_ms": self.avg_acquisition_time,
+            "p50_acquisition_time_ms": _percentile(acquisition_samples, 50) / 1e6,
+            "p99_acquisition_time_ms": _percentile(acquisition_samples, 99) / 1e6,
+            "avg_release_time_ms": self.avg_release_time,
+            "pool_utilization": self.pool_utilization,
+            "error_rate": self.error_rate,
+        }
     
     def to_json(self, pretty: bool = True) -> str:
         """
@@ -198,8 +581,7 @@ class ConnectionPoolMetrics:
         Returns:
             A JSON string representation of the metrics data
         """
-        indent = 2 if pretty else None
-        return json.dumps(self.to_dict(), indent=indent)
+        return _dumps(self.to_dict(), pretty=pretty).decode('utf-8')
     
     def save(self, file_path: str) -> None:
         """
@@ -208,69 +590,121 @@ class ConnectionPoolMetrics:
         Args:
             file_path: The path to save the data to
         """
-        with open(file_path, 'w') as f:
-            f.write(self.to_json())
+        with open(file_path, 'wb') as f:
+            f.write(_dumps(self.to_dict(), pretty=True))
+    
+    # Filled from to_dict() and written in one call by print_summary
+    _SUMMARY_TEMPLATE = (
+        "=== Connection Pool Metrics Summary ===\n"
+        "Duration: {duration_seconds:.2f} seconds\n"
+        "Total Connections: {total_connections}\n"
+        "Active Connections: {active_connections}\n"
+        "Idle Connections: {idle_connections}\n"
+        "Max Connections: {max_connections}\n"
+        "Connection Requests: {connection_requests}\n"
+        "Connection Timeouts: {connection_timeouts}\n"
+        "Connection Errors: {connection_errors}\n"
+        "Connections Acquired: {connections_acquired}\n"
+        "Unacquired (Error): {connections_unacquired_error}\n"
+        "Unacquired (Canceled): {connections_unacquired_canceled}\n"
+        "Average Acquisition Time: {avg_acquisition_time_ms:.2f} ms\n"
+        "Average Release Time: {avg_release_time_ms:.2f} ms\n"
+        "Pool Utilization: {pool_utilization:.2%}\n"
+        "Error Rate: {error_rate:.2%}\n"
+    )
     
     def print_summary(self) -> None:
         """
         Print a summary of the metrics data to the console.
         """
-        print("=== Connection Pool Metrics Summary ===")
-        print(f"Duration: {time.time() - self.start_time:.2f} seconds")
-        print(f"Total Connections: {self.total_connections}")
-        print(f"Active Connections: {self.active_connections}")
-        print(f"Idle Connections: {self.idle_connections}")
-        print(f"Max Connections: {self.max_connections}")
-        print(f"Connection Requests: {self.connection_requests}")
-        print(f"Connection Timeouts: {self.connection_timeouts}")
-        print(f"Connection Errors: {self.connection_errors}")
-        print(f"Average Acquisition Time: {self.avg_acquisition_time:.2f} ms")
-        print(f"Average Release Time: {self.avg_release_time:.2f} ms")
-        print(f"Pool Utilization: {self.pool_utilization:.2%}")
-        print(f"Error Rate: {self.error_rate:.2%}")
+        sys.stdout.write(self._SUMMARY_TEMPLATE.format_map(self.to_dict()))
 
 
+class _AcquireGuard:
+    """
+    Records the outcome of a single connection request.
+    
+    Used as a context manager around an acquisition. On exit it records
+    exactly one outcome: acquired if the block completed, canceled if it was
+    cancelled, and error for any other exception.
+    """
+    
+    __slots__ = ("_metrics",)
+    
+    def __init__(self, metrics: ConnectionPoolMetrics):
+        self._metrics = metrics
+    
+    def __enter__(self) -> '_AcquireGuard':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is None:
+            self._metrics.record_connection_acquired()
+        elif issubclass(exc_type, asyncio.CancelledError):
+            self._metrics.record_connection_unacquired_canceled()
+        else:
+            self._metrics.record_connection_unacquired_error()
+        return False
+
+
+# Slotted dataclasses need Python 3.10
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ConnectionPoolSettings:
     """
     Settings for a connection pool.
     
     This class defines the settings for a connection pool,
-    such as pool size, timeout, and retry parameters.
-    """
+    such as pool size, timeout, and retry parameters. Settings are
+    immutable; build a new instance to change them.
     
-    def __init__(self,
-                 min_size: int = 1,
-                 max_size: int = 10,
-                 max_idle: int = 5,
-                 max_lifetime: int = 3600,
-                 acquire_timeout: float = 10.0,
-                 idle_timeout: float = 300.0,
-                 retry_limit: int = 3,
-                 retry_delay: float = 1.0,
-                 validate_on_acquire: bool = True):
-        """
-        Initialize connection pool settings.
-        
-        Args:
-            min_size: The minimum pool size
-            max_size: The maximum pool size
-            max_idle: The maximum number of idle connections
-            max_lifetime: The maximum connection lifetime in seconds
-            acquire_timeout: The connection acquisition timeout in seconds
-            idle_timeout: The idle connection timeout in seconds
-            retry_limit: The maximum number of connection retries
-            retry_delay: The delay between connection retries in seconds
-            validate_on_acquire: Whether to validate connections on acquisition
-        """
-        self.min_size = min_size
-        self.max_size = max_size
-        self.max_idle = max_idle
-        self.max_lifetime = max_lifetime
-        self.acquire_timeout = acquire_timeout
-        self.idle_timeout = idle_timeout
-        self.retry_limit = retry_limit
-        self.retry_delay = retry_delay
-        self.validate_on_acquire = validate_on_acquire
+    Attributes:
+        min_size: The minimum pool size
+        max_size: The maximum pool size
+        max_idle: The maximum number of idle connections
+        max_lifetime: The maximum connection lifetime in seconds
+        acquire_timeout: The connection acquisition timeout in seconds
+        idle_timeout: The idle connection timeout in seconds
+        retry_limit: The maximum number of connection retries
+        retry_delay: The delay between connection retries in seconds
+        validate_on_acquire: Whether to validate connections on acquisition
+        idle_shards: The number of sub-pools idle connections are spread over,
+            rounded up to a power of two
+        validation_interval: How long in seconds a connection is trusted
+            without calling validate_func after it passed validation or
+            was released from use
+        pre_warm: Whether initialize() runs the pool's warm function on each
+            new connection, so the first requests find finished handshakes
+        validation_mode: How ConnectionPoolMiddleware validates connections:
+            "query" makes a round trip such as SELECT 1 or PING, "socket"
+            only inspects the connection's transport state and "none"
+            skips validation. The recycling method names "verified",
+            "fast" and "unverified" are accepted for these, in that order
+        min_idle: The number of idle connections a background task keeps
+            open, capped at max_idle; 0 disables the task
+        idle_check_interval: How often in seconds the idle connections are
+            topped up to min_idle
+        use_uvloop: Whether ConnectionPoolMiddleware installs uvloop's event
+            loop policy when it is created, for loops started afterwards
+    """
+    min_size: int = 1
+    max_size: int = 10
+    max_idle: int = 5
+    max_lifetime: int = 3600
+    acquire_timeout: float = 10.0
+    idle_timeout: float = 300.0
+    retry_limit: int = 3
+    retry_delay: float = 1.0
+    validate_on_acquire: bool = True
+    idle_shards: int = 1
+    validation_interval: float = 1.0
+    pre_warm: bool = True
+    validation_mode: str = "socket"
+    min_idle: int = 0
+    idle_check_interval: float = 1.0
+    use_uvloop: bool = False
     
     @classmethod
     def create_aggressive(cls) -> 'ConnectionPoolSettings':
@@ -352,7 +786,8 @@ class ConnectionPool:
                  settings: Optional[ConnectionPoolSettings] = None,
                  validate_func: Optional[Callable[[Any], bool]] = None,
                  close_func: Optional[Callable[[Any], None]] = None,
-                 metrics: Optional[ConnectionPoolMetrics] = None):
+                 metrics: Optional[ConnectionPoolMetrics] = None,
+                 warm_func: Optional[Callable[[Any], Any]] = None):
         """
         Initialize a connection pool.
         
@@ -362,31 +797,128 @@ class ConnectionPool:
             validate_func: A function that validates connections
             close_func: A function that closes connections
             metrics: A metrics instance for collecting pool metrics
+            warm_func: A function making a cheap round trip on a new
+                connection, such as a ping, run by initialize() when
+                pre_warm is set
         """
         self.factory = factory
         self.settings = settings or ConnectionPoolSettings()
         self.validate_func = validate_func or (lambda conn: True)
         self.close_func = close_func or (lambda conn: None)
         self.metrics = metrics or ConnectionPoolMetrics()
-        
-        self._pool = asyncio.Queue(maxsize=self.settings.max_size)
-        self._active_connections = set()
-        self._connection_lifetimes = {}
-        self._lock = asyncio.Lock()
+        self.warm_func = warm_func
+        
+        # Idle connections are handed out last in, first out, so a small set
+        # of recently used connections stays warm and the rest can idle out.
+        # With more than one shard, releases and acquires pick a shard round
+        # robin and acquires steal from the other shards when theirs is empty.
+        shard_count = 1 << max(0, self.settings.idle_shards - 1).bit_length()
+        self._idle_shards: List[deque] = [deque() for _ in range(shard_count)]
+        self._shard_mask = shard_count - 1
+        self._rr = itertools.count()
+        self._active_connections: Dict[int, Any] = {}
+        # Creation times, ids and alive times of connections that don't
+        # accept attributes
+        self._created_at = weakref.WeakKeyDictionary()
+        self._ids = weakref.WeakKeyDictionary()
+        self._alive_at = weakref.WeakKeyDictionary()
+        # Connection ids are never reused, unlike id() of collected objects
+        self._id_gen = itertools.count(1)
         self._closed = False
+        # Background task validating idle connections, started by initialize
+        self._sweeper_task: Optional[asyncio.Task] = None
+        self._sweeping = False
+        # Background task keeping min_idle connections open
+        self._idle_keeper_task: Optional[asyncio.Task] = None
+        
+        # One slot per connection handed out or being created
+        self._slots = asyncio.Semaphore(self.settings.max_size)
     
-    async def _create_connection(self) -> Any:
+    async def _create_connection(self, warm: bool = False) -> Any:
         """
         Create a new connection.
         
+        Args:
+            warm: Whether to run the warm function on the new connection
+        
         Returns:
             A new connection
         """
-        connection = await self.factory()
-        connection_id = id(connection)
-        self._connection_lifetimes[connection_id] = time.time()
+        connection = await _maybe_await(self.factory())
+        if warm and self.warm_func is not None:
+            try:
+                await _maybe_await(self.warm_func(connection))
+            except BaseException:
+                await self._close_connection(connection)
+                raise
+        now = _mono()
+        connection_id = next(self._id_gen)
+        try:
+            setattr(connection, _CREATED_ATTR, now)
+            setattr(connection, _ID_ATTR, connection_id)
+        except (AttributeError, TypeError):
+            try:
+                self._created_at[connection] = now
+                self._ids[connection] = connection_id
+            except TypeError:
+                logger.debug(f"Cannot track the lifetime of {type(connection).__name__} connections")
         return connection
     
+    def _connection_id(self, connection: Any) -> int:
+        """
+        Get the id of a connection within the pool.
+        
+        Connections that can hold neither attributes nor weak references fall
+        back to id(), which is an address and far above the assigned ids.
+        
+        Args:
+            connection: The connection
+            
+        Returns:
+            The connection id
+        """
+        connection_id = getattr(connection, _ID_ATTR, None)
+        if connection_id is None:
+            try:
+                connection_id = self._ids.get(connection)
+            except TypeError:
+                pass
+        return id(connection) if connection_id is None else connection_id
+    
+    def _created_ns(self, connection: Any) -> Optional[int]:
+        """
+        Get the creation time of a connection.
+        
+        Args:
+            connection: The connection
+            
+        Returns:
+            The monotonic creation time in nanoseconds, or None if unknown
+        """
+        created = getattr(connection, _CREATED_ATTR, None)
+        if created is None:
+            try:
+                created = self._created_at.get(connection)
+            except TypeError:
+                pass
+        return created
+    
+    def _expired(self, connection: Any) -> bool:
+        """
+        Check whether a connection has exceeded its maximum lifetime.
+        
+        Args:
+            connection: The connection to check
+            
+        Returns:
+            True if the connection has expired, False otherwise
+        """
+        created = self._created_ns(connection)
+        if created is not None and _mono() - created > self.settings.max_lifetime * 1_000_000_000:
+            logger.debug(f"Connection {self._connection_id(connection)} has exceeded its maximum lifetime")
+            return True
+        return False
+    
     async def _validate_connection(self, connection: Any) -> bool:
         """
         Validate a connection.
@@ -399,21 +931,47 @@ class ConnectionPool:
         """
         try:
             # Check if the connection has expired
-            connection_id = id(connection)
-            if connection_id in self._connection_lifetimes:
-                lifetime = time.time() - self._connection_lifetimes[connection_id]
-                if lifetime > self.settings.max_lifetime:
-                    logger.debug(f"Connection {connection_id} has exceeded its maximum lifetime")
-                    return False
+            if self._expired(connection):
+                return False
+            
+            # Trust a connection that was recently validated or in use
+            alive = getattr(connection, _ALIVE_ATTR, None)
+            if alive is None:
+                try:
+                    alive = self._alive_at.get(connection)
+                except TypeError:
+                    pass
+            now = _mono()
+            if alive is not None and now - alive < self.settings.validation_interval * 1_000_000_000:
+                return True
             
             # Validate the connection
             if callable(self.validate_func):
-                return await self.validate_func(connection)
+                if not await _maybe_await(self.validate_func(connection)):
+                    return False
+            
+            self._mark_alive(connection, now)
             return True
         except Exception as e:
             logger.warning(f"Connection validation failed: {e}")
             return False
     
+    def _mark_alive(self, connection: Any, now: int) -> None:
+        """
+        Record that a connection was known to be alive.
+        
+        Args:
+            connection: The connection
+            now: The monotonic time in nanoseconds
+        """
+        try:
+            setattr(connection, _ALIVE_ATTR, now)
+        except (AttributeError, TypeError):
+            try:
+                self._alive_at[connection] = now
+            except TypeError:
+                pass
+    
     async def _close_connection(self, connection: Any) -> None:
         """
         Close a connection.
@@ -422,12 +980,8 @@ class ConnectionPool:
             connection: The connection to close
         """
         try:
-            connection_id = id(connection)
-            if connection_id in self._connection_lifetimes:
-                del self._connection_lifetimes[connection_id]
-            
             if callable(self.close_func):
-                await self.close_func(connection)
+                await _maybe_await(self.close_func(connection))
         except Exception as e:
             logger.warning(f"Connection close failed: {e}")
     
@@ -435,15 +989,135 @@ class ConnectionPool:
         """
         Initialize the connection pool.
         
-        This method creates the minimum number of connections.
+        This method creates the minimum number of connections concurrently,
+        warming each one first if pre_warm is set.
         """
-        async with self._lock:
-            for _ in range(self.settings.min_size):
-                try:
-                    connection = await self._create_connection()
-                    await self._pool.put(connection)
-                except Exception as e:
-                    logger.warning(f"Failed to create initial connection: {e}")
+        warm = self.settings.pre_warm
+        results = await asyncio.gather(
+            *[self._create_connection(warm) for _ in range(self.settings.min_size)],
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to create initial connection: {result}")
+            else:
+                self._push_idle(result)
+        
+        # Validate idle connections in the background from now on
+        if self._sweeper_task is None and not self._closed and self.settings.idle_timeout > 0:
+            self._sweeper_task = asyncio.ensure_future(self._sweeper())
+        
+        # Keep connections ready for bursts after quiet periods
+        if self._idle_keeper_task is None and not self._closed and self.settings.min_idle > 0:
+            self._idle_keeper_task = asyncio.ensure_future(self._maintain_idle())
+    
+    def _pop_idle(self) -> Any:
+        """
+        Pop the most recently released connection of the next shard.
+        
+        Returns:
+            An idle connection
+        
+        Raises:
+            IndexError: If there are no idle connections
+        """
+        if not self._shard_mask:
+            return self._idle_shards[0].pop()
+        
+        start = next(self._rr)
+        for offset in range(self._shard_mask + 1):
+            shard = self._idle_shards[(start + offset) & self._shard_mask]
+            if shard:
+                return shard.pop()
+        raise IndexError("pop from an empty pool")
+    
+    def _push_idle(self, connection: Any) -> None:
+        """
+        Add a released connection to the next shard.
+        
+        Args:
+            connection: The connection
+        """
+        if self._shard_mask:
+            self._idle_shards[next(self._rr) & self._shard_mask].append(connection)
+        else:
+            self._idle_shards[0].append(connection)
+    
+    async def _sweeper(self) -> None:
+        """
+        Periodically validate idle connections in the background.
+        
+        Runs every quarter of the idle timeout until the pool is closed.
+        """
+        interval = self.settings.idle_timeout / 4
+        while not self._closed:
+            await asyncio.sleep(interval)
+            try:
+                await self._sweep()
+            except Exception as e:
+                logger.warning(f"Connection sweep failed: {e}")
+    
+    async def _sweep(self) -> None:
+        """
+        Validate the idle connections, closing any that are invalid.
+        
+        Connections are checked one at a time, starting from the cold end,
+        so the others stay available to acquire. The one being checked is
+        taken out of the pool so it is never handed out mid-check. A valid
+        connection goes back to its place unless the pool has reached
+        max_idle in the meantime, in which case it is closed as surplus.
+        """
+        self._sweeping = True
+        try:
+            for shard in self._idle_shards:
+                # Connections already checked, at the cold end of the shard
+                kept = 0
+                for connection in list(shard):
+                    try:
+                        shard.remove(connection)
+                    except ValueError:
+                        # Handed out since the sweep started
+                        continue
+                    
+                    # A cancelled check hands the connection back unchecked
+                    usable = True
+                    try:
+                        usable = await self._validate_connection(connection)
+                    finally:
+                        if usable and not self._closed and self.pool_size < self.settings.max_idle:
+                            shard.insert(min(kept, len(shard)), connection)
+                            kept += 1
+                        else:
+                            await self._close_connection(connection)
+        finally:
+            self._sweeping = False
+    
+    async def _maintain_idle(self) -> None:
+        """
+        Periodically top up the idle connections to min_idle.
+        
+        Runs every idle check interval until the pool is closed. Rounds
+        overlapping a sweep are skipped, so the connection being checked
+        isn't replaced.
+        """
+        target = min(self.settings.min_idle, self.settings.max_idle)
+        while not self._closed:
+            await asyncio.sleep(self.settings.idle_check_interval)
+            missing = target - self.pool_size
+            if missing <= 0 or self._sweeping:
+                continue
+            
+            results = await asyncio.gather(
+                *[self._create_connection(self.settings.pre_warm) for _ in range(missing)],
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning(f"Failed to create idle connection: {result}")
+                elif self._closed:
+                    await self._close_connection(result)
+                else:
+                    self._push_idle(result)
     
     async def acquire(self) -> Any:
         """
@@ -463,45 +1137,99 @@ class ConnectionPool:
         self.metrics.record_connection_request()
         
         # Measure acquisition time
-        start_time = time.time()
+        start_ns = _mono()
         
-        # Try to get a connection from the pool
-        try:
-            connection = None
-            
-            # Try to get a connection from the pool
+        # Try to get a connection from the pool, recording how the request ends
+        with _AcquireGuard(self.metrics):
             try:
-                connection = await asyncio.wait_for(
-                    self._pool.get(),
-                    timeout=self.settings.acquire_timeout
-                )
-            except asyncio.TimeoutError:
-                # Pool is empty and max size not reached, create a new connection
-                async with self._lock:
-                    if len(self._active_connections) < self.settings.max_size:
+                await self._reserve_slot()
+                
+                try:
+                    try:
+                        # Reuse the most recently released connection
+                        connection = self._pop_idle()
+                    except IndexError:
                         connection = await self._create_connection()
-                    else:
-                        self.metrics.record_connection_timeout()
-                        raise TimeoutError("Connection pool timeout")
-            
-            # Validate the connection if required
-            if self.settings.validate_on_acquire and not await self._validate_connection(connection):
-                # Connection is invalid, close it and create a new one
-                await self._close_connection(connection)
-                connection = await self._create_connection()
-            
-            # Record connection acquisition
-            connection_id = id(connection)
-            self._active_connections.add(connection_id)
-            acquisition_time = time.time() - start_time
-            self.metrics.record_connection_acquire(str(connection_id), acquisition_time)
+                    
+                    # Validate the connection if required
+                    if self.settings.validate_on_acquire and not await self._validate_connection(connection):
+                        # Connection is invalid, close it and create a new one
+                        await self._close_connection(connection)
+                        connection = await self._create_connection()
+                except BaseException:
+                    # Give the reserved slot back
+                    self._slots.release()
+                    raise
+                
+                # Record connection acquisition
+                connection_id = self._connection_id(connection)
+                self._active_connections[connection_id] = connection
+                self.metrics.record_connection_acquire_ns(str(connection_id), _mono() - start_ns)
+                
+                return connection
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Record connection error
+                self.metrics.record_connection_error()
+                logger.error(f"Failed to acquire connection: {e}")
+                raise
+    
+    async def acquire_many(self, count: int) -> List[Any]:
+        """
+        Acquire several connections at once.
+        
+        The acquisitions run concurrently, so connections that have to be
+        created open in parallel instead of one handshake after another.
+        If any acquisition fails, or the call is cancelled or times out,
+        the pending acquisitions are cancelled, the connections already
+        acquired are released and the error is raised.
+        
+        Args:
+            count: The number of connections to acquire
             
-            return connection
-        except Exception as e:
-            # Record connection error
-            self.metrics.record_connection_error()
-            logger.error(f"Failed to acquire connection: {e}")
+        Returns:
+            The acquired connections
+        
+        Raises:
+            ValueError: If count exceeds the maximum pool size
+        """
+        if count > self.settings.max_size:
+            raise ValueError(f"Cannot acquire {count} connections from a pool of at most {self.settings.max_size}")
+        
+        tasks = [asyncio.ensure_future(self.acquire()) for _ in range(count)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Wait for every acquisition to settle, so none of them can
+            # still end up holding a connection or a slot
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.wait(tasks)
+            for task in tasks:
+                if not task.cancelled() and task.exception() is None:
+                    await self.release(task.result())
             raise
+        return [task.result() for task in tasks]
+    
+    async def _reserve_slot(self) -> None:
+        """
+        Reserve a slot for a connection, waiting while the pool is full.
+        
+        Raises:
+            TimeoutError: If no slot became free within the acquire timeout
+        """
+        if not self._slots.locked():
+            # A slot is free, so this returns without suspending
+            await self._slots.acquire()
+            return
+        
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.settings.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.record_connection_timeout()
+            raise TimeoutError("Connection pool timeout")
     
     async def release(self, connection: Any) -> None:
         """
@@ -515,29 +1243,34 @@ class ConnectionPool:
             return
         
         # Measure release time
-        start_time = time.time()
+        start_ns = _mono()
         
-        connection_id = id(connection)
+        connection_id = self._connection_id(connection)
         
         # Remove connection from active connections
-        self._active_connections.discard(connection_id)
+        was_active = self._active_connections.pop(connection_id, None) is not None
+        if was_active:
+            # It was in use until now, so skip validating it for a while
+            self._mark_alive(connection, start_ns)
         
         # Check if the connection is valid
-        if await self._validate_connection(connection):
-            # Check if we have too many idle connections
-            if self._pool.qsize() >= self.settings.max_idle:
-                # Too many idle connections, close this one
-                await self._close_connection(connection)
-            else:
-                # Return the connection to the pool
-                await self._pool.put(connection)
+        keep = await self._validate_connection(connection)
+        
+        # Return the connection to the pool unless we have too many idle
+        # connections, and free its slot either way
+        if keep and self.pool_size < self.settings.max_idle:
+            self._push_idle(connection)
         else:
-            # Connection is invalid, close it
+            keep = False
+        if was_active:
+            self._slots.release()
+        
+        if not keep:
+            # Connection is invalid or not needed, close it
             await self._close_connection(connection)
         
         # Record connection release
-        release_time = time.time() - start_time
-        self.metrics.record_connection_release(str(connection_id), release_time)
+        self.metrics.record_connection_release_ns(str(connection_id), _mono() - start_ns)
     
     @asynccontextmanager
     async def connection(self):
@@ -545,15 +1278,28 @@ class ConnectionPool:
         Get a connection from the pool as a context manager.
         
         This method acquires a connection from the pool, yields it,
-        and ensures it is released back to the pool when done.
+        and ensures it is released back to the pool when done. Nested
+        blocks in the same task reuse the connection of the outermost one
+        instead of acquiring another.
         
         Yields:
             A connection from the pool
         """
+        task = asyncio.current_task()
+        held = _held_connections.get()
+        if held is not None:
+            holder = held.get(self)
+            # Other tasks inherit the context, but must not share the connection
+            if holder is not None and holder[0] is task:
+                yield holder[1]
+                return
+        
         connection = await self.acquire()
+        token = _held_connections.set({**(held or {}), self: (task, connection)})
         try:
             yield connection
         finally:
+            _held_connections.reset(token)
             await self.release(connection)
     
     async def close(self) -> None:
@@ -567,22 +1313,22 @@ class ConnectionPool:
         
         self._closed = True
         
-        # Close all connections in the pool
-        while not self._pool.empty():
-            connection = await self._pool.get()
-            await self._close_connection(connection)
+        if self._sweeper_task is not None:
+            self._sweeper_task.cancel()
+            self._sweeper_task = None
         
-        # Close all active connections
-        for connection_id in list(self._active_connections):
-            connection = None
-            # We don't have a way to get the connection from its ID,
-            # so we can't close active connections here.
-            # In a real implementation, you would keep a mapping of IDs to connections.
-            if connection:
-                await self._close_connection(connection)
+        if self._idle_keeper_task is not None:
+            self._idle_keeper_task.cancel()
+            self._idle_keeper_task = None
         
+        # Close the idle and active connections concurrently
+        connections = list(self._active_connections.values())
+        for shard in self._idle_shards:
+            connections.extend(shard)
+            shard.clear()
         self._active_connections.clear()
-        self._connection_lifetimes.clear()
+        
+        await asyncio.gather(*map(self._close_connection, connections))
     
     def get_metrics(self) -> ConnectionPoolMetrics:
         """
@@ -601,7 +1347,7 @@ class ConnectionPool:
         Returns:
             The current pool size
         """
-        return self._pool.qsize()
+        return sum(map(len, self._idle_shards))
     
     @property
     def active_connections(self) -> int:
@@ -619,26 +1365,77 @@ class PoolManager:
     Manages multiple connection pools.
     
     This class manages multiple connection pools for different resources,
-    such as databases, APIs, or services.
+    such as databases, APIs, or services. Pools are sharded per running
+    event loop, so each loop gets its own pool for a given name and lookups
+    never contend across loops.
     """
     
     def __init__(self):
         """
         Initialize a pool manager.
         """
-        self._pools = {}
-        self._lock = asyncio.Lock()
+        self._pools: Dict[str, Dict[int, ConnectionPool]] = defaultdict(dict)
+        # Weak references to the loops that own shards, by loop id. A
+        # collected loop's id can be reused, so shards are only handed to
+        # the loop that created them
+        self._loops: Dict[int, weakref.ref] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
         self._closed = False
         self.metrics = ConnectionPoolMetrics()
     
+    def _loop_id(self, loop: asyncio.AbstractEventLoop) -> int:
+        """
+        Get the shard key of an event loop.
+        
+        If the loop's id belonged to a loop that has since been garbage
+        collected, that loop's shards and lock are dropped first. Its pools
+        are bound to a dead loop and can't be used or closed from this one.
+        """
+        loop_id = id(loop)
+        ref = self._loops.get(loop_id)
+        if ref is None or ref() is not loop:
+            if ref is not None:
+                self._locks.pop(loop_id, None)
+                for shards in self._pools.values():
+                    shards.pop(loop_id, None)
+            self._loops[loop_id] = weakref.ref(loop)
+        return loop_id
+    
+    def _loop_lock(self, loop_id: int) -> asyncio.Lock:
+        """
+        Get the creation lock for an event loop, creating it on first use.
+        
+        asyncio locks are bound to a single loop, so each loop gets its own.
+        """
+        lock = self._locks.get(loop_id)
+        if lock is None:
+            lock = self._locks.setdefault(loop_id, asyncio.Lock())
+        return lock
+    
+    def _iter_pools(self):
+        """
+        Iterate over every pool shard as (label, pool) pairs.
+        
+        The label is the pool name, suffixed with the loop id when a name has
+        shards on more than one event loop.
+        """
+        for name, shards in list(self._pools.items()):
+            if len(shards) == 1:
+                for pool in list(shards.values()):
+                    yield name, pool
+            else:
+                for loop_id, pool in list(shards.items()):
+                    yield "%s@%x" % (name, loop_id), pool
+    
     async def create_pool(self,
                           name: str,
                           factory: Callable[[], Any],
                           settings: Optional[ConnectionPoolSettings] = None,
                           validate_func: Optional[Callable[[Any], bool]] = None,
-                          close_func: Optional[Callable[[Any], None]] = None) -> ConnectionPool:
+                          close_func: Optional[Callable[[Any], None]] = None,
+                          warm_func: Optional[Callable[[Any], Any]] = None) -> ConnectionPool:
         """
-        Create a new connection pool.
+        Create a new connection pool for the running event loop.
         
         Args:
             name: The name of the pool
@@ -646,6 +1443,7 @@ class PoolManager:
             settings: The connection pool settings
             validate_func: A function that validates connections
             close_func: A function that closes connections
+            warm_func: A function making a cheap round trip on new connections
             
         Returns:
             The created connection pool
@@ -653,9 +1451,16 @@ class PoolManager:
         if self._closed:
             raise RuntimeError("Pool manager is closed")
         
-        async with self._lock:
-            if name in self._pools:
-                return self._pools[name]
+        loop_id = self._loop_id(asyncio.get_running_loop())
+        shards = self._pools[name]
+        pool = shards.get(loop_id)
+        if pool is not None:
+            return pool
+        
+        async with self._loop_lock(loop_id):
+            pool = shards.get(loop_id)
+            if pool is not None:
+                return pool
             
             # Create a new pool
             pool = ConnectionPool(
@@ -663,42 +1468,50 @@ class PoolManager:
                 settings=settings,
                 validate_func=validate_func,
                 close_func=close_func,
-                metrics=ConnectionPoolMetrics()
+                metrics=ConnectionPoolMetrics(),
+                warm_func=warm_func
             )
             
             # Initialize the pool
             await pool.initialize()
             
             # Store the pool
-            self._pools[name] = pool
+            shards[loop_id] = pool
             
             return pool
     
-    async def get_pool(self, name: str) -> Optional[ConnectionPool]:
+    def get_pool(self, name: str) -> Optional[ConnectionPool]:
         """
-        Get a connection pool by name.
+        Get the running event loop's connection pool by name.
         
         Args:
             name: The name of the pool
             
         Returns:
-            The connection pool, or None if not found
+            The connection pool, or None if not found or no loop is running
         """
-        if name in self._pools:
-            return self._pools[name]
-        return None
+        shards = self._pools.get(name)
+        if not shards:
+            return None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        ref = self._loops.get(id(loop))
+        if ref is None or ref() is not loop:
+            return None
+        return shards.get(id(loop))
     
     async def close_pool(self, name: str) -> None:
         """
-        Close a connection pool.
+        Close a connection pool on every event loop.
         
         Args:
             name: The name of the pool
         """
-        async with self._lock:
-            if name in self._pools:
-                pool = self._pools.pop(name)
-                await pool.close()
+        shards = self._pools.pop(name, None)
+        if shards:
+            await self._close_pools(list(shards.items()))
     
     async def close_all(self) -> None:
         """
@@ -709,10 +1522,21 @@ class PoolManager:
         
         self._closed = True
         
-        async with self._lock:
-            for name, pool in list(self._pools.items()):
-                await pool.close()
-            self._pools.clear()
+        pools = list(self._iter_pools())
+        self._pools.clear()
+        await self._close_pools(pools)
+    
+    async def _close_pools(self, pools: List[Tuple[Any, ConnectionPool]]) -> None:
+        """
+        Close connection pools concurrently.
+        
+        Args:
+            pools: The pools to close, each with a label for logging
+        """
+        results = await asyncio.gather(*[pool.close() for _, pool in pools], return_exceptions=True)
+        for (label, _), result in zip(pools, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error closing pool {label}: {result}")
     
     def get_metrics(self) -> Dict[str, ConnectionPoolMetrics]:
         """
@@ -721,16 +1545,17 @@ class PoolManager:
         Returns:
             A dictionary mapping pool names to metrics
         """
-        return {name: pool.get_metrics() for name, pool in self._pools.items()}
+        return {name: pool.get_metrics() for name, pool in self._iter_pools()}
     
     def print_summary(self) -> None:
         """
         Print a summary of all connection pools.
         """
+        pools = list(self._iter_pools())
         print("=== Pool Manager Summary ===")
-        print(f"Number of Pools: {len(self._pools)}")
+        print(f"Number of Pools: {len(pools)}")
         
-        for name, pool in self._pools.items():
+        for name, pool in pools:
             print(f"\n--- Pool: {name} ---")
             print(f"Pool Size: {pool.pool_size}")
             print(f"Active Connections: {pool.active_connections}")
@@ -742,6 +1567,32 @@ class PoolManager:
             print(f"Error Rate: {metrics.error_rate:.2%}")
 
 
+class _LoopResources:
+    """
+    What ConnectionPoolMiddleware set up on one event loop.
+    
+    Driver pools and futures are bound to the loop that created them, so
+    each loop initializes its own, matching PoolManager's per-loop pools.
+    """
+    
+    __slots__ = (
+        "loop", "initialized", "init_future",
+        "database_pool_options", "redis_pool_options", "aioredis_pool", "pg_pool_future",
+        "db_engine", "db_executor",
+    )
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.initialized = False
+        self.init_future: Optional[asyncio.Future] = None
+        self.database_pool_options: Optional[Dict[str, Any]] = None
+        self.redis_pool_options: Optional[Dict[str, Any]] = None
+        self.aioredis_pool = None
+        self.pg_pool_future: Optional[asyncio.Future] = None
+        self.db_engine = None
+        self.db_executor: Optional[ThreadPoolExecutor] = None
+
+
 class ConnectionPoolMiddleware(BaseMiddleware):
     """
     Middleware for providing connection pooling for API requests.
@@ -759,6 +1610,9 @@ class ConnectionPoolMiddleware(BaseMiddleware):
         connection_timeout: float = 5.0,
         pool_recycle: int = 300,
         pool_pre_ping: bool = True,
+        use_ssl: bool = False,
+        statement_cache_size: int = 1024,
+        warm_queries: Optional[List[str]] = None,
         **kwargs
     ):
         """
@@ -772,6 +1626,12 @@ class ConnectionPoolMiddleware(BaseMiddleware):
             connection_timeout: Connection timeout in seconds
             pool_recycle: Connection recycle time in seconds
             pool_pre_ping: Whether to ping connections before using them
+            use_ssl: Whether asyncpg and aiomysql connections use TLS, all
+                sharing one SSL context
+            statement_cache_size: The number of prepared statements each
+                asyncpg connection keeps
+            warm_queries: Parameterless, read-only queries run once on each
+                new asyncpg connection so their statements start out cached
             **kwargs: Additional options
         """
         super().__init__(**kwargs)
@@ -782,138 +1642,358 @@ class ConnectionPoolMiddleware(BaseMiddleware):
         self.connection_timeout = connection_timeout
         self.pool_recycle = pool_recycle
         self.pool_pre_ping = pool_pre_ping
-        self.pool_manager = PoolManager(metrics_enabled=True)
-        self.initialized = False
+        self.use_ssl = use_ssl
+        self.statement_cache_size = statement_cache_size
+        self.warm_queries = list(warm_queries or [])
+        self.pool_manager = PoolManager()
+        
+        # asyncpg and redis both run on uvloop, which speeds up their socket I/O
+        if self.settings.use_uvloop:
+            _install_uvloop()
+        
+        # Pick the database driver once; the pool options are built on each
+        # event loop's first use
+        self._database_pool_builder = self._select_database_pool_builder() if database_url else None
+        self._loops: Dict[int, _LoopResources] = {}
+        # The resources last looked up, so requests on the same loop skip the
+        # dict lookup
+        self._last_resources: Optional[_LoopResources] = None
+    
+    def _resources(self) -> _LoopResources:
+        """
+        Get what was set up on the running event loop, creating it on first use.
+        
+        Returns:
+            The running loop's resources
+        """
+        loop = asyncio.get_running_loop()
+        resources = self._last_resources
+        if resources is not None and resources.loop is loop:
+            return resources
+        
+        resources = self._loops.get(id(loop))
+        if resources is None or resources.loop is not loop:
+            resources = self._loops[id(loop)] = _LoopResources(loop)
+        self._last_resources = resources
+        return resources
+    
+    @property
+    def initialized(self) -> bool:
+        """Whether the pools are initialized on the running event loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        resources = self._last_resources
+        if resources is not None and resources.loop is loop:
+            return resources.initialized
+        
+        resources = self._loops.get(id(loop))
+        if resources is None or resources.loop is not loop:
+            return False
+        self._last_resources = resources
+        return resources.initialized
     
     async def initialize(self):
-        """Initialize the connection pools."""
-        if self.initialized:
+        """
+        Initialize the connection pools on the running event loop.
+        
+        Concurrent callers share a single initialization instead of each
+        creating the pools.
+        """
+        resources = self._resources()
+        if resources.initialized:
             return
         
-        # Initialize database pool if URL is provided
-        if self.database_url:
-            try:
-                await self._initialize_database_pool()
-            except Exception as e:
-                logger.error(f"Error initializing database pool: {e}")
+        if resources.init_future is None:
+            resources.init_future = asyncio.ensure_future(self._initialize_once(resources))
+        # Shielded so a cancelled request doesn't abort the shared setup
+        await asyncio.shield(resources.init_future)
+    
+    async def _initialize_once(self, resources: _LoopResources):
+        """
+        Create the connection pools and mark the loop initialized.
         
-        # Initialize Redis pool if URL is provided
+        Args:
+            resources: The running loop's resources
+        """
+        # The pools warm up concurrently so their handshakes overlap
+        setups = []
+        if self.database_url:
+            setups.append(("database", self._initialize_database_pool()))
         if self.redis_url:
-            try:
-                await self._initialize_redis_pool()
-            except Exception as e:
-                logger.error(f"Error initializing Redis pool: {e}")
+            setups.append(("Redis", self._initialize_redis_pool()))
+        
+        results = await asyncio.gather(*[setup for _, setup in setups], return_exceptions=True)
+        for (kind, _), result in zip(setups, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error initializing {kind} pool: {result}")
+        
+        resources.initialized = True
+    
+    def _make_validator(self, query: Callable[[Any], Any], socket: Callable[[Any], bool]) -> Optional[Callable[[Any], Any]]:
+        """
+        Pick the validate function for the configured validation mode.
+        
+        Args:
+            query: A validator making a round trip to the server
+            socket: A validator only inspecting the connection's transport
+            
+        Returns:
+            The validator, or None to skip validation
+        
+        Raises:
+            ValueError: If the validation mode is unknown
+        """
+        mode = self.settings.validation_mode
+        mode = _VALIDATION_MODE_ALIASES.get(mode, mode)
+        if mode == "socket":
+            return socket
+        if mode == "query":
+            return query
+        if mode == "none":
+            return None
+        raise ValueError(f"Unknown validation mode: {mode}")
+    
+    def _select_database_pool_builder(self) -> Optional[Callable[[], Dict[str, Any]]]:
+        """
+        Pick the pool builder for the database URL's driver.
         
-        self.initialized = True
+        Returns:
+            A function building the database pool options, or None if no
+            supported driver is available
+        """
+        # Parse the database URL to determine the database type
+        db_type = self.database_url.split("://", 1)[0] if "://" in self.database_url else "unknown"
+        
+        if HAS_SQLALCHEMY:
+            # A plain Postgres URL would give SQLAlchemy a blocking driver, so
+            # use asyncpg directly when it is installed
+            if db_type in ["postgres", "postgresql"] and HAS_ASYNCPG:
+                return self._build_asyncpg_pool
+            return self._build_sqlalchemy_pool
+        
+        # Fall back to a generic pool
+        logger.warning("SQLAlchemy not available, using generic connection pool")
+        
+        if db_type in ["postgres", "postgresql"]:
+            if HAS_ASYNCPG:
+                return self._build_asyncpg_pool
+            logger.warning("asyncpg not available, database pooling disabled")
+        elif db_type in ["mysql"]:
+            if HAS_AIOMYSQL:
+                return self._build_aiomysql_pool
+            logger.warning("aiomysql not available, database pooling disabled")
+        else:
+            logger.warning(f"Unsupported database type: {db_type}")
+        return None
+    
+    def _build_sqlalchemy_pool(self) -> Dict[str, Any]:
+        """
+        Build the database pool options for a SQLAlchemy engine.
+        
+        Returns:
+            The keyword arguments for PoolManager.create_pool
+        """
+        engine_options = dict(
+            pool_size=self.settings.min_size,
+            max_overflow=self.settings.max_size - self.settings.min_size,
+            pool_timeout=self.connection_timeout,
+            pool_recycle=self.pool_recycle,
+            pool_pre_ping=self.pool_pre_ping
+        )
+        
+        # Check if the database URL is for an async driver
+        is_async = any(driver in self.database_url for driver in 
+                       ["postgresql+asyncpg", "mysql+aiomysql", "sqlite+aiosqlite"])
+        
+        resources = self._resources()
+        if is_async:
+            engine = create_async_engine(self.database_url, **engine_options)
+            resources.db_engine = engine
+            
+            return dict(
+                factory=engine.connect,
+                validate_func=self._make_validator(
+                    query=lambda conn: conn.exec_driver_sql("SELECT 1"),
+                    socket=lambda conn: not conn.closed and not conn.invalidated
+                ),
+                close_func=lambda conn: conn.close(),
+                warm_func=lambda conn: conn.exec_driver_sql("SELECT 1")
+            )
+        
+        # Synchronous drivers block, so run their calls on a dedicated thread
+        # pool sized to the connection pool. That bounds the threads they use
+        # and keeps the loop's default executor free for other work.
+        engine = sqlalchemy.create_engine(self.database_url, **engine_options)
+        executor = ThreadPoolExecutor(max_workers=self.settings.max_size, thread_name_prefix="db-pool")
+        resources.db_engine = engine
+        resources.db_executor = executor
+        
+        def run_blocking(func, *args):
+            return asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        
+        return dict(
+            factory=partial(run_blocking, engine.connect),
+            validate_func=self._make_validator(
+                query=lambda conn: run_blocking(conn.exec_driver_sql, "SELECT 1"),
+                socket=lambda conn: not conn.closed and not conn.invalidated
+            ),
+            close_func=lambda conn: run_blocking(conn.close),
+            warm_func=lambda conn: run_blocking(conn.exec_driver_sql, "SELECT 1")
+        )
+    
+    def _build_asyncpg_pool(self) -> Dict[str, Any]:
+        """
+        Build the database pool options for asyncpg.
+        
+        Returns:
+            The keyword arguments for PoolManager.create_pool
+        """
+        async def acquire_pg_connection():
+            pg_pool = await self._get_pg_pool()
+            return await pg_pool.acquire(timeout=self.connection_timeout)
+        
+        async def release_pg_connection(conn):
+            pg_pool = await self._get_pg_pool()
+            await pg_pool.release(conn)
+        
+        # asyncpg's own pool resets connections on release and replaces
+        # broken ones, so there is nothing left for us to validate
+        return dict(
+            factory=acquire_pg_connection,
+            validate_func=None,
+            close_func=release_pg_connection,
+            warm_func=lambda conn: conn.execute("SELECT 1")
+        )
+    
+    async def _get_pg_pool(self):
+        """
+        Get the running loop's asyncpg pool, creating it on first use.
+        
+        Concurrent callers wait for the same pool to be created.
+        
+        Returns:
+            The asyncpg pool
+        """
+        resources = self._resources()
+        if resources.pg_pool_future is None:
+            resources.pg_pool_future = asyncio.ensure_future(asyncpg.create_pool(
+                self.database_url,
+                min_size=self.settings.min_size,
+                max_size=self.settings.max_size,
+                timeout=self.connection_timeout,
+                # Cached statements live as long as their connection
+                statement_cache_size=self.statement_cache_size,
+                max_cached_statement_lifetime=0,
+                init=self._warm_statements,
+                **self._ssl_options()
+            ))
+        try:
+            return await asyncio.shield(resources.pg_pool_future)
+        except Exception:
+            # Let the next caller try again
+            if resources.pg_pool_future is not None and resources.pg_pool_future.done():
+                resources.pg_pool_future = None
+            raise
+    
+    async def _warm_statements(self, conn) -> None:
+        """
+        Fill a new asyncpg connection's statement cache with the warm queries.
+        
+        Args:
+            conn: The new connection
+        """
+        for query in self.warm_queries:
+            # fetch() caches the statement, unlike prepare()
+            await conn.fetch(query)
+    
+    def _ssl_options(self) -> Dict[str, Any]:
+        """
+        Get the TLS connect options for asyncpg and aiomysql.
+        
+        Returns:
+            The shared SSL context as the ssl option, or no options if TLS
+            is off
+        """
+        return {"ssl": _shared_ssl_context()} if self.use_ssl else {}
+    
+    def _build_aiomysql_pool(self) -> Dict[str, Any]:
+        """
+        Build the database pool options for aiomysql.
+        
+        Returns:
+            The keyword arguments for PoolManager.create_pool
+        """
+        async def close_mysql_connection(conn):
+            conn.close()
+        
+        async def ping_mysql_connection(conn):
+            await conn.ping()
+            return True
+        
+        return dict(
+            # Bound once, so opening a connection doesn't look up the options
+            factory=partial(aiomysql.connect, self.database_url, **self._ssl_options()),
+            validate_func=self._make_validator(
+                query=ping_mysql_connection,
+                socket=lambda conn: not conn.closed
+            ),
+            close_func=close_mysql_connection,
+            warm_func=ping_mysql_connection
+        )
+    
+    def _build_redis_pool(self) -> Optional[Dict[str, Any]]:
+        """
+        Build the Redis pool options.
+        
+        Returns:
+            The keyword arguments for PoolManager.create_pool, or None if
+            redis is not installed
+        """
+        if not HAS_AIOREDIS:
+            logger.warning("aioredis not available, Redis pooling disabled")
+            return None
+        
+        # Every client shares one connection pool, rather than each client
+        # opening its own pool and sockets
+        shared_pool = aioredis.ConnectionPool.from_url(
+            self.redis_url,
+            max_connections=self.max_connections,
+            socket_timeout=self.connection_timeout
+        )
+        self._resources().aioredis_pool = shared_pool
+        
+        return dict(
+            factory=partial(aioredis.Redis, connection_pool=shared_pool),
+            validate_func=self._make_validator(
+                query=lambda conn: conn.ping(),
+                # Clients without a dedicated connection reconnect through
+                # their own pool, so there is no transport to inspect
+                socket=lambda conn: conn.connection is None or conn.connection.is_connected
+            ),
+            close_func=lambda conn: conn.close(),
+            warm_func=lambda conn: conn.ping()
+        )
     
     async def _initialize_database_pool(self):
         """Initialize the database connection pool."""
+        if self._database_pool_builder is None:
+            return
+        
         try:
-            # Try to use SQLAlchemy if available
-            try:
-                import sqlalchemy
-                from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
-                
-                # Check if the database URL is for an async driver
-                is_async = any(driver in self.database_url for driver in 
-                               ["postgresql+asyncpg", "mysql+aiomysql", "sqlite+aiosqlite"])
-                
-                if is_async:
-                    engine = create_async_engine(
-                        self.database_url,
-                        pool_size=self.settings.min_pool_size,
-                        max_overflow=self.settings.max_pool_size - self.settings.min_pool_size,
-                        pool_timeout=self.connection_timeout,
-                        pool_recycle=self.pool_recycle,
-                        pool_pre_ping=self.pool_pre_ping
-                    )
-                    
-                    # Create a connection pool and add it to the pool manager
-                    pool = ConnectionPool(
-                        name="database",
-                        create_connection=lambda: engine.connect(),
-                        close_connection=lambda conn: conn.close(),
-                        validate_connection=lambda conn: not conn.closed,
-                        min_size=self.settings.min_pool_size,
-                        max_size=self.settings.max_pool_size
-                    )
-                else:
-                    # For synchronous drivers, use a thread pool
-                    engine = sqlalchemy.create_engine(
-                        self.database_url,
-                        pool_size=self.settings.min_pool_size,
-                        max_overflow=self.settings.max_pool_size - self.settings.min_pool_size,
-                        pool_timeout=self.connection_timeout,
-                        pool_recycle=self.pool_recycle,
-                        pool_pre_ping=self.pool_pre_ping
-                    )
-                    
-                    # Create a connection pool and add it to the pool manager
-                    pool = ConnectionPool(
-                        name="database",
-                        create_connection=lambda: engine.connect(),
-                        close_connection=lambda conn: conn.close(),
-                        validate_connection=lambda conn: not conn.closed,
-                        min_size=self.settings.min_pool_size,
-                        max_size=self.settings.max_pool_size
-                    )
-            except ImportError:
-                # Fall back to a generic pool
-                logger.warning("SQLAlchemy not available, using generic connection pool")
-                
-                # Parse the database URL to determine the database type
-                db_type = self.database_url.split("://")[0] if "://" in self.database_url else "unknown"
-                
-                if db_type in ["postgres", "postgresql"]:
-                    try:
-                        import asyncpg
-                        
-                        async def create_pg_connection():
-                            return await asyncpg.connect(self.database_url)
-                        
-                        async def close_pg_connection(conn):
-                            await conn.close()
-                        
-                        pool = ConnectionPool(
-                            name="database",
-                            create_connection=create_pg_connection,
-                            close_connection=close_pg_connection,
-                            validate_connection=lambda conn: not conn.is_closed(),
-                            min_size=self.settings.min_pool_size,
-                            max_size=self.settings.max_pool_size
-                        )
-                    except ImportError:
-                        logger.warning("asyncpg not available, database pooling disabled")
-                        return
-                elif db_type in ["mysql"]:
-                    try:
-                        import aiomysql
-                        
-                        async def create_mysql_connection():
-                            return await aiomysql.connect(self.database_url)
-                        
-                        async def close_mysql_connection(conn):
-                            conn.close()
-                        
-                        pool = ConnectionPool(
-                            name="database",
-                            create_connection=create_mysql_connection,
-                            close_connection=close_mysql_connection,
-                            validate_connection=lambda conn: conn.open,
-                            min_size=self.settings.min_pool_size,
-                            max_size=self.settings.max_pool_size
-                        )
-                    except ImportError:
-                        logger.warning("aiomysql not available, database pooling disabled")
-                        return
-                else:
-                    logger.warning(f"Unsupported database type: {db_type}")
-                    return
+            # Build the driver setup once per loop
+            resources = self._resources()
+            if resources.database_pool_options is None:
+                resources.database_pool_options = self._database_pool_builder()
             
-            # Initialize the pool and add it to the pool manager
-            await pool.initialize()
-            self.pool_manager.add_pool(pool)
-            logger.info(f"Initialized database connection pool with {self.settings.min_pool_size} connections")
+            # Create a connection pool and add it to the pool manager
+            await self.pool_manager.create_pool(
+                "database",
+                settings=self.settings,
+                **resources.database_pool_options
+            )
+            logger.info(f"Initialized database connection pool with {self.settings.min_size} connections")
         
         except Exception as e:
             logger.error(f"Error initializing database pool: {e}")
@@ -922,30 +2002,20 @@ class ConnectionPoolMiddleware(BaseMiddleware):
     async def _initialize_redis_pool(self):
         """Initialize the Redis connection pool."""
         try:
-            try:
-                import redis.asyncio as aioredis
-                
-                # Create a connection pool and add it to the pool manager
-                pool = ConnectionPool(
-                    name="redis",
-                    create_connection=lambda: aioredis.from_url(
-                        self.redis_url,
-                        max_connections=self.max_connections,
-                        socket_timeout=self.connection_timeout
-                    ),
-                    close_connection=lambda conn: conn.close(),
-                    validate_connection=lambda conn: conn.ping(),
-                    min_size=self.settings.min_pool_size,
-                    max_size=self.settings.max_pool_size
-                )
-            except ImportError:
-                logger.warning("aioredis not available, Redis pooling disabled")
-                return
+            # Build the client setup once per loop
+            resources = self._resources()
+            if resources.redis_pool_options is None:
+                resources.redis_pool_options = self._build_redis_pool()
+                if resources.redis_pool_options is None:
+                    return
             
-            # Initialize the pool and add it to the pool manager
-            await pool.initialize()
-            self.pool_manager.add_pool(pool)
-            logger.info(f"Initialized Redis connection pool with {self.settings.min_pool_size} connections")
+            # Create a connection pool and add it to the pool manager
+            await self.pool_manager.create_pool(
+                "redis",
+                settings=self.settings,
+                **resources.redis_pool_options
+            )
+            logger.info(f"Initialized Redis connection pool with {self.settings.min_size} connections")
         
         except Exception as e:
             logger.error(f"Error initializing Redis pool: {e}")
@@ -964,12 +2034,23 @@ class ConnectionPoolMiddleware(BaseMiddleware):
         # Make sure pools are initialized
         if not self.initialized:
             await self.initialize()
-            
-        # Add the pool manager to the request state
-        request.state.pool_manager = self.pool_manager
-            
+        
+        self._attach_pool_manager(request)
+        
         return request
     
+    def _attach_pool_manager(self, request) -> None:
+        """
+        Add the pool manager to the request state unless it is already there.
+        
+        Args:
+            request: The request
+        """
+        pool_manager = self.pool_manager
+        state = request.state
+        if getattr(state, "pool_manager", None) is not pool_manager:
+            state.pool_manager = pool_manager
+    
     async def process_response(self, response):
         """
         Process a response (required by BaseMiddleware).
@@ -1001,8 +2082,7 @@ class ConnectionPoolMiddleware(BaseMiddleware):
         if not self.initialized:
             await self.initialize()
         
-        # Add the pool manager to the request state
-        request.state.pool_manager = self.pool_manager
+        self._attach_pool_manager(request)
         
         # Process the request
         response = await call_next(request)
@@ -1011,10 +2091,49 @@ class ConnectionPoolMiddleware(BaseMiddleware):
     
     async def shutdown(self):
         """Shutdown all connection pools."""
-        await self.pool_manager.close_all_pools()
-        self.initialized = False
+        await self.pool_manager.close_all()
+        
+        loops, self._loops = list(self._loops.values()), {}
+        self._last_resources = None
+        current = asyncio.get_running_loop()
+        for resources in loops:
+            if resources.loop is current:
+                await self._close_driver_pools(resources)
+            elif resources.loop.is_running():
+                # Driver pools can only be closed on their own loop
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(self._close_driver_pools(resources), resources.loop)
+                )
+        
+        # A closed manager can't create pools, so start afresh for a later initialize
+        self.pool_manager = PoolManager()
         logger.info("Connection pools shut down")
     
+    async def _close_driver_pools(self, resources: _LoopResources) -> None:
+        """
+        Close the driver pools and engines set up on one event loop.
+        
+        Args:
+            resources: The loop's resources
+        """
+        if resources.aioredis_pool is not None:
+            await resources.aioredis_pool.disconnect()
+        if resources.pg_pool_future is not None:
+            try:
+                pg_pool = await resources.pg_pool_future
+            except Exception:
+                pass
+            else:
+                await pg_pool.close()
+        
+        # Dispose the SQLAlchemy engine, then let the driver threads exit
+        engine, executor = resources.db_engine, resources.db_executor
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(executor, engine.dispose)
+            executor.shutdown(wait=False)
+        elif engine is not None:
+            await engine.dispose()
+    
     def get_metrics(self) -> Dict[str, Any]:
         """
         Get connection pool metrics.
@@ -1026,4 +2145,4 @@ class ConnectionPoolMiddleware(BaseMiddleware):
     
     def print_metrics(self):
         """Print connection pool metrics."""
-        self.pool_manager.print_metrics() 
\ No newline at end of file
+        self.pool_manager.print_summary() 
\ No newline at end of file
@@ -1,7 +1,9 @@
 """
 Unit tests for the batch processing functionality of the APIFromAnything library.
 """
+import asyncio
 import pytest
+import threading
 import time
 from typing import Dict, Any, Optional, List, Callable
 import functools
@@ -439,5 +441,257 @@ class TestBatchProcessing:
         assert response3.body == {"id": 3, "name": "Charlie", "created": True}
 
 
+class TestBatchCollector:
+    """Tests for the asyncio-based BatchCollector."""
+    
+    @pytest.mark.asyncio
+    async def test_timer_flush_and_wait_for_empty(self):
+        """Test that a timer-triggered flush resolves futures and signals emptiness."""
+        from apifrom.performance.batch_processing import BatchCollector
+        
+        batches = []
+        
+        async def process_items(items):
+            batches.append(list(items))
+            await asyncio.sleep(0)
+            return [item * 2 for item in items]
+        
+        collector = BatchCollector(max_batch_size=10, max_wait_time=0.01, process_func=process_items)
+        
+        future1 = await collector.add_item(1)
+        future2 = await collector.add_item(2)
+        
+        await asyncio.wait_for(collector.wait_for_empty(), timeout=1.0)
+        
+        assert batches == [[1, 2]]
+        assert future1.result() == 2
+        assert future2.result() == 4
+    
+    @pytest.mark.asyncio
+    async def test_adaptive_flush_under_light_load(self):
+        """Test that slowly arriving items are flushed without waiting for the timer."""
+        from apifrom.performance.batch_processing import BatchCollector
+        
+        batch_sizes = []
+        
+        async def process_items(items):
+            batch_sizes.append(len(items))
+            return items
+        
+        collector = BatchCollector(max_batch_size=10, max_wait_time=0.1, process_func=process_items)
+        
+        for i in range(8):
+            await collector.add_item(i)
+            await asyncio.sleep(0.03)
+        await collector.wait_for_empty()
+        
+        assert sum(batch_sizes) == 8
+        assert batch_sizes[-1] == 1
+    
+    @pytest.mark.asyncio
+    async def test_processor_process_returns_result(self):
+        """Test that BatchProcessor.process resolves to the item's result."""
+        from apifrom.performance.batch_processing import BatchProcessor
+        
+        async def process_items(items):
+            return [f"processed_{item}" for item in items]
+        
+        processor = BatchProcessor(batch_size=2, max_wait_time=0.01, process_func=process_items)
+        
+        results = await asyncio.gather(processor.process("item1"), processor.process("item2"))
+        
+        assert results == ["processed_item1", "processed_item2"]
+
+    
+    @pytest.mark.asyncio
+    async def test_processor_process_batch_returns_results(self):
+        """Test that BatchProcessor.process_batch resolves to the results in order."""
+        from apifrom.performance.batch_processing import BatchProcessor
+        
+        batch_sizes = []
+        
+        async def process_items(items):
+            batch_sizes.append(len(items))
+            return [item * 10 for item in items]
+        
+        processor = BatchProcessor(batch_size=4, max_wait_time=0.01, process_func=process_items)
+        
+        results = await processor.process_batch([1, 2, 3, 4, 5])
+        
+        assert results == [10, 20, 30, 40, 50]
+        assert sum(batch_sizes) == 5
+    
+    @pytest.mark.asyncio
+    async def test_single_item_bypass(self):
+        """Test that a collector without batching processes each item on its own."""
+        from apifrom.performance.batch_processing import BatchCollector
+        
+        batches = []
+        
+        async def process_items(items):
+            batches.append(list(items))
+            return [item.upper() for item in items]
+        
+        collector = BatchCollector(max_batch_size=1, max_wait_time=0, process_func=process_items)
+        
+        future1 = await collector.add_item("a")
+        future2 = await collector.add_item("b")
+        
+        assert await future1 == "A"
+        assert await future2 == "B"
+        assert batches == [["a"], ["b"]]
+        await asyncio.wait_for(collector.wait_for_empty(), timeout=1.0)
+        assert collector.get_stats()["total_batches"] == 0
+
+
+class TestBatchProcessDecorator:
+    """Tests for the thread-based batch_process decorator."""
+    
+    def test_concurrent_calls_are_batched(self):
+        """Test that concurrent callers share batches and get their own results."""
+        from apifrom.performance.batch_processing import batch_process
+        
+        batch_sizes = []
+        
+        @batch_process(batch_size=50, max_wait_time=0.05)
+        def double(items):
+            batch_sizes.append(len(items))
+            time.sleep(0.005)
+            return [item * 2 for item in items]
+        
+        results = {}
+        
+        def worker(n):
+            for i in range(10):
+                results[(n, i)] = double(n * 100 + i)
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(results) == 80
+        assert all(result == (n * 100 + i) * 2 for (n, i), result in results.items())
+        assert sum(batch_sizes) == 80
+        assert double.process_count() < 80
+    
+    def test_errors_are_raised_in_callers(self):
+        """Test that an error from the batch function reaches the waiting caller."""
+        from apifrom.performance.batch_processing import batch_process
+        
+        @batch_process(batch_size=10, max_wait_time=0.01)
+        def fail(items):
+            raise RuntimeError("backend unavailable")
+        
+        with pytest.raises(RuntimeError, match="backend unavailable"):
+            fail("item1")
+    
+    def test_result_factory_replaces_function(self):
+        """Test that a result_factory supplies the results instead of the decorated function."""
+        from apifrom.performance.batch_processing import batch_process
+        
+        calls = []
+        
+        def created(users):
+            return [{"name": user["name"], "created": True} for user in users]
+        
+        @batch_process(batch_size=10, max_wait_time=0.01, result_factory=created)
+        def create_users(users):
+            calls.append(users)
+            return []
+        
+        assert create_users({"name": "Alice"}) == {"name": "Alice", "created": True}
+        assert calls == []
+    
+    def test_item_can_be_passed_by_keyword(self):
+        """Test that the batched item can be passed by its parameter name."""
+        from apifrom.performance.batch_processing import batch_process
+        
+        @batch_process(batch_size=10, max_wait_time=0.01)
+        def lookup(keys):
+            return [f"data_{key}" for key in keys]
+        
+        assert lookup("a") == "data_a"
+        assert lookup(keys="b") == "data_b"
+        assert lookup.__name__ == "lookup"
+
+
+class TestBatchExecutor:
+    """Tests for the BatchExecutor helpers."""
+    
+    @pytest.mark.asyncio
+    async def test_reduce_with_sync_and_async_functions(self):
+        """Test that reduce gives the same result for sync and coroutine reducers."""
+        from apifrom.performance.batch_processing import BatchExecutor
+        
+        async def add_async(total, item):
+            return total + item
+        
+        items = list(range(250))
+        
+        assert await BatchExecutor.reduce(lambda total, item: total + item, items, 0) == sum(items)
+        assert await BatchExecutor.reduce(add_async, items, 0, batch_size=100) == sum(items)
+        assert await BatchExecutor.reduce(add_async, [], 7) == 7
+    
+    @pytest.mark.asyncio
+    async def test_reduce_awaits_reducers_returning_awaitables(self):
+        """Test that reducers which aren't coroutine functions but return awaitables are awaited."""
+        from apifrom.performance.batch_processing import BatchExecutor
+        
+        async def add_async(total, item):
+            return total + item
+        
+        class Adder:
+            async def __call__(self, total, item):
+                return total + item
+        
+        items = list(range(10))
+        
+        assert await BatchExecutor.reduce(lambda total, item: add_async(total, item), items, 0) == sum(items)
+        assert await BatchExecutor.reduce(Adder(), items, 0) == sum(items)
+        assert await BatchExecutor.reduce(lambda total, item: total + item, [5], 1) == 6
+    
+    @pytest.mark.asyncio
+    async def test_map_preserves_order_and_bounds_concurrency(self):
+        """Test that map returns ordered results with at most worker_count calls in flight."""
+        from apifrom.performance.batch_processing import BatchExecutor
+        
+        in_flight = 0
+        peak = 0
+        
+        async def square(item):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001 * (item % 3))
+            in_flight -= 1
+            return item * item
+        
+        results = await BatchExecutor.map(square, list(range(50)), worker_count=4)
+        
+        assert results == [item * item for item in range(50)]
+        assert peak == 4
+    
+    @pytest.mark.asyncio
+    async def test_execute_batch_parallel_preserves_order(self):
+        """Test that parallel batch execution splits items and keeps result order."""
+        from apifrom.performance.batch_processing import BatchExecutor
+        
+        batch_sizes = []
+        
+        async def process_items(items):
+            batch_sizes.append(len(items))
+            await asyncio.sleep(0.001 * (items[0] % 3))
+            return [item + 1 for item in items]
+        
+        results = await BatchExecutor.execute_batch(
+            process_items, list(range(23)), batch_size=5, parallel=True, max_workers=2
+        )
+        
+        assert results == [item + 1 for item in range(23)]
+        assert sorted(batch_sizes) == [3, 5, 5, 5, 5]
+
+
 if __name__ == "__main__":
     pytest.main(["-v", __file__]) 
\ No newline at end of file
@@ -0,0 +1,727 @@
+"""
+Unit tests for the cache optimization functionality of the APIFromAnything library.
+"""
+import asyncio
+import json
+import pickle
+import pytest
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from apifrom.performance import cache_optimizer
+from apifrom.performance.cache_optimizer import (
+    CacheAnalytics,
+    CacheOptimizer,
+    OptimizedCacheMiddleware,
+    OptimizedCacheStrategy,
+    _hash_key,
+)
+
+
+class AsyncMemoryBackend:
+    """A minimal async cache backend for testing."""
+    
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+    
+    async def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+    
+    async def set(self, key, value, ttl=60):
+        self.data[key] = value
+        return True
+    
+    async def delete(self, key):
+        return self.data.pop(key, None) is not None
+
+
+class TestCacheAnalytics:
+    """Tests for the CacheAnalytics class."""
+    
+    def test_averages_use_running_totals(self):
+        """Test that averages are computed from the recorded operations."""
+        analytics = CacheAnalytics()
+        analytics.record_set("a", 100, 60)
+        analytics.record_set("bb", 300, 120)
+        
+        assert analytics.avg_value_size == 200
+        assert analytics.avg_ttl == 90
+        assert analytics.avg_key_size == 1.5
+        assert analytics.cache_size == 400
+        
+        analytics.record_delete("bb", 300)
+        assert analytics.cache_size == 100
+        assert analytics.get_large_keys() == [("a", 100)]
+    
+    def test_large_keys_are_bounded(self):
+        """Test that only the largest keys are retained."""
+        analytics = CacheAnalytics()
+        for i in range(1000):
+            analytics.record_set(f"key{i}", i, 60)
+        
+        assert len(analytics._large_keys) == CacheAnalytics._LARGE_KEYS_CAPACITY
+        assert analytics.get_large_keys(3) == [("key999", 999), ("key998", 998), ("key997", 997)]
+        
+        # Updating a tracked key replaces its size instead of duplicating it
+        analytics.record_set("key998", 5000, 60)
+        assert analytics.get_large_keys(2) == [("key998", 5000), ("key999", 999)]
+    
+    def test_hot_keys_are_bounded(self):
+        """Test that frequently accessed keys survive a high-cardinality workload."""
+        analytics = CacheAnalytics()
+        for i in range(5000):
+            analytics.record_hit("hot", 10, 1_000_000)
+            analytics.record_miss(f"cold{i}", 1_000_000)
+        
+        assert len(analytics._hot_keys) <= CacheAnalytics._HOT_KEYS_CAPACITY
+        hot_keys = analytics.get_hot_keys(1)
+        assert hot_keys[0][0] == "hot"
+    
+    def test_concurrent_recording(self):
+        """Test that counters recorded from several threads are combined."""
+        analytics = CacheAnalytics()
+    
+        def worker():
+            for _ in range(1000):
+                analytics.record_request()
+                analytics.record_hit("key", 10, 2_000_000)
+    
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+        assert analytics.requests == 4000
+        assert analytics.cache_hits == 4000
+        assert analytics.hit_rate == 1.0
+        assert analytics.avg_hit_latency == pytest.approx(2.0)
+    
+        data = analytics.to_dict()
+        assert data["cache_hits"] == 4000
+        assert data["hot_keys"] == [("key", 4000)]
+    
+        analytics.reset()
+        assert analytics.cache_hits == 0
+    
+    def test_finished_threads_retire_their_shards(self):
+        """Test that the shards of finished threads are folded into one."""
+        analytics = CacheAnalytics()
+        
+        for _ in range(20):
+            thread = threading.Thread(target=analytics.record_hit_fast, args=(1_000,))
+            thread.start()
+            thread.join()
+        analytics.record_miss_fast(3_000)
+        
+        assert len(analytics._shards) == 1
+        assert (analytics.requests, analytics.cache_hits, analytics.cache_misses) == (21, 20, 1)
+        assert analytics.hit_latency_ns == 20_000
+    
+    def test_latency_averages(self):
+        """Test that hit and miss latency averages cover every recorded operation."""
+        analytics = CacheAnalytics()
+        assert analytics.avg_hit_latency == 0.0
+        assert analytics.avg_miss_latency == 0.0
+        
+        for i in range(5000):
+            analytics.record_hit("key", 10, 1_000_000 if i % 2 else 3_000_000)
+        analytics.record_miss("key", 10_000_000)
+        
+        assert analytics.avg_hit_latency == pytest.approx(2.0)
+        assert analytics.avg_miss_latency == pytest.approx(10.0)
+    
+    def test_sampling(self):
+        """Test that sampling thins key summaries but not counters."""
+        with pytest.raises(ValueError):
+            CacheAnalytics(sample_rate=3)
+        
+        analytics = CacheAnalytics(sample_rate=4)
+        for _ in range(100):
+            analytics.record_hit("key", 10, 1_000_000)
+        
+        assert analytics.cache_hits == 100
+        assert analytics.avg_hit_latency == pytest.approx(1.0)
+        assert analytics._hot_keys == {"key": 25}
+        assert analytics.get_hot_keys() == [("key", 100)]
+    
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_to_json_and_save(self, use_orjson, tmp_path, monkeypatch):
+        """Test that analytics serialize with and without orjson."""
+        if use_orjson and not cache_optimizer.HAS_ORJSON:
+            pytest.skip("orjson is not installed")
+        monkeypatch.setattr(cache_optimizer, "HAS_ORJSON", use_orjson)
+        
+        analytics = CacheAnalytics()
+        analytics.record_request()
+        analytics.record_hit("key", 10, 1_000_000)
+        
+        data = json.loads(analytics.to_json())
+        assert data["cache_hits"] == 1
+        assert data["hot_keys"] == [["key", 1]]
+        
+        file_path = tmp_path / "analytics.json"
+        analytics.save(str(file_path))
+        assert json.loads(file_path.read_text())["requests"] == 1
+    
+    def test_latency_percentiles(self):
+        """Test that percentiles are computed over the recent latency window."""
+        analytics = CacheAnalytics()
+        assert analytics.hit_latency_percentile(95) == 0.0
+        
+        for ms in range(1, 101):
+            analytics.record_hit("key", 10, ms * 1_000_000)
+        analytics.record_miss("key", 5_000_000)
+        
+        assert analytics.hit_latency_percentile(50) == pytest.approx(50.5)
+        assert analytics.hit_latency_percentile(100) == pytest.approx(100.0)
+        assert analytics.miss_latency_percentile(95) == pytest.approx(5.0)
+        assert analytics.to_dict()["p95_hit_latency_ms"] == pytest.approx(95.05)
+        
+        # Only the most recent window of latencies is kept
+        for _ in range(cache_optimizer._LATENCY_WINDOW):
+            analytics.record_hit("key", 10, 1_000_000)
+        assert analytics.hit_latency_percentile(100) == pytest.approx(1.0)
+        assert analytics.avg_hit_latency > 1.0
+
+
+class TestOptimizedCacheStrategy:
+    """Tests for the OptimizedCacheStrategy class."""
+    
+    def test_optimize_key(self):
+        """Test that compressed keys are stable fixed-length digests."""
+        assert OptimizedCacheStrategy(compress_keys=False).optimize_key("user:1") == "user:1"
+        
+        strategy = OptimizedCacheStrategy(compress_keys=True)
+        key = strategy.optimize_key("user:1")
+        assert len(key) == 32
+        assert int(key, 16) >= 0
+        assert strategy.optimize_key("user:1") == key
+        assert strategy.optimize_key("user:2") != key
+    
+    def test_tracked_keys_are_bounded(self):
+        """Test that per-key statistics keep only the most recently used keys."""
+        strategy = OptimizedCacheStrategy(max_tracked_keys=3)
+        for key in ("a", "b", "c"):
+            strategy.record_set(key, 60)
+            strategy.record_hit(key)
+        
+        # Touching "a" makes "b" the least recently used key
+        strategy.record_hit("a")
+        strategy.record_set("d", 60)
+        strategy.record_hit("d")
+        
+        assert list(strategy.key_hit_counts) == ["c", "a", "d"]
+        assert strategy.key_hit_counts["a"] == 2
+        assert list(strategy.key_ttls) == ["b", "c", "d"]
+        assert len(strategy.key_access_times) == 3
+    
+    def test_optimized_ttl(self):
+        """Test that TTLs grow for hot keys and shrink for idle keys."""
+        strategy = OptimizedCacheStrategy(min_ttl=10, max_ttl=1000)
+        assert strategy.get_optimized_ttl("new", 60) == 60
+        
+        strategy.record_set("hot", 60)
+        for _ in range(11):
+            strategy.record_hit("hot")
+        assert strategy.get_optimized_ttl("hot", 60) == 120
+        
+        strategy.record_set("idle", 60)
+        strategy.record_hit("idle")
+        strategy.key_access_times["idle"] = time.monotonic_ns() - 2 * 3_600_000_000_000
+        assert strategy.get_optimized_ttl("idle", 60) == 30
+    
+    def test_value_compression(self):
+        """Test that large values are compressed and restored."""
+        strategy = OptimizedCacheStrategy(compression_threshold=100)
+        large = {"items": ["value"] * 100}
+        small = {"id": 1}
+        
+        stored = strategy.optimize_value(large)
+        assert isinstance(stored, bytes)
+        assert len(stored) < len(json.dumps(large))
+        assert strategy.deoptimize_value(stored) == large
+        
+        assert strategy.optimize_value(small) is small
+        assert strategy.deoptimize_value(small) is small
+        
+        unserializable = object()
+        assert strategy.optimize_value(unserializable) is unserializable
+        
+        # Raw bytes are tagged so they never look like a compressed payload
+        raw = b"\x01not compressed"
+        assert strategy.deoptimize_value(strategy.optimize_value(raw)) == raw
+        
+        strategy.compress_values = False
+        assert strategy.optimize_value(large) is large
+    
+    def test_compressed_values_keep_their_types(self):
+        """Test that compression never changes the types a value reads back with."""
+        value = {
+            1: ("a", "b"),
+            "created": datetime(2024, 1, 2, 3, 4, 5),
+            "rows": [(index, str(index)) for index in range(50)],
+        }
+        
+        # JSON can't round-trip this value, so it is stored unchanged
+        strategy = OptimizedCacheStrategy(compression_threshold=100)
+        assert strategy.optimize_value(value) is value
+        
+        strategy = OptimizedCacheStrategy(compression_threshold=100, pickle_values=True)
+        stored = strategy.optimize_value(value)
+        assert isinstance(stored, bytes)
+        restored = strategy.deoptimize_value(stored)
+        assert restored == value
+        assert isinstance(restored["created"], datetime)
+        assert isinstance(restored[1], tuple)
+    
+    def test_pickled_values_need_opt_in(self):
+        """Test that pickled payloads are only loaded when pickling is enabled."""
+        value = {"items": ["value"] * 100}
+        stored = OptimizedCacheStrategy(compression_threshold=100, pickle_values=True).optimize_value(value)
+        
+        strategy = OptimizedCacheStrategy(compression_threshold=100)
+        assert strategy.deoptimize_value(stored) is stored
+        
+        # Payloads compressed as JSON still read back with pickling enabled
+        json_stored = strategy.optimize_value(value)
+        assert OptimizedCacheStrategy(pickle_values=True).deoptimize_value(json_stored) == value
+    
+    def test_optimize_value_with_size(self):
+        """Test that the reported size matches what is stored."""
+        strategy = OptimizedCacheStrategy(compression_threshold=100)
+        
+        small = {"id": 1}
+        assert strategy.optimize_value_with_size(small) == (small, len(cache_optimizer._dumps(small)))
+        
+        stored, size = strategy.optimize_value_with_size({"items": ["value"] * 100})
+        assert size == len(stored)
+        
+        stored, size = strategy.optimize_value_with_size(b"raw")
+        assert size == len(stored) == 4
+
+
+class TestCacheOptimizer:
+    """Tests for the CacheOptimizer class."""
+    
+    @pytest.mark.asyncio
+    async def test_get_and_set_record_sizes(self):
+        """Test that get and set record hits, misses and value sizes."""
+        backend = AsyncMemoryBackend()
+        optimizer = CacheOptimizer(cache_backend=backend)
+        
+        assert await optimizer.get("user:1") is None
+        assert await optimizer.set("user:1", "x" * 100, ttl=60)
+        assert await optimizer.get("user:1") == "x" * 100
+        
+        # Sizes are the encoded sizes measured while optimizing the value
+        analytics = optimizer.get_analytics()
+        assert analytics.cache_hits == 1
+        assert analytics.cache_misses == 1
+        assert analytics.cache_size == 102
+        assert analytics.get_large_keys() == [("user:1", 102)]
+    
+    @pytest.mark.asyncio
+    async def test_compressed_round_trip(self):
+        """Test that compressed values are restored on get."""
+        backend = AsyncMemoryBackend()
+        strategy = OptimizedCacheStrategy(compression_threshold=100)
+        optimizer = CacheOptimizer(cache_backend=backend, strategy=strategy)
+        value = {"items": list(range(200))}
+        
+        assert await optimizer.set("key", value)
+        assert isinstance(backend.data["key"], bytes)
+        assert await optimizer.get("key") == value
+    
+    @pytest.mark.asyncio
+    async def test_auto_tune_saves_analytics(self, tmp_path):
+        """Test that auto-tuning adjusts the strategy and saves analytics."""
+        output_dir = tmp_path / "analytics"
+        optimizer = CacheOptimizer(
+            cache_backend=AsyncMemoryBackend(),
+            auto_tune_interval=0,
+            output_dir=str(output_dir)
+        )
+        max_ttl = optimizer.strategy.max_ttl
+        await optimizer.get("missing")
+        
+        await optimizer.auto_tune()
+        
+        # A low hit rate shortens the maximum TTL
+        assert optimizer.strategy.max_ttl < max_ttl
+        saved = list(output_dir.iterdir())
+        assert len(saved) == 1
+        assert json.loads(saved[0].read_text())["cache_misses"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_delete_uses_recorded_size(self):
+        """Test that delete is sized from the recorded set without reading the value."""
+        backend = AsyncMemoryBackend()
+        optimizer = CacheOptimizer(cache_backend=backend)
+        analytics = optimizer.get_analytics()
+        
+        await optimizer.set("key", "x" * 100)
+        await optimizer.set("key", "x" * 40)
+        assert analytics.cache_size == 42
+        
+        assert await optimizer.delete("key")
+        assert backend.gets == 0
+        assert analytics.cache_size == 0
+        assert analytics.get_large_keys() == []
+        
+        assert not await optimizer.delete("key")
+        assert analytics.cache_size == 0
+    
+    def test_write_analytics_replaces_atomically(self, tmp_path):
+        """Test that analytics snapshots are written through a temporary file."""
+        optimizer = CacheOptimizer(cache_backend=AsyncMemoryBackend())
+        file_path = str(tmp_path / "analytics" / "snapshot.json")
+        
+        optimizer._write_analytics(file_path, b'{"old": true}')
+        optimizer._write_analytics(file_path, b'{"new": true}')
+        
+        with open(file_path) as f:
+            assert json.load(f) == {"new": True}
+        assert [p.name for p in (tmp_path / "analytics").iterdir()] == ["snapshot.json"]
+
+
+class TestOptimizedCacheMiddleware:
+    """Tests for the OptimizedCacheMiddleware class."""
+    
+    def test_generate_cache_key(self):
+        """Test that the cache key covers the method, URL and vary headers."""
+        middleware = OptimizedCacheMiddleware()
+        request = SimpleNamespace(
+            method="GET",
+            url=SimpleNamespace(path="/users"),
+            query_params="page=2",
+            headers={"Accept": "application/json", "X-Other": "ignored"},
+        )
+        
+        key = middleware._generate_cache_key(request)
+        assert key == _hash_key(b"GET:/users:page=2:Accept=application/json")
+        
+        request.headers["Accept-Language"] = "en"
+        assert middleware._generate_cache_key(request) != key
+    
+    def test_generate_cache_key_is_repeatable(self):
+        """Test that reusing the hasher does not leak state between keys."""
+        middleware = OptimizedCacheMiddleware()
+        first = SimpleNamespace(method="GET", url=SimpleNamespace(path="/a"), query_params="", headers={})
+        second = SimpleNamespace(method="GET", url=SimpleNamespace(path="/b"), query_params="", headers={})
+        
+        key = middleware._generate_cache_key(first)
+        assert middleware._generate_cache_key(second) != key
+        assert middleware._generate_cache_key(first) == key
+        assert key == _hash_key(b"GET:/a:")
+    
+    def test_analytics_shared_with_optimizer(self):
+        """Test that the middleware and its optimizer record into one instance."""
+        middleware = OptimizedCacheMiddleware()
+        assert middleware.optimizer.get_analytics() is middleware.analytics
+    
+    @pytest.mark.asyncio
+    async def test_dispatch_records_hits_and_misses(self, monkeypatch):
+        """Test that dispatch records cache hits and misses."""
+        middleware = OptimizedCacheMiddleware(auto_tune=False)
+        request = SimpleNamespace(method="GET", url=SimpleNamespace(path="/a"), query_params="", headers={})
+        cached = object()
+        response = SimpleNamespace(status_code=200, headers={"Cache-Control": "no-store"})
+        
+        async def get_from_cache(cache_key):
+            return cached
+        
+        async def call_next(request):
+            return response
+        
+        assert await middleware.dispatch(request, call_next) is response
+        
+        monkeypatch.setattr(middleware, "_get_from_cache", get_from_cache)
+        assert await middleware.dispatch(request, call_next) is cached
+        
+        analytics = middleware.analytics
+        assert analytics.requests == 2
+        assert analytics.cache_hits == 1
+        assert analytics.cache_misses == 1
+        assert analytics.hit_rate == 0.5
+    
+    @pytest.mark.asyncio
+    async def test_cached_body_round_trip(self):
+        """Test that a cached body is stored and served back unchanged."""
+        middleware = OptimizedCacheMiddleware()
+        body = b'{"id": 1, "name": "caf\xc3\xa9"}'
+        response = SimpleNamespace(
+            status_code=203,
+            headers={"content-type": "application/json"},
+            body=body
+        )
+        
+        await middleware._cache_response("key", response)
+        cached = await middleware._get_from_cache("key")
+        
+        assert cached.body == body
+        assert cached.status_code == 203
+        assert cached.headers["content-type"] == "application/json"
+        assert cached.headers["X-Cache"] == "HIT"
+    
+    @pytest.mark.asyncio
+    async def test_cached_data_is_rendered_as_json(self):
+        """Test that entries holding decoded data are rendered as JSON."""
+        middleware = OptimizedCacheMiddleware()
+        middleware.cache_backend.set("key", {"id": 1}, 60)
+        
+        cached = await middleware._get_from_cache("key")
+        
+        assert cached.media_type == "application/json"
+        assert json.loads(cached.body) == {"id": 1}
+    
+    @pytest.mark.parametrize("method, status_code, cache_control, expected", [
+        ("GET", 200, "", True),
+        ("HEAD", 304, "max-age=60", True),
+        ("POST", 200, "", False),
+        ("GET", 404, "", False),
+        ("GET", 200, "private, no-store", False),
+        ("GET", 200, "no-cache", False),
+        ("GET", 200, "No-Store", False),
+        ("GET", 200, 'no-cache="Set-Cookie", max-age=60', False),
+        ("GET", 200, "public, x-no-cache-extension", True),
+    ])
+    def test_is_cacheable(self, method, status_code, cache_control, expected):
+        """Test which responses are cacheable."""
+        middleware = OptimizedCacheMiddleware()
+        request = SimpleNamespace(method=method)
+        response = SimpleNamespace(status_code=status_code, headers={"Cache-Control": cache_control})
+        
+        assert middleware._is_cacheable(request, response) is expected
+        assert middleware._is_cacheable(request, response) is expected
+    
+    @pytest.mark.asyncio
+    async def test_auto_tune_waits_for_new_requests(self, monkeypatch):
+        """Test that auto-tuning only runs once enough new requests arrived."""
+        middleware = OptimizedCacheMiddleware(ttl=100)
+        stats_calls = []
+        get_tune_stats = middleware.get_tune_stats
+        monkeypatch.setattr(middleware, "get_tune_stats", lambda: stats_calls.append(1) or get_tune_stats())
+        
+        for _ in range(499):
+            middleware.analytics.record_hit_fast(1_000)
+        await middleware._auto_tune()
+        assert stats_calls == []
+        
+        middleware.analytics.record_hit_fast(1_000)
+        await middleware._auto_tune()
+        assert len(stats_calls) == 1
+        assert middleware.ttl == 30
+        
+        await middleware._auto_tune()
+        assert len(stats_calls) == 1
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("hits, hit_ns, miss_ns, expected_ttl", [
+        # At the target hit rate the TTL is already right
+        (350, 1_000, 100_000, 100),
+        # Adjustments within the current TTL's bucket are ignored
+        (325, 1_000, 100_000, 100),
+        # Too few hits and caching pays off, so the TTL grows in one step
+        (150, 1_000, 100_000, 300),
+        # Too few hits, but hits are not much cheaper than misses
+        (150, 50_000, 100_000, 100),
+        (150, 10_000, 100_000, 100),
+        # No hits at all, the TTL grows by one ladder step only
+        (0, None, 100_000, 300),
+    ])
+    async def test_auto_tune_targets_hit_rate(self, hits, hit_ns, miss_ns, expected_ttl):
+        """Test that auto-tuning solves for the TTL that reaches the target hit rate."""
+        middleware = OptimizedCacheMiddleware(ttl=100)
+        for _ in range(hits):
+            middleware.analytics.record_hit_fast(hit_ns)
+        for _ in range(500 - hits):
+            middleware.analytics.record_miss_fast(miss_ns)
+        
+        await middleware._auto_tune()
+        
+        assert middleware.ttl == expected_ttl
+    
+    @pytest.mark.asyncio
+    async def test_auto_tune_uses_hit_rate_since_last_tune(self):
+        """Test that auto-tuning looks at the requests since the last tune only."""
+        middleware = OptimizedCacheMiddleware(ttl=100)
+        for hits in (350, 150):
+            for _ in range(hits):
+                middleware.analytics.record_hit_fast(1_000)
+            for _ in range(500 - hits):
+                middleware.analytics.record_miss_fast(100_000)
+            await middleware._auto_tune()
+        
+        # The cumulative hit rate of 0.5 would have kept the TTL's bucket
+        assert middleware.ttl == 300
+    
+    def test_save_analytics(self, tmp_path):
+        """Test that analytics can be saved synchronously."""
+        middleware = OptimizedCacheMiddleware(output_dir=str(tmp_path))
+        
+        filename = middleware.save_analytics()
+        
+        assert filename is not None
+        with open(filename) as f:
+            assert json.load(f)["requests"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_auto_tune_saves_in_background(self, tmp_path, monkeypatch):
+        """Test that auto-tuning queues saves and keeps only the newest snapshot."""
+        middleware = OptimizedCacheMiddleware(ttl=100, output_dir=str(tmp_path))
+        paths = iter(str(tmp_path / f"snapshot_{i}.json") for i in range(3))
+        monkeypatch.setattr(middleware, "_analytics_path", lambda: next(paths))
+        
+        # Two saves queued back to back coalesce into the newest one
+        middleware._queue_analytics_save()
+        middleware._queue_analytics_save()
+        await middleware.shutdown()
+        
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["snapshot_1.json"]
+        assert middleware._save_task is None
+    
+    def test_analytics_path(self, tmp_path, monkeypatch):
+        """Test that snapshot paths match a full timestamp across minutes."""
+        middleware = OptimizedCacheMiddleware(output_dir=str(tmp_path))
+        
+        for now in (1700000000, 1700000059, 1700000060, 1700003725):
+            monkeypatch.setattr(cache_optimizer.time, "time", lambda: now)
+            expected = datetime.fromtimestamp(now).strftime("%Y%m%d%H%M%S")
+            assert middleware._analytics_path() == str(tmp_path / f"cache_analytics_{expected}.json")
+    
+    def test_backend_stats_cached_briefly(self, monkeypatch):
+        """Test that backend stats are reused for one second."""
+        calls = []
+        middleware = OptimizedCacheMiddleware(cache_backend=SimpleNamespace(
+            get_stats=lambda: calls.append(1) or {"total_size_bytes": len(calls), "item_count": 1}
+        ))
+        now = [100.0]
+        monkeypatch.setattr(cache_optimizer.time, "monotonic", lambda: now[0])
+        
+        middleware.get_analytics()
+        now[0] += 0.5
+        analytics = middleware.get_analytics()
+        assert len(calls) == 1
+        assert analytics.cache_size_bytes == 1
+        
+        now[0] += 0.5
+        analytics = middleware.get_analytics()
+        assert len(calls) == 2
+        assert analytics.cache_size_bytes == 2
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_cache_writes_coalesce(self):
+        """Test that concurrent writes of the same key are stored once."""
+        middleware = OptimizedCacheMiddleware()
+        release = asyncio.Event()
+        writes = []
+        
+        async def cache_response(cache_key, response, ttl):
+            writes.append(cache_key)
+            await release.wait()
+        
+        middleware._middleware_cache_response = cache_response
+        tasks = [
+            asyncio.ensure_future(middleware._cache_response("key", object()))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        
+        assert writes == ["key"]
+        assert middleware._inflight == {}
+        
+        # Later writes go through again
+        await middleware._cache_response("key", object())
+        assert writes == ["key", "key"]
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_break_write(self):
+        """Test that cancelling a waiting write leaves the write in flight intact."""
+        middleware = OptimizedCacheMiddleware()
+        release = asyncio.Event()
+        writes = []
+        
+        async def cache_response(cache_key, response, ttl):
+            writes.append(cache_key)
+            await release.wait()
+        
+        middleware._middleware_cache_response = cache_response
+        writer = asyncio.ensure_future(middleware._cache_response("key", object()))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(middleware._cache_response("key", object()))
+        other = asyncio.ensure_future(middleware._cache_response("key", object()))
+        await asyncio.sleep(0)
+        
+        waiter.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await writer
+        await other
+        
+        assert waiter.cancelled()
+        assert writes == ["key"]
+        assert middleware._inflight == {}
+    
+    @pytest.mark.asyncio
+    async def test_streaming_response_not_cached(self):
+        """Test that responses without a body are skipped without errors."""
+        middleware = OptimizedCacheMiddleware()
+        
+        await middleware._cache_response("key", SimpleNamespace(status_code=200, headers={}))
+        
+        assert await middleware._get_from_cache("key") is None
+        assert middleware.analytics.cache_errors == 0
+    
+    def test_size_admission(self, monkeypatch):
+        """Test that large responses are admitted with decaying probability."""
+        middleware = OptimizedCacheMiddleware()
+        middleware._size_admission_c = 1000
+        request = SimpleNamespace(method="GET")
+        small = SimpleNamespace(status_code=200, headers={}, body=b"x" * 10)
+        large = SimpleNamespace(status_code=200, headers={}, body=b"x" * 1000)
+        
+        # exp(-10 / 1000) ~= 0.99 and exp(-1000 / 1000) ~= 0.37
+        monkeypatch.setattr(cache_optimizer.random, "random", lambda: 0.5)
+        assert middleware._is_cacheable(request, small) is True
+        assert middleware._is_cacheable(request, large) is False
+        
+        monkeypatch.setattr(cache_optimizer.random, "random", lambda: 0.3)
+        assert middleware._is_cacheable(request, large) is True
+    
+    @pytest.mark.asyncio
+    async def test_auto_tune_hill_climbs_size_admission(self):
+        """Test that the size admission parameter follows the hit rate."""
+        middleware = OptimizedCacheMiddleware(ttl=120)
+        
+        sizes = []
+        for hits in (350, 350, 300, 325):
+            for _ in range(hits):
+                middleware.analytics.record_hit_fast(1_000)
+            for _ in range(500 - hits):
+                middleware.analytics.record_miss_fast(1_000)
+            await middleware._auto_tune()
+            sizes.append(middleware._size_admission_c)
+        
+        # Grows while the hit rate holds, backs off once it drops. The
+        # cumulative hit rate would still be dropping after the last tune.
+        assert sizes == [512 * 1024, 1024 * 1024, 512 * 1024, 256 * 1024]
+    
+    def test_get_tune_stats(self):
+        """Test that tuning stats come straight from the analytics counters."""
+        middleware = OptimizedCacheMiddleware()
+        middleware.analytics.record_hit_fast(1_000)
+        middleware.analytics.record_miss_fast(3_000)
+        middleware.analytics.record_miss_fast(5_000)
+        
+        stats = middleware.get_tune_stats()
+        
+        assert stats.hit_rate == pytest.approx(1 / 3)
+        assert (stats.hits, stats.misses) == (1, 2)
+        assert (stats.hit_ns, stats.miss_ns) == (1_000, 8_000)
@@ -0,0 +1,1403 @@
+"""
+Unit tests for the connection pooling functionality of the APIFromAnything library.
+"""
+import asyncio
+import dataclasses
+import json
+import pytest
+import ssl
+import threading
+import weakref
+from types import SimpleNamespace
+
+from apifrom.performance import connection_pool
+from apifrom.performance.connection_pool import (
+    ConnectionPool,
+    ConnectionPoolMiddleware,
+    ConnectionPoolMetrics,
+    ConnectionPoolSettings,
+    PoolManager,
+)
+
+
+class TestConnectionPoolMetrics:
+    """Tests for the ConnectionPoolMetrics class."""
+    
+    def test_counters(self):
+        """Test that requests, timeouts and errors are counted."""
+        metrics = ConnectionPoolMetrics()
+        for _ in range(4):
+            metrics.record_connection_request()
+        metrics.record_connection_timeout()
+        metrics.record_connection_error()
+        
+        assert metrics.connection_requests == 4
+        assert metrics.connection_timeouts == 1
+        assert metrics.connection_errors == 1
+        assert metrics.error_rate == 0.5
+        
+        metrics.reset()
+        assert metrics.connection_requests == 0
+        assert metrics.error_rate == 0.0
+    
+    def test_concurrent_counters(self):
+        """Test that counters stay exact when recorded from many threads."""
+        metrics = ConnectionPoolMetrics()
+        
+        def worker():
+            for _ in range(1000):
+                metrics.record_connection_request()
+                metrics.record_connection_error()
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert metrics.connection_requests == 8000
+        assert metrics.connection_errors == 8000
+    
+    def test_to_dict(self):
+        """Test that the metrics convert to a dictionary."""
+        metrics = ConnectionPoolMetrics()
+        metrics.record_connection_request()
+        metrics.record_connection_acquire("1", 0.002)
+        metrics.record_connection_release("1", 0.001)
+        
+        data = metrics.to_dict()
+        
+        assert data["connection_requests"] == 1
+        assert data["avg_acquisition_time_ms"] == pytest.approx(2.0)
+        assert data["avg_release_time_ms"] == pytest.approx(1.0)
+        assert data["active_connections"] == 0
+    
+    def test_active_and_peak_connections(self):
+        """Test that active, idle and peak connections are derived from acquires and releases."""
+        metrics = ConnectionPoolMetrics()
+        metrics.record_connection_acquire("1", 0.001)
+        metrics.record_connection_acquire("2", 0.003)
+        metrics.record_connection_release("1", 0.001)
+        
+        assert metrics.active_connections == 1
+        assert metrics.max_connections == 2
+        assert metrics.total_connections == 2
+        assert metrics.idle_connections == 1
+        assert metrics.pool_utilization == 0.5
+        assert metrics.avg_acquisition_time == pytest.approx(2.0)
+    
+    def test_concurrent_acquire_release(self):
+        """Test that acquisitions recorded on many threads are all counted."""
+        metrics = ConnectionPoolMetrics()
+        
+        def worker():
+            for i in range(500):
+                metrics.record_connection_acquire(str(i), 0.001)
+                metrics.record_connection_release(str(i), 0.001)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert metrics.active_connections == 0
+        assert metrics.avg_acquisition_time == pytest.approx(1.0)
+        assert sum(shard.acquires for shard in metrics._shards) == 4000
+    
+    def test_sample_window_is_bounded(self, monkeypatch):
+        """Test that only recent times are kept and averaged."""
+        monkeypatch.setattr(connection_pool, "_SAMPLE_WINDOW", 4)
+        metrics = ConnectionPoolMetrics()
+        
+        for seconds in (0.010, 0.010, 0.001, 0.001, 0.001, 0.001):
+            metrics.record_connection_acquire("1", seconds)
+        
+        assert metrics.avg_acquisition_time == pytest.approx(1.0)
+        assert metrics.acquisition_time_percentile(99) == pytest.approx(1.0)
+    
+    @pytest.mark.parametrize("has_numpy", [True, False])
+    def test_percentiles(self, has_numpy, monkeypatch):
+        """Test acquisition and release time percentiles with and without NumPy."""
+        if has_numpy and not connection_pool.HAS_NUMPY:
+            pytest.skip("NumPy is not installed")
+        monkeypatch.setattr(connection_pool, "HAS_NUMPY", has_numpy)
+        metrics = ConnectionPoolMetrics()
+        assert metrics.acquisition_time_percentile(50) == 0.0
+        
+        for ms in range(1, 102):
+            metrics.record_connection_acquire("1", ms / 1000)
+            metrics.record_connection_release("1", ms / 2000)
+        
+        assert metrics.acquisition_time_percentile(50) == pytest.approx(51.0)
+        assert metrics.acquisition_time_percentile(99) == pytest.approx(100.0)
+        assert metrics.release_time_percentile(50) == pytest.approx(25.5)
+        assert metrics.to_dict()["p99_acquisition_time_ms"] == pytest.approx(100.0)
+    
+    def test_record_in_nanoseconds(self):
+        """Test that times recorded in nanoseconds are reported in milliseconds."""
+        metrics = ConnectionPoolMetrics()
+        metrics.record_connection_acquire_ns("1", 1_500_000)
+        metrics.record_connection_acquire_ns("2", 2_500_000)
+        metrics.record_connection_release_ns("1", 500_000)
+        
+        assert metrics.avg_acquisition_time == 2.0
+        assert metrics.acquisition_time_percentile(50) == 2.0
+        assert metrics.avg_release_time == 0.5
+    
+    @pytest.mark.parametrize("has_orjson", [True, False])
+    def test_to_json_and_save(self, has_orjson, tmp_path, monkeypatch):
+        """Test JSON export with and without orjson."""
+        if has_orjson and not connection_pool.HAS_ORJSON:
+            pytest.skip("orjson is not installed")
+        monkeypatch.setattr(connection_pool, "HAS_ORJSON", has_orjson)
+        metrics = ConnectionPoolMetrics()
+        metrics.record_connection_request()
+        
+        assert json.loads(metrics.to_json(pretty=False))["connection_requests"] == 1
+        assert "\n  " in metrics.to_json()
+        
+        file_path = tmp_path / "metrics.json"
+        metrics.save(str(file_path))
+        assert json.loads(file_path.read_text())["connection_requests"] == 1
+    
+    
+    def test_print_summary(self, capsys):
+        """Test that the summary is printed from the metrics dictionary."""
+        metrics = ConnectionPoolMetrics()
+        metrics.record_connection_request()
+        metrics.record_connection_error()
+        metrics.record_connection_acquire_ns("1", 2_500_000)
+        
+        metrics.print_summary()
+        
+        output = capsys.readouterr().out
+        assert output.startswith("=== Connection Pool Metrics Summary ===\n")
+        assert "Connection Requests: 1\n" in output
+        assert "Average Acquisition Time: 2.50 ms\n" in output
+        assert "Error Rate: 100.00%\n" in output
+        assert output.endswith("\n")
+        assert len(output.splitlines()) == 16
+    
+    def test_reads_do_not_take_locks(self):
+        """Test that metrics can be read while every recording lock is held."""
+        metrics = ConnectionPoolMetrics()
+        metrics.record_connection_request()
+        metrics.record_connection_acquire_ns("conn", 2_000_000)
+        
+        for shard in metrics._shards:
+            shard.lock.acquire()
+        try:
+            data = metrics.to_dict()
+        finally:
+            for shard in metrics._shards:
+                shard.lock.release()
+        
+        assert data["connection_requests"] == 1
+        assert data["p50_acquisition_time_ms"] == 2.0
+        assert data["p99_acquisition_time_ms"] == 2.0
+
+
+class FakeConnection:
+    """A connection object created by the test factory."""
+    
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+
+
+class SlottedConnection:
+    """A connection object that doesn't accept new attributes."""
+    
+    __slots__ = ("number", "closed", "__weakref__")
+    
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+
+
+def make_pool(**settings):
+    """Create a pool of FakeConnections with async validate and close functions."""
+    created = []
+    
+    async def factory():
+        connection = FakeConnection(len(created))
+        created.append(connection)
+        return connection
+    
+    async def validate(connection):
+        return not connection.closed
+    
+    async def close(connection):
+        connection.closed = True
+    
+    pool = ConnectionPool(
+        factory=factory,
+        settings=ConnectionPoolSettings(**settings),
+        validate_func=validate,
+        close_func=close
+    )
+    return pool, created
+
+
+class TestConnectionPool:
+    """Tests for the ConnectionPool class."""
+    
+    @pytest.mark.asyncio
+    async def test_initialize_creates_min_size(self):
+        """Test that initializing the pool creates the minimum number of connections."""
+        pool, created = make_pool(min_size=3)
+        
+        await pool.initialize()
+        
+        assert len(created) == 3
+        assert pool.pool_size == 3
+    
+    @pytest.mark.asyncio
+    async def test_acquire_reuses_most_recent_connection(self):
+        """Test that the most recently released connection is handed out first."""
+        pool, created = make_pool(min_size=0, max_size=5)
+        first = await pool.acquire()
+        second = await pool.acquire()
+        
+        await pool.release(first)
+        await pool.release(second)
+        
+        assert await pool.acquire() is second
+        assert await pool.acquire() is first
+        assert len(created) == 2
+    
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_release(self):
+        """Test that acquiring from a full pool waits for a release."""
+        pool, created = make_pool(min_size=0, max_size=1, acquire_timeout=1.0)
+        connection = await pool.acquire()
+        
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        
+        await pool.release(connection)
+        assert await waiter is connection
+        assert len(created) == 1
+    
+    @pytest.mark.asyncio
+    async def test_acquire_times_out(self):
+        """Test that acquiring from a full pool times out."""
+        pool, _ = make_pool(min_size=0, max_size=1, acquire_timeout=0.01)
+        await pool.acquire()
+        
+        with pytest.raises(TimeoutError):
+            await pool.acquire()
+        
+        assert pool.metrics.connection_timeouts == 1
+    
+    @pytest.mark.asyncio
+    async def test_release_closes_extra_idle_connections(self):
+        """Test that connections beyond max_idle are closed on release."""
+        pool, _ = make_pool(min_size=0, max_size=5, max_idle=1)
+        first = await pool.acquire()
+        second = await pool.acquire()
+        
+        await pool.release(first)
+        await pool.release(second)
+        
+        assert pool.pool_size == 1
+        assert not first.closed
+        assert second.closed
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("connection_type", [FakeConnection, SlottedConnection])
+    async def test_expired_connections_are_replaced(self, connection_type, monkeypatch):
+        """Test that connections past max_lifetime are replaced on acquire."""
+        now = [0]
+        monkeypatch.setattr(connection_pool, "_mono", lambda: now[0])
+        pool, created = make_pool(min_size=0, max_lifetime=10)
+        factory = pool.factory
+        
+        async def typed_factory():
+            connection = await factory()
+            return connection if connection_type is FakeConnection else connection_type(connection.number)
+        
+        pool.factory = typed_factory
+        first = await pool.acquire()
+        await pool.release(first)
+        assert await pool.acquire() is first
+        await pool.release(first)
+        
+        now[0] = 11_000_000_000
+        assert await pool.acquire() is not first
+        assert len(created) == 2
+    
+    @pytest.mark.asyncio
+    async def test_failed_create_frees_slot(self):
+        """Test that a failed connection attempt doesn't use up a pool slot."""
+        pool, created = make_pool(min_size=0, max_size=1, acquire_timeout=0.01)
+        factory = pool.factory
+        
+        async def failing_factory():
+            raise ConnectionError("refused")
+        
+        pool.factory = failing_factory
+        with pytest.raises(ConnectionError):
+            await pool.acquire()
+        
+        pool.factory = factory
+        connection = await pool.acquire()
+        assert connection is created[0]
+        assert pool.metrics.connection_errors == 1
+    
+    @pytest.mark.asyncio
+    async def test_close_closes_active_connections(self):
+        """Test that closing the pool closes idle and active connections."""
+        pool, created = make_pool(min_size=0, max_size=5)
+        idle = await pool.acquire()
+        active = await pool.acquire()
+        await pool.release(idle)
+        
+        await pool.close()
+        
+        assert idle.closed
+        assert active.closed
+        assert pool.active_connections == 0
+    
+    @pytest.mark.asyncio
+    async def test_initialize_connects_concurrently(self):
+        """Test that initial connections are opened concurrently and failures skipped."""
+        in_flight = []
+        peak = []
+        attempts = []
+        
+        async def factory():
+            attempts.append(1)
+            if len(attempts) == 2:
+                raise ConnectionError("refused")
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return FakeConnection(len(attempts))
+        
+        pool = ConnectionPool(factory=factory, settings=ConnectionPoolSettings(min_size=4))
+        await pool.initialize()
+        
+        assert max(peak) == 3
+        assert pool.pool_size == 3
+    
+    
+    @pytest.mark.asyncio
+    async def test_sweeper_evicts_invalid_idle_connections(self):
+        """Test that the background sweeper closes invalid idle connections."""
+        pool, created = make_pool(min_size=3, idle_timeout=0.04)
+        await pool.initialize()
+        broken = created[1]
+        broken.closed = True
+        
+        await asyncio.sleep(0.05)
+        
+        assert list(pool._idle_shards[0]) == [created[0], created[2]]
+        await pool.close()
+        assert pool._sweeper_task is None
+        assert all(connection.closed for connection in created)
+    
+    @pytest.mark.asyncio
+    async def test_idle_connections_are_topped_up(self):
+        """Test that the background task keeps min_idle connections open, up to max_idle."""
+        pool, created = make_pool(min_size=0, min_idle=4, max_idle=3, idle_check_interval=0.01)
+        await pool.initialize()
+        
+        await asyncio.sleep(0.03)
+        assert pool.pool_size == 3
+        
+        connections = [await pool.acquire() for _ in range(3)]
+        await asyncio.sleep(0.03)
+        assert pool.pool_size == 3
+        assert len(created) == 6
+        
+        for connection in connections:
+            await pool.release(connection)
+        await pool.close()
+        assert pool._idle_keeper_task is None
+        assert all(connection.closed for connection in created)
+    
+    @pytest.mark.asyncio
+    async def test_acquire_validates_while_sweeping(self):
+        """Test that acquire still validates idle connections while the sweeper runs."""
+        pool, created = make_pool(min_size=1, validation_interval=0)
+        await pool.initialize()
+        assert pool._sweeper_task is not None
+        created[0].closed = True
+        
+        connection = await pool.acquire()
+        
+        assert connection is created[1]
+        await pool.release(connection)
+        await pool.close()
+    
+    @pytest.mark.asyncio
+    async def test_sync_validate_and_close_functions(self):
+        """Test that plain functions can be used to validate and close connections."""
+        closed = []
+        created = []
+        
+        async def factory():
+            created.append(FakeConnection(len(created)))
+            return created[-1]
+        
+        pool = ConnectionPool(
+            factory=factory,
+            settings=ConnectionPoolSettings(min_size=0, validate_on_acquire=False, validation_interval=0),
+            validate_func=lambda connection: connection.number > 0,
+            close_func=closed.append
+        )
+        first = await pool.acquire()
+        second = await pool.acquire()
+        
+        await pool.release(first)
+        await pool.release(second)
+        
+        assert closed == [first]
+        assert list(pool._idle_shards[0]) == [second]
+    
+    @pytest.mark.asyncio
+    async def test_close_during_sweep_closes_drained_connections(self):
+        """Test that the connection a cancelled sweep was checking is still closed."""
+        pool, created = make_pool(min_size=2)
+        checking = asyncio.Event()
+        
+        async def slow_validate(connection):
+            checking.set()
+            await asyncio.sleep(1)
+            return True
+        
+        pool.validate_func = slow_validate
+        await pool.initialize()
+        sweep = asyncio.ensure_future(pool._sweep())
+        await checking.wait()
+        
+        await pool.close()
+        sweep.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sweep
+        
+        assert all(connection.closed for connection in created)
+    
+    @pytest.mark.asyncio
+    async def test_sweep_checks_one_connection_at_a_time(self):
+        """Test that a sweep leaves the other idle connections available to acquire."""
+        pool, created = make_pool(min_size=5, max_idle=5, idle_timeout=0, validate_on_acquire=False)
+        checking = asyncio.Event()
+        resume = asyncio.Event()
+        
+        async def slow_validate(connection):
+            checking.set()
+            await resume.wait()
+            return True
+        
+        await pool.initialize()
+        pool.validate_func = slow_validate
+        sweep = asyncio.ensure_future(pool._sweep())
+        await checking.wait()
+        
+        assert pool.pool_size == 4
+        connection = await pool.acquire()
+        await pool.release(connection)
+        resume.set()
+        await sweep
+        
+        assert len(created) == 5
+        assert pool.pool_size == 5
+        await pool.close()
+    
+    @pytest.mark.asyncio
+    async def test_sweep_closes_connections_over_max_idle(self):
+        """Test that a checked connection is closed if the pool filled up during its check."""
+        pool, created = make_pool(min_size=2, max_idle=2, idle_timeout=0, validate_on_acquire=False)
+        checking = asyncio.Event()
+        resume = asyncio.Event()
+        
+        async def slow_validate(connection):
+            checking.set()
+            await resume.wait()
+            return True
+        
+        await pool.initialize()
+        pool.validate_func = slow_validate
+        sweep = asyncio.ensure_future(pool._sweep())
+        await checking.wait()
+        
+        connections = [await pool.acquire() for _ in range(2)]
+        for connection in connections:
+            await pool.release(connection)
+        resume.set()
+        await sweep
+        
+        assert len(created) == 3
+        assert pool.pool_size == 2
+        assert sum(connection.closed for connection in created) == 1
+        await pool.close()
+    
+    
+    @pytest.mark.asyncio
+    async def test_acquire_outcomes_are_recorded(self):
+        """Test that each request is recorded as acquired, failed or cancelled."""
+        pool, created = make_pool(min_size=0, max_size=1, acquire_timeout=0.01)
+        connection = await pool.acquire()
+        
+        with pytest.raises(TimeoutError):
+            await pool.acquire()
+        
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        
+        metrics = pool.get_metrics()
+        assert metrics.connections_acquired == 1
+        assert metrics.connections_unacquired_error == 1
+        assert metrics.connections_unacquired_canceled == 1
+        assert metrics.connection_errors == 1
+        assert metrics.to_dict()["connections_unacquired_canceled"] == 1
+        await pool.release(connection)
+    
+    
+    @pytest.mark.asyncio
+    async def test_double_release_does_not_grow_pool(self):
+        """Test that releasing a connection twice doesn't free an extra slot."""
+        pool, created = make_pool(min_size=0, max_size=1, max_idle=0, acquire_timeout=0.01)
+        connection = await pool.acquire()
+        
+        await pool.release(connection)
+        await pool.release(connection)
+        await pool.acquire()
+        
+        with pytest.raises(TimeoutError):
+            await pool.acquire()
+        assert len(created) == 2
+    
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("connection_class", [FakeConnection, SlottedConnection])
+    async def test_connections_get_sequential_ids(self, connection_class):
+        """Test that connections are tracked by ids assigned in creation order."""
+        async def factory():
+            return connection_class(0)
+        
+        pool = ConnectionPool(factory=factory, settings=ConnectionPoolSettings(min_size=0))
+        first = await pool.acquire()
+        second = await pool.acquire()
+        
+        assert pool._connection_id(first) == 1
+        assert pool._connection_id(second) == 2
+        assert pool._active_connections == {1: first, 2: second}
+        
+        await pool.release(first)
+        assert pool._active_connections == {2: second}
+    
+    
+    @pytest.mark.asyncio
+    async def test_idle_shards_spread_and_steal(self):
+        """Test that idle connections are spread over shards and stolen when a shard is empty."""
+        pool, created = make_pool(min_size=4, max_size=4, idle_shards=3, idle_timeout=0)
+        await pool.initialize()
+        
+        assert len(pool._idle_shards) == 4
+        assert [len(shard) for shard in pool._idle_shards] == [1, 1, 1, 1]
+        
+        acquired = [await pool.acquire() for _ in range(3)]
+        await pool.release(acquired[0])
+        acquired.append(await pool.acquire())
+        acquired.append(await pool.acquire())
+        
+        assert len(created) == 4
+        assert sorted(connection.number for connection in acquired[1:]) == [0, 1, 2, 3]
+        assert pool.pool_size == 0
+    
+    
+    @pytest.mark.asyncio
+    async def test_nested_connection_blocks_reuse_connection(self):
+        """Test that nested connection() blocks in one task share a connection."""
+        pool, created = make_pool(min_size=0)
+        other, _ = make_pool(min_size=0)
+        
+        async with pool.connection() as outer:
+            async with pool.connection() as inner:
+                assert inner is outer
+                assert pool.get_metrics().connection_requests == 1
+                async with other.connection() as foreign:
+                    assert foreign is not outer
+            assert pool.active_connections == 1
+        
+        assert pool.active_connections == 0
+        async with pool.connection() as again:
+            assert again is outer
+    
+    @pytest.mark.asyncio
+    async def test_child_tasks_get_their_own_connection(self):
+        """Test that tasks started inside a connection() block don't share its connection."""
+        pool, created = make_pool(min_size=0)
+        
+        async def child():
+            async with pool.connection() as connection:
+                return connection
+        
+        async with pool.connection() as outer:
+            inner = await asyncio.ensure_future(child())
+        
+        assert inner is not outer
+        assert len(created) == 2
+    
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("connection_type", ["attribute", "weakref"])
+    async def test_recent_validation_is_trusted(self, connection_type, monkeypatch):
+        """Test that validate_func is skipped within the validation interval."""
+        now = [0]
+        monkeypatch.setattr(connection_pool, "_mono", lambda: now[0])
+        connection_class = FakeConnection if connection_type == "attribute" else SlottedConnection
+        calls = []
+        
+        async def factory():
+            return connection_class(0)
+        
+        def validate(connection):
+            calls.append(now[0])
+            return True
+        
+        pool = ConnectionPool(
+            factory=factory,
+            settings=ConnectionPoolSettings(min_size=0, validation_interval=2),
+            validate_func=validate
+        )
+        connection = await pool.acquire()
+        await pool.release(connection)
+        
+        now[0] = 1_000_000_000
+        assert await pool.acquire() is connection
+        await pool.release(connection)
+        
+        now[0] = 3_000_000_000
+        await pool.acquire()
+        
+        assert calls == [0, 3_000_000_000]
+    
+    
+    @pytest.mark.asyncio
+    async def test_initialize_warms_new_connections(self):
+        """Test that initialize warms new connections and closes those that fail to warm."""
+        pool, created = make_pool(min_size=3)
+        warmed = []
+        
+        def warm(connection):
+            if connection.number == 1:
+                raise ConnectionError("reset")
+            warmed.append(connection)
+        
+        pool.warm_func = warm
+        await pool.initialize()
+        
+        assert warmed == [created[0], created[2]]
+        assert pool.pool_size == 2
+        assert created[1].closed
+        
+        await pool.acquire()
+        await pool.acquire()
+        await pool.acquire()
+        assert len(warmed) == 2
+        await pool.close()
+    
+    
+    @pytest.mark.asyncio
+    async def test_released_connections_skip_validation(self, monkeypatch):
+        """Test that a connection is trusted for validation_interval after it is released."""
+        now = [0]
+        monkeypatch.setattr(connection_pool, "_mono", lambda: now[0])
+        calls = []
+        
+        async def factory():
+            return FakeConnection(0)
+        
+        def validate(connection):
+            calls.append(now[0])
+            return True
+        
+        pool = ConnectionPool(
+            factory=factory,
+            settings=ConnectionPoolSettings(min_size=0, validation_interval=1),
+            validate_func=validate
+        )
+        connection = await pool.acquire()
+        
+        now[0] = 5_000_000_000
+        await pool.release(connection)
+        now[0] = 5_500_000_000
+        assert await pool.acquire() is connection
+        
+        assert calls == [0]
+    
+    
+    @pytest.mark.asyncio
+    async def test_acquire_many_opens_connections_concurrently(self):
+        """Test that acquire_many opens the connections it needs in parallel."""
+        in_flight = []
+        peak = []
+        
+        async def factory():
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return FakeConnection(len(peak))
+        
+        pool = ConnectionPool(factory=factory, settings=ConnectionPoolSettings(min_size=0, max_size=4))
+        
+        connections = await pool.acquire_many(4)
+        
+        assert len(set(map(id, connections))) == 4
+        assert max(peak) == 4
+        assert pool.active_connections == 4
+        with pytest.raises(ValueError):
+            await pool.acquire_many(5)
+    
+    @pytest.mark.asyncio
+    async def test_acquire_many_releases_on_failure(self):
+        """Test that acquire_many gives back what it got when one acquisition fails."""
+        attempts = []
+        
+        async def factory():
+            attempts.append(1)
+            if len(attempts) == 2:
+                raise ConnectionError("refused")
+            return FakeConnection(len(attempts))
+        
+        pool = ConnectionPool(factory=factory, settings=ConnectionPoolSettings(min_size=0, max_size=3))
+        
+        with pytest.raises(ConnectionError):
+            await pool.acquire_many(3)
+        
+        assert pool.active_connections == 0
+        assert pool.pool_size == 2
+    
+    @pytest.mark.asyncio
+    async def test_acquire_many_releases_on_cancel(self):
+        """Test that a cancelled acquire_many gives back what it got and frees its slots."""
+        unblock = asyncio.Event()
+        created = []
+        
+        async def factory():
+            created.append(FakeConnection(len(created)))
+            if len(created) > 1:
+                await unblock.wait()
+            return created[-1]
+        
+        pool = ConnectionPool(
+            factory=factory,
+            settings=ConnectionPoolSettings(min_size=0, max_size=3, acquire_timeout=0.05)
+        )
+        
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.acquire_many(3), timeout=0.02)
+        
+        assert pool.active_connections == 0
+        assert pool.pool_size == 1
+        unblock.set()
+        assert len(await pool.acquire_many(3)) == 3
+
+
+class TestPoolManager:
+    """Tests for the PoolManager class."""
+    
+    @pytest.mark.asyncio
+    async def test_create_pool_reuses_loop_shard(self):
+        """Test that a name maps to one pool per event loop."""
+        manager = PoolManager()
+        
+        pool = await manager.create_pool("db", FakeConnection, ConnectionPoolSettings(min_size=0))
+        
+        assert await manager.create_pool("db", FakeConnection) is pool
+        assert manager.get_pool("db") is pool
+        assert manager.get_pool("missing") is None
+    
+    def test_get_pool_without_running_loop(self):
+        """Test that get_pool returns None outside of an event loop."""
+        manager = PoolManager()
+        asyncio.run(manager.create_pool("db", FakeConnection, ConnectionPoolSettings(min_size=0)))
+        
+        assert manager.get_pool("db") is None
+    
+    def test_pools_are_sharded_per_loop(self):
+        """Test that each event loop gets its own pool and all shards are reported and closed."""
+        manager = PoolManager()
+        pools = []
+        # Keep the loops alive so the second one can't reuse the first one's id
+        loops = []
+        
+        async def create():
+            pool = await manager.create_pool("db", FakeConnection, ConnectionPoolSettings(min_size=1))
+            assert manager.get_pool("db") is pool
+            pools.append(pool)
+            loops.append(asyncio.get_running_loop())
+        
+        for _ in range(2):
+            thread = threading.Thread(target=asyncio.run, args=(create(),))
+            thread.start()
+            thread.join()
+        
+        assert len(pools) == 2
+        assert pools[0] is not pools[1]
+        metrics = manager.get_metrics()
+        assert len(metrics) == 2
+        assert all(label.startswith("db@") for label in metrics)
+        
+        asyncio.run(manager.close_all())
+        
+        assert all(pool._closed for pool in pools)
+        assert manager.get_metrics() == {}
+    
+    @pytest.mark.asyncio
+    async def test_reused_loop_id_gets_new_pool(self):
+        """Test that pools left by a collected loop are not handed to a loop that reuses its id."""
+        manager = PoolManager()
+        stale = await manager.create_pool("db", FakeConnection, ConnectionPoolSettings(min_size=0))
+        
+        # Make the shard look like it was created by a loop that has been collected
+        class DeadLoop:
+            pass
+        manager._loops[id(asyncio.get_running_loop())] = weakref.ref(DeadLoop())
+        
+        assert manager.get_pool("db") is None
+        pool = await manager.create_pool("db", FakeConnection, ConnectionPoolSettings(min_size=0))
+        assert pool is not stale
+        assert manager.get_pool("db") is pool
+    
+    @pytest.mark.asyncio
+    async def test_close_all_closes_connections_concurrently(self):
+        """Test that closing every pool closes all their connections at once."""
+        closing = []
+        peak = []
+        
+        async def factory():
+            return FakeConnection(0)
+        
+        async def close(connection):
+            closing.append(connection)
+            peak.append(len(closing))
+            await asyncio.sleep(0.01)
+            closing.remove(connection)
+        
+        manager = PoolManager()
+        for name in ("database", "redis"):
+            pool = await manager.create_pool(
+                name,
+                factory,
+                settings=ConnectionPoolSettings(min_size=2, max_idle=2),
+                close_func=close
+            )
+        await pool.acquire()
+        
+        await manager.close_all()
+        
+        assert max(peak) == 4
+        assert manager.get_pool("redis") is None
+
+
+class TestConnectionPoolSettings:
+    """Tests for the ConnectionPoolSettings class."""
+    
+    def test_settings_are_immutable(self):
+        """Test that settings can't be changed after they are created."""
+        settings = ConnectionPoolSettings(max_size=3)
+        
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            settings.max_size = 4
+        
+        assert dataclasses.replace(settings, max_size=4).max_size == 4
+        assert settings == ConnectionPoolSettings(max_size=3)
+    
+    def test_presets(self):
+        """Test that the presets return settings with their sizes."""
+        assert ConnectionPoolSettings.create_aggressive().max_size == 100
+        assert ConnectionPoolSettings.create_conservative().max_size == 5
+        assert ConnectionPoolSettings.create_balanced().max_size == 20
+        assert not ConnectionPoolSettings.create_aggressive().validate_on_acquire
+
+
+class FakePgPool:
+    """A stand-in for an asyncpg pool."""
+    
+    def __init__(self, url, **options):
+        self.url = url
+        self.options = options
+        self.acquired = []
+        self.closed = False
+    
+    async def acquire(self, timeout=None):
+        self.acquired.append(FakeConnection(len(self.acquired)))
+        return self.acquired[-1]
+    
+    async def release(self, connection):
+        self.acquired.remove(connection)
+    
+    async def close(self):
+        self.closed = True
+
+
+class FakeRedisPool:
+    """A stand-in for a redis.asyncio connection pool."""
+    
+    def __init__(self, url, **options):
+        self.url = url
+        self.options = options
+        self.disconnects = 0
+    
+    async def disconnect(self):
+        self.disconnects += 1
+
+
+class FakeRedis:
+    """A stand-in for a redis.asyncio client."""
+    
+    def __init__(self, connection_pool):
+        self.connection_pool = connection_pool
+        self.pings = 0
+        self.closed = False
+        self.connection = None
+    
+    async def ping(self):
+        self.pings += 1
+        return True
+    
+    async def close(self):
+        self.closed = True
+
+
+class TestConnectionPoolMiddleware:
+    """Tests for the ConnectionPoolMiddleware class."""
+    
+    @pytest.fixture
+    def fake_redis(self, monkeypatch):
+        aioredis = pytest.importorskip("redis.asyncio")
+        clients = []
+        
+        def client(connection_pool):
+            clients.append(FakeRedis(connection_pool))
+            return clients[-1]
+        
+        monkeypatch.setattr(aioredis, "ConnectionPool", SimpleNamespace(from_url=FakeRedisPool))
+        monkeypatch.setattr(aioredis, "Redis", client)
+        return clients
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pre_warm", [True, False])
+    async def test_redis_pool_is_pre_warmed(self, fake_redis, pre_warm):
+        """Test that the Redis pool opens min_size connections and pings them when pre-warming."""
+        middleware = ConnectionPoolMiddleware(
+            redis_url="redis://localhost:6379/0",
+            settings=ConnectionPoolSettings(min_size=2, pre_warm=pre_warm)
+        )
+        
+        await middleware.initialize()
+        
+        pool = middleware.pool_manager.get_pool("redis")
+        assert pool.pool_size == 2
+        assert [client.pings for client in fake_redis] == [int(pre_warm)] * 2
+        await middleware.shutdown()
+        assert all(client.closed for client in fake_redis)
+    
+    @pytest.mark.asyncio
+    async def test_dispatch_attaches_pool_manager(self, fake_redis):
+        """Test that requests get the pool manager and pools can be rebuilt after shutdown."""
+        middleware = ConnectionPoolMiddleware(
+            redis_url="redis://localhost:6379/0",
+            settings=ConnectionPoolSettings(min_size=1)
+        )
+        request = SimpleNamespace(state=SimpleNamespace())
+        
+        async def call_next(request):
+            return request.state.pool_manager.get_pool("redis")
+        
+        assert await middleware.dispatch(request, call_next) is not None
+        
+        await middleware.shutdown()
+        assert await middleware.dispatch(request, call_next) is not None
+        assert len(fake_redis) == 2
+        await middleware.shutdown()
+    
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode, pings", [("socket", 0), ("query", 1), ("none", 0), ("fast", 0), ("verified", 1), ("unverified", 0)])
+    async def test_validation_modes(self, fake_redis, mode, pings):
+        """Test that the validation mode decides whether validating makes a round trip."""
+        middleware = ConnectionPoolMiddleware(
+            redis_url="redis://localhost:6379/0",
+            settings=ConnectionPoolSettings(
+                min_size=1,
+                pre_warm=False,
+                validation_mode=mode,
+                validation_interval=0
+            )
+        )
+        await middleware.initialize()
+        pool = middleware.pool_manager.get_pool("redis")
+        
+        assert await pool._validate_connection(fake_redis[0])
+        
+        assert fake_redis[0].pings == pings
+        await middleware.shutdown()
+    
+    def test_each_event_loop_gets_its_own_pools(self, fake_redis):
+        """Test that requests on a second event loop initialize pools for that loop."""
+        middleware = ConnectionPoolMiddleware(
+            redis_url="redis://localhost:6379/0",
+            settings=ConnectionPoolSettings(min_size=1, idle_timeout=0)
+        )
+        
+        async def call_next(request):
+            return request.state.pool_manager.get_pool("redis")
+        
+        pools = []
+        for _ in range(2):
+            loop = asyncio.new_event_loop()
+            try:
+                request = SimpleNamespace(state=SimpleNamespace())
+                pools.append(loop.run_until_complete(middleware.dispatch(request, call_next)))
+            finally:
+                loop.close()
+        
+        assert None not in pools
+        assert pools[0] is not pools[1]
+        assert len(fake_redis) == 2
+        assert fake_redis[0].connection_pool is not fake_redis[1].connection_pool
+    
+    def test_unknown_validation_mode(self):
+        """Test that an unknown validation mode is rejected."""
+        middleware = ConnectionPoolMiddleware(settings=ConnectionPoolSettings(validation_mode="bogus"))
+        
+        with pytest.raises(ValueError):
+            middleware._make_validator(query=bool, socket=bool)
+    
+    
+    @pytest.mark.asyncio
+    async def test_database_driver_is_selected_once(self, monkeypatch):
+        """Test that the driver is picked once, at construction."""
+        monkeypatch.setattr(connection_pool, "HAS_SQLALCHEMY", False)
+        pg_pools = []
+        
+        async def create_pool(url, **options):
+            pg_pools.append(FakePgPool(url, **options))
+            return pg_pools[-1]
+        
+        monkeypatch.setattr(connection_pool, "HAS_ASYNCPG", True)
+        monkeypatch.setattr(connection_pool, "asyncpg", SimpleNamespace(create_pool=create_pool), raising=False)
+        middleware = ConnectionPoolMiddleware(
+            database_url="postgresql://localhost/db",
+            settings=ConnectionPoolSettings(min_size=1, pre_warm=False)
+        )
+        assert middleware._database_pool_builder == middleware._build_asyncpg_pool
+        
+        await middleware.initialize()
+        await middleware.shutdown()
+        await middleware.initialize()
+        
+        assert middleware.pool_manager.get_pool("database").pool_size == 1
+        assert len(pg_pools) == 2
+        assert pg_pools[0].closed
+    
+    @pytest.mark.asyncio
+    async def test_postgres_pool_delegates_to_asyncpg(self, monkeypatch):
+        """Test that Postgres connections come from a single asyncpg pool."""
+        monkeypatch.setattr(connection_pool, "HAS_SQLALCHEMY", False)
+        pg_pools = []
+        
+        async def create_pool(url, **options):
+            await asyncio.sleep(0)
+            pg_pools.append(FakePgPool(url, **options))
+            return pg_pools[-1]
+        
+        monkeypatch.setattr(connection_pool, "HAS_ASYNCPG", True)
+        monkeypatch.setattr(connection_pool, "asyncpg", SimpleNamespace(create_pool=create_pool), raising=False)
+        middleware = ConnectionPoolMiddleware(
+            database_url="postgresql://localhost/db",
+            settings=ConnectionPoolSettings(min_size=3, max_size=4, pre_warm=False)
+        )
+        
+        await middleware.initialize()
+        
+        assert len(pg_pools) == 1
+        pg_pool = pg_pools[0]
+        assert pg_pool.options["min_size"] == 3
+        assert pg_pool.options["max_size"] == 4
+        assert len(pg_pool.acquired) == 3
+        assert middleware.pool_manager.get_pool("database").validate_func(None)
+        
+        await middleware.shutdown()
+        assert pg_pool.acquired == []
+        assert pg_pool.closed
+    
+    @pytest.mark.asyncio
+    async def test_postgres_pools_share_one_ssl_context(self, monkeypatch):
+        """Test that TLS-enabled pools all get the same SSL context."""
+        monkeypatch.setattr(connection_pool, "HAS_SQLALCHEMY", False)
+        pg_pools = []
+        
+        async def create_pool(url, **options):
+            pg_pools.append(FakePgPool(url, **options))
+            return pg_pools[-1]
+        
+        monkeypatch.setattr(connection_pool, "HAS_ASYNCPG", True)
+        monkeypatch.setattr(connection_pool, "asyncpg", SimpleNamespace(create_pool=create_pool), raising=False)
+        
+        for use_ssl in (True, True, False):
+            middleware = ConnectionPoolMiddleware(database_url="postgresql://localhost/db", use_ssl=use_ssl)
+            await middleware._get_pg_pool()
+        
+        assert isinstance(pg_pools[0].options["ssl"], ssl.SSLContext)
+        assert pg_pools[1].options["ssl"] is pg_pools[0].options["ssl"]
+        assert "ssl" not in pg_pools[2].options
+    
+    @pytest.mark.asyncio
+    async def test_postgres_connections_start_with_warm_statement_cache(self, monkeypatch):
+        """Test that new asyncpg connections keep their statements and fetch the warm queries."""
+        monkeypatch.setattr(connection_pool, "HAS_SQLALCHEMY", False)
+        pg_pools = []
+        
+        async def create_pool(url, **options):
+            pg_pools.append(FakePgPool(url, **options))
+            return pg_pools[-1]
+        
+        monkeypatch.setattr(connection_pool, "HAS_ASYNCPG", True)
+        monkeypatch.setattr(connection_pool, "asyncpg", SimpleNamespace(create_pool=create_pool), raising=False)
+        middleware = ConnectionPoolMiddleware(
+            database_url="postgresql://localhost/db",
+            statement_cache_size=256,
+            warm_queries=["SELECT * FROM users", "SELECT * FROM orders"]
+        )
+        fetched = []
+        
+        async def fetch(query):
+            fetched.append(query)
+        
+        pg_pool = await middleware._get_pg_pool()
+        await pg_pool.options["init"](SimpleNamespace(fetch=fetch))
+        
+        assert pg_pool.options["statement_cache_size"] == 256
+        assert pg_pool.options["max_cached_statement_lifetime"] == 0
+        assert fetched == ["SELECT * FROM users", "SELECT * FROM orders"]
+    
+    def test_unsupported_database_disables_pooling(self, monkeypatch):
+        """Test that no builder is picked for an unsupported database."""
+        monkeypatch.setattr(connection_pool, "HAS_SQLALCHEMY", False)
+        
+        middleware = ConnectionPoolMiddleware(database_url="oracle://localhost/db")
+        
+        assert middleware._database_pool_builder is None
+    
+    
+    @pytest.mark.asyncio
+    async def test_redis_clients_share_one_connection_pool(self, fake_redis):
+        """Test that every pooled Redis client uses the same connection pool."""
+        middleware = ConnectionPoolMiddleware(
+            redis_url="redis://localhost:6379/0",
+            max_connections=7,
+            settings=ConnectionPoolSettings(min_size=3)
+        )
+        
+        await middleware.initialize()
+        
+        shared = middleware._resources().aioredis_pool
+        assert shared.url == "redis://localhost:6379/0"
+        assert shared.options["max_connections"] == 7
+        assert all(client.connection_pool is shared for client in fake_redis)
+        await middleware.shutdown()
+        assert shared.disconnects == 1
+    
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_first_requests_initialize_once(self, fake_redis):
+        """Test that concurrent first requests share one initialization."""
+        middleware = ConnectionPoolMiddleware(
+            redis_url="redis://localhost:6379/0",
+            settings=ConnectionPoolSettings(min_size=2)
+        )
+        request = SimpleNamespace(state=SimpleNamespace())
+        initialize_redis_pool = middleware._initialize_redis_pool
+        calls = []
+        
+        async def counted():
+            calls.append(1)
+            await initialize_redis_pool()
+        
+        middleware._initialize_redis_pool = counted
+        
+        async def call_next(request):
+            return request.state.pool_manager.get_pool("redis")
+        
+        pools = await asyncio.gather(*[middleware.dispatch(request, call_next) for _ in range(5)])
+        
+        assert len(set(map(id, pools))) == 1
+        assert calls == [1]
+        assert len(fake_redis) == 2
+        assert middleware.initialized
+        await middleware.shutdown()
+    
+    
+    @pytest.mark.asyncio
+    async def test_initialized_skips_lookup_on_same_loop(self, fake_redis):
+        """Test that requests on the loop last seen don't look up its resources."""
+        middleware = ConnectionPoolMiddleware(
+            redis_url="redis://localhost:6379/0",
+            settings=ConnectionPoolSettings(min_size=1)
+        )
+        await middleware.initialize()
+        
+        class NoLookups(dict):
+            def get(self, *args):
+                raise AssertionError("resources looked up")
+        
+        middleware._loops = NoLookups(middleware._loops)
+        request = SimpleNamespace(state=SimpleNamespace())
+        
+        async def call_next(request):
+            return request.state.pool_manager.get_pool("redis")
+        
+        assert middleware.initialized
+        assert await middleware.dispatch(request, call_next) is not None
+        await middleware.shutdown()
+        assert middleware._last_resources is None
+    
+    
+    @pytest.mark.asyncio
+    async def test_pool_manager_is_attached_once(self):
+        """Test that the pool manager isn't reassigned on a request that already has it."""
+        writes = []
+        
+        class State:
+            def __setattr__(self, name, value):
+                writes.append(name)
+                super().__setattr__(name, value)
+        
+        middleware = ConnectionPoolMiddleware()
+        request = SimpleNamespace(state=State())
+        
+        await middleware.process_request(request)
+        await middleware.process_request(request)
+        
+        assert request.state.pool_manager is middleware.pool_manager
+        assert writes == ["pool_manager"]
+    
+    
+    @pytest.fixture
+    def fake_sqlalchemy(self, monkeypatch):
+        engines = []
+        
+        class Engine:
+            def __init__(self, url, **options):
+                self.url = url
+                self.options = options
+                self.threads = []
+                self.disposed = False
+                engines.append(self)
+            
+            def dispose(self):
+                self.disposed = True
+            
+            def connect(self):
+                self.threads.append(threading.current_thread().name)
+                return SimpleNamespace(closed=False, invalidated=False, close=lambda: None)
+        
+        monkeypatch.setattr(connection_pool, "HAS_SQLALCHEMY", True)
+        monkeypatch.setattr(connection_pool, "sqlalchemy", SimpleNamespace(create_engine=Engine), raising=False)
+        monkeypatch.setattr(connection_pool, "create_async_engine", Engine, raising=False)
+        return engines
+    
+    @pytest.mark.asyncio
+    async def test_sync_sqlalchemy_connects_on_dedicated_threads(self, fake_sqlalchemy):
+        """Test that a synchronous SQLAlchemy engine is only used from the pool's own threads."""
+        middleware = ConnectionPoolMiddleware(
+            database_url="sqlite:///app.db",
+            settings=ConnectionPoolSettings(min_size=2, pre_warm=False)
+        )
+        assert middleware._database_pool_builder == middleware._build_sqlalchemy_pool
+        
+        await middleware.initialize()
+        
+        engine, = fake_sqlalchemy
+        assert len(engine.threads) == 2
+        assert all(name.startswith("db-pool") for name in engine.threads)
+        executor = middleware._resources().db_executor
+        assert executor._max_workers == middleware.settings.max_size
+        await middleware.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_shutdown_disposes_sync_sqlalchemy_engine(self, fake_sqlalchemy):
+        """Test that shutdown disposes the engine, stops its threads and a later initialize rebuilds them."""
+        middleware = ConnectionPoolMiddleware(
+            database_url="sqlite:///app.db",
+            settings=ConnectionPoolSettings(min_size=1, pre_warm=False)
+        )
+        await middleware.initialize()
+        executor = middleware._resources().db_executor
+        
+        await middleware.shutdown()
+        
+        assert fake_sqlalchemy[0].disposed
+        with pytest.raises(RuntimeError):
+            executor.submit(print)
+        
+        await middleware.initialize()
+        assert len(fake_sqlalchemy) == 2
+        assert middleware._resources().db_executor is not executor
+        assert middleware.pool_manager.get_pool("database").pool_size == 1
+        await middleware.shutdown()
+        assert fake_sqlalchemy[1].disposed
+    
+    def test_plain_postgres_url_prefers_asyncpg(self, fake_sqlalchemy, monkeypatch):
+        """Test that a plain Postgres URL uses asyncpg instead of a blocking SQLAlchemy driver."""
+        monkeypatch.setattr(connection_pool, "HAS_ASYNCPG", True)
+        
+        middleware = ConnectionPoolMiddleware(database_url="postgresql://localhost/db")
+        
+        assert middleware._database_pool_builder == middleware._build_asyncpg_pool
+    
+    
+    @pytest.mark.asyncio
+    async def test_pools_are_initialized_concurrently(self):
+        """Test that the database and Redis pools warm up at the same time and fail independently."""
+        middleware = ConnectionPoolMiddleware(redis_url="redis://localhost:6379/0")
+        middleware.database_url = "postgresql://localhost/db"
+        events = []
+        
+        async def initialize_database_pool():
+            events.append("database started")
+            await asyncio.sleep(0.01)
+            events.append("database failed")
+            raise ConnectionError("refused")
+        
+        async def initialize_redis_pool():
+            events.append("redis started")
+        
+        middleware._initialize_database_pool = initialize_database_pool
+        middleware._initialize_redis_pool = initialize_redis_pool
+        
+        await middleware.initialize()
+        
+        assert events == ["database started", "redis started", "database failed"]
+        assert middleware.initialized
+    
+    
+    @pytest.mark.parametrize("available", [True, False])
+    def test_use_uvloop_installs_policy(self, monkeypatch, available):
+        """Test that use_uvloop sets uvloop's event loop policy when uvloop is installed."""
+        class EventLoopPolicy:
+            pass
+        
+        policies = []
+        monkeypatch.setattr(connection_pool, "HAS_UVLOOP", available)
+        monkeypatch.setattr(connection_pool, "uvloop", SimpleNamespace(EventLoopPolicy=EventLoopPolicy), raising=False)
+        monkeypatch.setattr(asyncio, "set_event_loop_policy", policies.append)
+        
+        ConnectionPoolMiddleware(settings=ConnectionPoolSettings(use_uvloop=True))
+        ConnectionPoolMiddleware()
+        
+        assert [type(policy) for policy in policies] == ([EventLoopPolicy] if available else [])
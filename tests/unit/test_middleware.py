@@ -274,5 +274,38 @@ class TestMiddlewareExecution:
         assert short_circuit_response.headers["X-Blocked-By"] == "ShortCircuitMiddleware"
 
 
+
+class TestMiddlewareDispatch:
+    """Tests for the Starlette-backed Middleware.dispatch."""
+    
+    @pytest.mark.asyncio
+    async def test_default_process_response_is_skipped(self, monkeypatch):
+        """Test that dispatch only awaits process_response when a subclass overrides it."""
+        from apifrom.middleware.base import Middleware as StarletteMiddleware
+        
+        calls = []
+        
+        class PassThrough(StarletteMiddleware):
+            async def process_request(self, request):
+                return request
+        
+        class Tagging(PassThrough):
+            async def process_response(self, response):
+                calls.append(response)
+                return response + "!"
+        
+        async def call_next(request):
+            return request + " handled"
+        
+        async def default(self, response):
+            calls.append("default")
+            return response
+        
+        monkeypatch.setattr(StarletteMiddleware, "process_response", default)
+        
+        assert await PassThrough(app=None).dispatch("request", call_next) == "request handled"
+        assert await Tagging(app=None).dispatch("request", call_next) == "request handled!"
+        assert calls == ["request handled"]
+
 if __name__ == "__main__":
     pytest.main(["-v", __file__]) 
\ No newline at end of file